@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+
+class PredictionBatcher:
+    """
+    Regroupe les appels concurrents à /predict en lots vectorisés.
+
+    Les requêtes soumises sont mises en file ; une tâche de fond attend au plus
+    `max_wait_ms` millisecondes (ou `max_batch_size` requêtes) avant d'appeler
+    `predict_fn` une seule fois sur tout le lot, dans le pool de threads afin de ne
+    pas bloquer la boucle d'événements. Chaque appelant reçoit ensuite son propre résultat.
+
+    Args:
+        predict_fn (Callable): Fonction qui prend une liste de requêtes et renvoie une
+            liste de résultats (ou d'exceptions) dans le même ordre.
+        max_batch_size (int): Nombre maximal de requêtes par lot.
+        max_wait_ms (float): Temps d'attente maximal du premier élément d'un lot.
+    """
+
+    def __init__(self, predict_fn: Callable[[list], list], max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        # Lot en cours de constitution ou de prédiction, déjà retiré de la file
+        self._batch: list = []
+
+        # Métriques
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch_size = 0
+        self.batch_size_counts: dict[int, int] = {}
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def submit(self, request):
+        """Ajoute une requête au prochain lot et attend son résultat."""
+        if self._worker is None or self._worker.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future, time.perf_counter()))
+        return await future
+
+    def start(self):
+        """Démarre la tâche de regroupement dans la boucle d'événements courante."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Arrête la tâche de fond ; les requêtes du lot en cours et celles encore en file
+        reçoivent une erreur.
+        """
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        pending = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Le service de prédiction est arrêté"))
+        self._batch = []
+        self._worker = None
+
+    async def _collect(self) -> list:
+        batch = self._batch = []
+        batch.append(await self._queue.get())
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Récupérer sans attendre ce qui est déjà en file
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            self._record(len(batch), [started - enqueued_at for _, _, enqueued_at in batch])
+
+            requests = [request for request, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.predict_fn, requests)
+            except Exception as e:
+                logging.error(f"Erreur lors de la prédiction d'un lot de {len(batch)} requêtes: {e}")
+                results = [e] * len(batch)
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._batch = []
+
+    def _record(self, batch_size: int, queue_waits: list[float]):
+        self.batches += 1
+        self.items += batch_size
+        self.max_observed_batch_size = max(self.max_observed_batch_size, batch_size)
+        self.batch_size_counts[batch_size] = self.batch_size_counts.get(batch_size, 0) + 1
+        self.queue_wait_total += sum(queue_waits)
+        self.queue_wait_max = max(self.queue_wait_max, max(queue_waits))
+
+    def stats(self) -> dict:
+        """Renvoie les métriques de regroupement (taille des lots, temps passé en file)."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_observed_batch_size": self.max_observed_batch_size,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "avg_queue_wait_ms": self.queue_wait_total / self.items * 1000 if self.items else 0.0,
+            "max_queue_wait_ms": self.queue_wait_max * 1000,
+        }
@@ -0,0 +1,87 @@
+"""
+Mesure le coût de l'authentification par jeton (`main.get_current_user`) selon le chemin suivi :
+
+- base : jeton sans identifiant dans ses claims, vérifié puis relu dans Users par nom
+  (comportement antérieur, à chaque requête) ;
+- vérification : jeton avec claims, signature vérifiée à chaque requête (cache désactivé) ;
+- cache : jeton déjà vérifié, servi par le cache des jetons.
+
+Usage :
+    python -m benchmarks.bench_auth --repeat 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="Authentifications chronométrées par chemin")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_auth.db"))
+    return parser.parse_args()
+
+
+async def measure(authenticate, token: str, repeat: int) -> dict:
+    from benchmarks.suite import summarize
+
+    await authenticate(token)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        await authenticate(token)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+    from datetime import timedelta
+
+    from jose import jwt
+
+    import crud, schemas
+    import main as api
+    from benchmarks.suite import BENCH_USER
+    from database import SessionLocal
+    from utils import token_cache
+
+    logging.disable(logging.INFO)
+    db = SessionLocal()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(**BENCH_USER))
+        token = api.create_access_token(user, expires_delta=timedelta(minutes=30))
+    finally:
+        db.close()
+    legacy_token = jwt.encode(
+        {"sub": BENCH_USER["nom"], "exp": time.time() + 1800}, api.SECRET_KEY, algorithm=api.ALGORITHM
+    )
+
+    async def scenarios():
+        results = {}
+        token_cache.max_size = 0
+        results["base"] = await measure(api.get_current_user, legacy_token, args.repeat)
+        results["vérification"] = await measure(api.get_current_user, token, args.repeat)
+        token_cache.max_size = 1
+        results["cache"] = await measure(api.get_current_user, token, args.repeat)
+        return results
+
+    print(f"{'chemin':<14} {'auth/s':>10} {'p50 µs':>9} {'p99 µs':>9}")
+    for name, result in asyncio.run(scenarios()).items():
+        print(
+            f"{name:<14} {result['ops_per_second']:>10.0f} {result['p50_ms'] * 1000:>9.1f} "
+            f"{result['p99_ms'] * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare les pickles sklearn de models/pkl au bundle d'inférence de model_export.py :
+taille sur disque, temps de chargement à froid (import compris, dans un processus
+neuf) et latence par ligne, puis vérifie que les prédictions sont identiques.
+
+Le bundle est exporté dans un répertoire temporaire si `--bundle-dir` n'en contient
+pas. L'échantillon est lu dans `--sample` (CSV/Parquet) ou, à défaut, construit pour
+couvrir tout le vocabulaire des encodeurs.
+
+Usage :
+    python -m benchmarks.bench_bundle --repeat 200 --batch 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Chargement à froid exécuté dans un processus neuf pour chaque format
+COLD_LOAD = {
+    "pickles": (
+        "import time; started = time.perf_counter(); import joblib; "
+        "[joblib.load('{d}/' + name) for name in ('catboost_model.pkl', 'Logistic_Regression_model.pkl')]; "
+        "print(time.perf_counter() - started)"
+    ),
+    "bundle": (
+        "import time; started = time.perf_counter(); import model_export; "
+        "model_export.load_bundle('{d}'); print(time.perf_counter() - started)"
+    ),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", default="./models/pkl", help="Répertoire des pickles")
+    parser.add_argument("--bundle-dir", help="Répertoire contenant déjà un bundle exporté")
+    parser.add_argument("--sample", help="CSV ou Parquet d'exemples mis de côté")
+    parser.add_argument("--sample-size", type=int, default=1000, help="Lignes lues dans --sample")
+    parser.add_argument("--repeat", type=int, default=200, help="Prédictions unitaires chronométrées")
+    parser.add_argument("--batch", type=int, default=1000, help="Taille du lot chronométré")
+    return parser.parse_args()
+
+
+def cold_load_seconds(directory: str, kind: str) -> float:
+    code = COLD_LOAD[kind].format(d=os.path.abspath(directory))
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=os.getcwd()
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def per_row_ms(predict, requests: list, repeat: int) -> float:
+    started = time.perf_counter()
+    for i in range(repeat):
+        predict([requests[i % len(requests)]])
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+
+    import logging
+
+    import inference, model_export
+    from model_registry import ModelRegistry
+
+    logging.disable(logging.INFO)
+    registry = ModelRegistry(args.models_dir)
+    catboost_model, lr_model = registry.get("catboost"), registry.get("logistic_regression")
+
+    bundle_dir = args.bundle_dir
+    if bundle_dir is None or not model_export.has_bundle(bundle_dir):
+        bundle_dir = tempfile.mkdtemp(prefix="bundle_")
+        model_export.export_bundle(catboost_model, lr_model, bundle_dir)
+    bundle = model_export.load_bundle(bundle_dir)
+
+    if args.sample:
+        requests = model_export.sample_requests(args.sample, args.sample_size)
+    else:
+        requests = inference.validation_requests(inference.category_vocabularies(catboost_model, lr_model), size=256)
+    max_error = inference.check_equivalence(bundle, catboost_model, lr_model, requests)
+    batch = (requests * (args.batch // len(requests) + 1))[: args.batch]
+
+    def pipelines(rows):
+        return inference.predict_frame(catboost_model, lr_model, inference.build_feature_frame(rows))
+
+    pickle_size = sum(os.path.getsize(registry.path(name)) for name in ("catboost", "logistic_regression"))
+    rows = {
+        "pickles": (pickle_size, cold_load_seconds(args.models_dir, "pickles"), pipelines),
+        "bundle": (model_export.bundle_size(bundle_dir), cold_load_seconds(bundle_dir, "bundle"), bundle.predict),
+    }
+    print(f"{'format':<8} {'taille Ko':>10} {'chargement s':>13} {'ms/ligne (1)':>13} {'ms/ligne (lot)':>15}")
+    for name, (size, load_seconds, predict) in rows.items():
+        started = time.perf_counter()
+        predict(batch)
+        batch_ms = (time.perf_counter() - started) / len(batch) * 1000
+        print(
+            f"{name:<8} {size / 1e3:>10.0f} {load_seconds:>13.3f} "
+            f"{per_row_ms(predict, requests, args.repeat):>13.3f} {batch_ms:>15.4f}"
+        )
+    print(f"Prédictions identiques sur {len(requests)} lignes (écart maximal sur le prix : {max_error:.3g})")
+
+
+if __name__ == "__main__":
+    main()
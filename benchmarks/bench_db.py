@@ -0,0 +1,97 @@
+"""
+Compare le débit de GET /vehicules/ entre la pile synchrone et la pile asynchrone.
+
+La pile synchrone reproduit l'ancien handler (Session bloquante servie par le pool de
+threads), la pile asynchrone est l'application de main.py (AsyncSession). Les deux
+interrogent la même base SQLite, créée à partir de models/babaste_predict_car.sql.
+
+Usage :
+    python -m benchmarks.bench_db --requests 2000 --concurrency 50 --limit 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre total de requêtes par pile")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requêtes simultanées")
+    parser.add_argument("--limit", type=int, default=20, help="Paramètre limit de /vehicules/")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_predict_car.db"))
+    parser.add_argument("--database-url", help="Base existante à utiliser au lieu de la base SQLite de test")
+    return parser.parse_args()
+
+
+async def run_load(app, path: str, total: int, concurrency: int) -> dict:
+    import httpx
+
+    latencies = []
+    queue = iter(range(total))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get(path)  # échauffement
+
+        async def worker():
+            for _ in queue:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "seconds": elapsed,
+        "requests_per_second": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+        from benchmarks.seed import seed_sqlite
+
+        seed_sqlite(args.db)
+
+    import logging
+
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    import crud, schemas
+    import main as api
+    from database import get_db
+
+    logging.disable(logging.INFO)
+
+    # Ancienne pile : handler synchrone et Session bloquante
+    sync_app = FastAPI()
+
+    @sync_app.get("/vehicules/", response_model=list[schemas.Vehicule])
+    def read_vehicules(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+        return crud.get_vehicules(db, skip=skip, limit=limit)
+
+    path = f"/vehicules/?limit={args.limit}"
+    for name, app in (("sync", sync_app), ("async", api.app)):
+        result = asyncio.run(run_load(app, path, args.requests, args.concurrency))
+        print(
+            f"{name:>5}: {result['requests_per_second']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:6.1f} ms  p99 {result['p99_ms']:6.1f} ms  "
+            f"({result['requests']} requêtes, concurrence {args.concurrency})"
+        )
+
+
+if __name__ == "__main__":
+    main()
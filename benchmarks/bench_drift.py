@@ -0,0 +1,73 @@
+"""
+Coût par requête du suivi de dérive (`DriftMonitor.observe`) et durée de
+/monitoring/drift.
+
+Le profil de référence est calculé sur les véhicules de la base de démonstration ; le
+trafic mesuré rejoue ces véhicules tels quels (pas de dérive attendue), puis avec un
+kilométrage augmenté et une part de modèles inconnus des encodeurs (dérive attendue).
+
+Usage :
+    python -m benchmarks.bench_drift --requests 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100000, help="Requêtes observées par scénario")
+    parser.add_argument("--unseen-share", type=float, default=0.1, help="Part de modèles inconnus (scénario dérivé)")
+    parser.add_argument("--km-shift", type=float, default=50000, help="Kilométrage ajouté (scénario dérivé)")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_drift.db"))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import pandas as pd
+
+    import schemas
+    from benchmarks.suite import predict_payloads
+    from drift import DriftMonitor, DriftReference, build_profile
+    from inference import COLUMN_MAPPING
+
+    payloads = predict_payloads(args.db)
+    training = pd.DataFrame([{COLUMN_MAPPING[field]: value for field, value in payload.items()} for payload in payloads])
+    vocabularies = {
+        field: set(training[column].astype(str)) for field, column in COLUMN_MAPPING.items() if training[column].dtype == object
+    }
+    reference = DriftReference(vocabularies, build_profile(training))
+
+    def shifted(i: int) -> dict:
+        payload = dict(payloads[i % len(payloads)], kilometrage=payloads[i % len(payloads)]["kilometrage"] + args.km_shift)
+        if (i * 7919) % 1000 < args.unseen_share * 1000:
+            payload["modele"] = f"Inconnu {i % 13}"
+        return payload
+
+    scenarios = {
+        "stable": lambda i: payloads[i % len(payloads)],
+        "dérivé": shifted,
+    }
+    print(f"{'scénario':<10} {'observe µs':>11} {'rapport ms':>11}  champs signalés")
+    for name, payload in scenarios.items():
+        requests = [schemas.PredictRequest(**payload(i)) for i in range(min(args.requests, 10000))]
+        monitor = DriftMonitor(lambda: reference, window_seconds=0)
+        started = time.perf_counter()
+        for i in range(args.requests):
+            monitor.observe(requests[i % len(requests)])
+        observe_us = (time.perf_counter() - started) / args.requests * 1e6
+        started = time.perf_counter()
+        report = monitor.report()
+        report_ms = (time.perf_counter() - started) * 1000
+        print(f"{name:<10} {observe_us:>11.2f} {report_ms:>11.2f}  {', '.join(report['current']['drifted']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
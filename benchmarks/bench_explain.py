@@ -0,0 +1,100 @@
+"""
+Budget de latence des prédictions expliquées (`explain=true`).
+
+Mesure /predict?explain=true (appels successifs, puis concurrents : les appels sont
+regroupés en lots) et /predict/batch?explain=true pour plusieurs tailles de lot, à
+cache manquant (kilométrage décalé à chaque appel), et compare la latence p99 à un
+budget. Le code de sortie vaut 1 si un budget est dépassé.
+
+Usage :
+    python -m benchmarks.bench_explain --single-budget-ms 50 --batch-budget-ms 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="Requêtes /predict par mesure")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients simultanés de la mesure concurrente")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000], help="Tailles de lot mesurées")
+    parser.add_argument("--batch-requests", type=int, default=10, help="Requêtes /predict/batch par taille")
+    parser.add_argument("--single-budget-ms", type=float, default=50, help="p99 maximal de /predict?explain=true")
+    parser.add_argument(
+        "--concurrent-budget-ms", type=float, default=500, help="p99 maximal sous --concurrency clients"
+    )
+    parser.add_argument("--batch-budget-ms", type=float, default=1000, help="p99 maximal d'un lot")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_explain.db"))
+    return parser.parse_args()
+
+
+async def scenarios(app, payloads: list[dict], args) -> list[tuple[str, dict, float]]:
+    import httpx
+
+    from benchmarks.suite import measure_http, vary
+
+    results = []
+    offset = 0
+
+    def predict(i: int) -> dict:
+        return {"method": "POST", "url": "/predict?explain=true", "json": vary(payloads, offset + i)}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        results.append(("predict", await measure_http(client, predict, args.requests), args.single_budget_ms))
+        offset += args.requests + 2
+        results.append((
+            f"predict x{args.concurrency}",
+            await measure_http(client, predict, args.requests, concurrency=args.concurrency),
+            args.concurrent_budget_ms,
+        ))
+        for size in args.batch_sizes:
+            offset += args.requests + 2
+
+            def batch(i: int, size=size, start=offset) -> dict:
+                items = [vary(payloads, start + i * size + j) for j in range(size)]
+                return {"method": "POST", "url": "/predict/batch?explain=true", "json": items}
+
+            offset += (args.batch_requests + 2) * size
+            results.append((f"batch {size}", await measure_http(client, batch, args.batch_requests), args.batch_budget_ms))
+    return results
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ.setdefault("PREDICT_EXPLAIN_MAX_ITEMS", str(max(args.batch_sizes)))
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    import main as api
+    from benchmarks.suite import predict_payloads
+
+    logging.disable(logging.INFO)
+    payloads = predict_payloads(args.db)
+
+    async def run():
+        await api.app.router.startup()
+        try:
+            return await scenarios(api.app, payloads, args)
+        finally:
+            await api.app.router.shutdown()
+
+    over_budget = []
+    print(f"{'scénario':<14} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'budget ms':>10}")
+    for name, result, budget in asyncio.run(run()):
+        print(f"{name:<14} {result['ops_per_second']:>8.1f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {budget:>10.0f}")
+        if result["p99_ms"] > budget:
+            over_budget.append(name)
+    if over_budget:
+        print(f"Budget dépassé : {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
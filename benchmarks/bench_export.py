@@ -0,0 +1,64 @@
+"""
+Mesure le débit et la mémoire de l'export de la table Vehicule (GET /vehicules/export).
+
+La base SQLite de test est agrandie jusqu'à `--rows` véhicules, puis le flux de l'export
+est consommé bloc par bloc ; la mémoire résidente est relevée pendant l'export pour
+vérifier qu'elle reste constante.
+
+Usage :
+    python -m benchmarks.bench_export --rows 1000000 --format csv
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Nombre de véhicules dans la base de test")
+    parser.add_argument("--format", choices=("ndjson", "csv", "parquet"), default="ndjson")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Lignes par bloc")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_export.db"))
+    return parser.parse_args()
+
+
+async def run(args):
+    import export
+    from database import AsyncSessionLocal
+    from model_registry import current_rss
+
+    rss_start = current_rss()
+    rss_samples = []
+    size = 0
+    chunks = 0
+    started = time.perf_counter()
+    async for data in export.stream_export(AsyncSessionLocal, export.make_encoder(args.format), args.chunk_size):
+        size += len(data)
+        chunks += 1
+        if chunks % 20 == 0:
+            rss_samples.append(current_rss())
+    elapsed = time.perf_counter() - started
+    rss_samples.append(current_rss())
+
+    print(f"{args.rows} lignes exportées en {args.format} : {size / 1e6:.1f} Mo en {elapsed:.1f} s ({args.rows / elapsed:.0f} lignes/s)")
+    print(
+        f"mémoire résidente : départ {rss_start / 1e6:.1f} Mo, "
+        f"pendant l'export {min(rss_samples) / 1e6:.1f} - {max(rss_samples) / 1e6:.1f} Mo"
+    )
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.bench_pagination import grow
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+    grow(args.db, args.rows)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
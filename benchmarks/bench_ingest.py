@@ -0,0 +1,107 @@
+"""
+Compare le débit d'insertion de véhicules : boucle sur POST /vehicules/ contre
+POST /vehicules/bulk (JSON Lines, relations données par nom).
+
+Les lignes sont générées à partir des véhicules du dump, sur une base SQLite de test.
+
+Usage :
+    python -m benchmarks.bench_ingest --rows 20000 --loop-rows 500 --chunk-size 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Lignes envoyées à /vehicules/bulk")
+    parser.add_argument("--loop-rows", type=int, default=500, help="Lignes envoyées une à une à /vehicules/")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Paramètre chunk_size de /vehicules/bulk")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_ingest.db"))
+    return parser.parse_args()
+
+
+def sample_rows(path: str, count: int) -> list[dict]:
+    import sqlite3
+
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(
+            "SELECT v.Annee, v.Kilometrage, v.Prix, v.Etat, v.Marque_ID, v.Modele_ID, v.Finition_ID, "
+            "v.Carburant_ID, v.Transmission_ID, ma.Nom, mo.Nom, f.Nom, c.Type, t.Type FROM Vehicule v "
+            "JOIN Marque ma ON ma.ID_Marque = v.Marque_ID JOIN Modele mo ON mo.ID_Modele = v.Modele_ID "
+            "JOIN Finition f ON f.ID_Finition = v.Finition_ID JOIN Carburant c ON c.ID_Carburant = v.Carburant_ID "
+            "JOIN Transmission t ON t.ID_Transmission = v.Transmission_ID"
+        ).fetchall()
+    finally:
+        connection.close()
+    random.seed(0)
+    return [random.choice(rows) for _ in range(count)]
+
+
+async def run(args, api):
+    import httpx
+
+    rows = sample_rows(args.db, max(args.rows, args.loop_rows))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=None) as client:
+        await api.load_reference_cache()
+
+        started = time.perf_counter()
+        for row in rows[: args.loop_rows]:
+            body = dict(zip(
+                ("annee", "kilometrage", "prix", "etat", "marque_id", "modele_id", "finition_id",
+                 "carburant_id", "transmission_id"),
+                row[:9],
+            ))
+            (await client.post("/vehicules/", json=body)).raise_for_status()
+        loop_rate = args.loop_rows / (time.perf_counter() - started)
+
+        payload = "\n".join(
+            json.dumps({
+                "annee": row[0], "kilometrage": row[1], "prix": row[2], "etat": row[3], "marque": row[9],
+                "modele": row[10], "finition": row[11], "carburant": row[12], "transmission": row[13],
+            })
+            for row in rows[: args.rows]
+        ).encode()
+        started = time.perf_counter()
+        response = await client.post(
+            f"/vehicules/bulk?format=jsonl&chunk_size={args.chunk_size}",
+            content=payload,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        response.raise_for_status()
+        bulk_rate = args.rows / (time.perf_counter() - started)
+        report = response.json()
+        await api.stop_reference_cache()
+
+    print(f"POST /vehicules/     : {loop_rate:10.0f} lignes/s ({args.loop_rows} lignes)")
+    print(
+        f"POST /vehicules/bulk : {bulk_rate:10.0f} lignes/s ({report['inserted']}/{report['rows']} insérées, "
+        f"{report['failed']} en erreur, lots de {args.chunk_size})"
+    )
+    print(f"accélération         : {bulk_rate / loop_rate:10.1f}x")
+
+
+def main():
+    args = parse_args()
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    import main as api
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args, api))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Compte les requêtes SQL, les lignes lues et la latence des opérations sur les véhicules,
+avant et après le passage des relations de Vehicule de `lazy="joined"` à un chargement
+choisi par endpoint.
+
+La stratégie « jointure » reproduit l'ancien comportement (jointure à 6 tables à chaque
+chargement, y compris pour la mise à jour et la suppression), la stratégie « endpoint »
+est celle de crud_async.py lorsque le cache de référence n'est pas chargé, et la
+stratégie « cache » complète les relations depuis reference_cache.py. Les lignes lues
+sont mesurées en rejouant chaque SELECT dans un `SELECT COUNT(*)` sur une connexion
+séparée, lors d'une première exécution non chronométrée ; les cellules sont les lignes
+multipliées par le nombre de colonnes renvoyées.
+
+Usage :
+    python -m benchmarks.bench_loading --limit 100 --repeat 50
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="Taille de page pour la liste")
+    parser.add_argument("--repeat", type=int, default=50, help="Exécutions par mesure")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_loading.db"))
+    return parser.parse_args()
+
+
+class QueryCounter:
+    """Compte les requêtes et les lignes renvoyées par les SELECT d'un moteur SQLite."""
+
+    def __init__(self, engine, path: str):
+        from sqlalchemy import event
+
+        self.connection = sqlite3.connect(path)
+        self.enabled = False
+        self.reset()
+        event.listen(engine, "after_cursor_execute", self._record)
+
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+        self.cells = 0
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.enabled:
+            return
+        self.statements += 1
+        if statement.lstrip().upper().startswith("SELECT") and cursor.description:
+            rows = self.connection.execute(f"SELECT COUNT(*) FROM ({statement})", parameters).fetchone()[0]
+            self.rows += rows
+            self.cells += rows * len(cursor.description)
+
+
+async def run(args, counter):
+    from sqlalchemy import select
+
+    import crud_async, models, schemas
+    from database import AsyncSessionLocal
+    from reference_cache import ReferenceCache
+
+    reference_cache = ReferenceCache()
+    await reference_cache.refresh_from(AsyncSessionLocal)
+
+    async def cached(vehicules):
+        return [reference_cache.vehicule(vehicule) for vehicule in vehicules]
+
+    # Ancienne stratégie : toutes les relations jointes, objets chargés avant écriture
+    async def joined_get(db, vehicule_id):
+        query = select(models.Vehicule).options(*models.vehicule_detail_loading()).where(models.Vehicule.id == vehicule_id)
+        return (await db.execute(query.execution_options(populate_existing=True))).scalars().first()
+
+    async def joined_list(db):
+        query = select(models.Vehicule).options(*models.vehicule_detail_loading()).order_by(models.Vehicule.id)
+        return (await db.execute(query.limit(args.limit))).scalars().all()
+
+    async def joined_update(db, vehicule_id, update):
+        vehicule = await joined_get(db, vehicule_id)
+        for key, value in update.model_dump(exclude_unset=True).items():
+            setattr(vehicule, key, value)
+        await db.commit()
+        return await joined_get(db, vehicule_id)
+
+    async def joined_delete(db, vehicule_id):
+        await db.delete(await joined_get(db, vehicule_id))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        ids = (await db.execute(select(models.Vehicule.id).order_by(models.Vehicule.id.desc()).limit(2 * (args.repeat + 1)))).scalars().all()
+    update = schemas.VehiculeUpdate(prix=12345.0)
+    target = ids[0]
+    to_delete = iter(ids)
+
+    async def cached_list(db):
+        return await cached(await crud_async.get_vehicules(db, limit=args.limit, with_relations=False))
+
+    async def cached_get(db, vehicule_id):
+        return await cached([await crud_async.get_vehicule(db, vehicule_id, with_relations=False)])
+
+    async def cached_update(db, vehicule_id, update):
+        return await cached([await crud_async.update_vehicule(db, vehicule_id, update, with_relations=False)])
+
+    operations = {
+        "liste": {
+            "jointure": lambda db: joined_list(db),
+            "endpoint": lambda db: crud_async.get_vehicules(db, limit=args.limit),
+            "cache": cached_list,
+        },
+        "détail": {
+            "jointure": lambda db: joined_get(db, target),
+            "endpoint": lambda db: crud_async.get_vehicule(db, target),
+            "cache": lambda db: cached_get(db, target),
+        },
+        "mise à jour": {
+            "jointure": lambda db: joined_update(db, target, update),
+            "endpoint": lambda db: crud_async.update_vehicule(db, target, update),
+            "cache": lambda db: cached_update(db, target, update),
+        },
+        "suppression": {
+            "jointure": lambda db: joined_delete(db, next(to_delete)),
+            "endpoint": lambda db: crud_async.delete_vehicule(db, next(to_delete)),
+        },
+    }
+
+    print(f"{'opération':<12} {'stratégie':<11} {'requêtes':>9} {'lignes':>8} {'cellules':>9} {'ms':>8}")
+    for name, strategies in operations.items():
+        for label, operation in strategies.items():
+            counter.reset()
+            counter.enabled = True
+            async with AsyncSessionLocal() as db:
+                await operation(db)
+            counter.enabled = False
+            elapsed = 0.0
+            for _ in range(args.repeat):
+                async with AsyncSessionLocal() as db:
+                    started = time.perf_counter()
+                    await operation(db)
+                    elapsed += time.perf_counter() - started
+            print(
+                f"{name:<12} {label:<11} {counter.statements:>9} {counter.rows:>8} "
+                f"{counter.cells:>9} {elapsed / args.repeat * 1000:>8.2f}"
+            )
+
+
+def main():
+    args = parse_args()
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    from database import async_engine
+
+    counter = QueryCounter(async_engine.sync_engine, args.db)
+    asyncio.run(run(args, counter))
+
+
+if __name__ == "__main__":
+    main()
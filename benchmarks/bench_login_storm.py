@@ -0,0 +1,116 @@
+"""
+Mesure la latence de /predict pendant une vague de connexions sur /token.
+
+Trois mesures, sur la même base SQLite créée à partir de models/babaste_predict_car.sql :
+/predict seul, puis /predict pendant que `--logins` clients enchaînent les connexions,
+avec bcrypt calculé dans le pool de threads (PASSWORD_HASH_WORKERS=0, comportement
+antérieur) puis dans le pool de processus dédié.
+
+Usage :
+    python -m benchmarks.bench_login_storm --requests 500 --logins 16 --workers 1
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requêtes /predict mesurées")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients /predict simultanés")
+    parser.add_argument("--logins", type=int, default=16, help="Clients /token simultanés pendant la vague")
+    parser.add_argument("--workers", type=int, default=1, help="Processus du pool bcrypt")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_login_storm.db"))
+    return parser.parse_args()
+
+
+async def run(app, payloads: list[dict], args, storm: bool) -> dict:
+    import httpx
+
+    from benchmarks.suite import BENCH_USER, summarize, vary
+
+    latencies = []
+    logins = 0
+    indexes = iter(range(args.requests))
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        login = {"username": BENCH_USER["nom"], "password": BENCH_USER["password"]}
+
+        async def predict_worker():
+            for i in indexes:
+                started = time.perf_counter()
+                response = await client.post("/predict", json=vary(payloads, int(time.time() * 1000) + i))
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        async def login_worker():
+            nonlocal logins
+            while not done.is_set():
+                response = await client.post("/token", data=login)
+                logins += response.status_code == 200
+
+        storm_started = time.perf_counter()
+        storm_tasks = [asyncio.create_task(login_worker()) for _ in range(args.logins if storm else 0)]
+        if storm:
+            await asyncio.sleep(0.5)  # laisser la vague s'installer
+        started = time.perf_counter()
+        await asyncio.gather(*(predict_worker() for _ in range(args.concurrency)))
+        seconds = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*storm_tasks)
+        storm_seconds = time.perf_counter() - storm_started
+
+    return {**summarize(latencies, seconds), "logins_per_second": logins / storm_seconds}
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    import crud, schemas
+    import main as api
+    from benchmarks.suite import BENCH_USER, predict_payloads
+    from database import SessionLocal
+    from utils import password_hasher
+
+    logging.disable(logging.INFO)
+    db = SessionLocal()
+    try:
+        crud.create_user(db, schemas.UserCreate(**BENCH_USER))
+    finally:
+        db.close()
+    password_hasher.shutdown()
+    payloads = predict_payloads(args.db)
+
+    async def scenarios():
+        await api.app.router.startup()
+        try:
+            results = {"sans connexions": await run(api.app, payloads, args, storm=False)}
+            password_hasher.shutdown()
+            password_hasher.workers = 0
+            results["vague, threads"] = await run(api.app, payloads, args, storm=True)
+            password_hasher.workers = args.workers
+            password_hasher.start()
+            results["vague, processus"] = await run(api.app, payloads, args, storm=True)
+        finally:
+            await api.app.router.shutdown()
+        return results
+
+    print(f"{'scénario':<18} {'predict/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'connexions/s':>13}")
+    for name, result in asyncio.run(scenarios()).items():
+        print(
+            f"{name:<18} {result['ops_per_second']:>10.1f} {result['p50_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['logins_per_second']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
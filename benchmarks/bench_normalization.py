@@ -0,0 +1,76 @@
+"""
+Coût de la normalisation des champs catégoriels de /predict (`NormalizationIndex`).
+
+Mesure `normalize` sur des requêtes déjà canoniques, à la casse ou aux accents près,
+avec une faute de frappe (résolution mémorisée, puis sans mémoire) et avec une valeur
+inconnue, ainsi que la construction de l'index.
+
+Usage :
+    python -m benchmarks.bench_normalization --repeat 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000, help="Appels chronométrés par scénario")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_normalization.db"))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    import schemas
+    import main as api
+    from benchmarks.suite import predict_payloads, summarize
+    from database import SessionLocal
+
+    logging.disable(logging.INFO)
+    db = SessionLocal()
+    try:
+        api.reference_cache.load(db)
+    finally:
+        db.close()
+    payload = predict_payloads(args.db)[0]
+    # Chargement des modèles hors de la mesure de construction
+    api.get_vocabularies()
+
+    started = time.perf_counter()
+    index = api.build_normalization_index()
+    print(f"construction de l'index : {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    typo = payload["marque"][:-1] + "x" + payload["marque"][-1]
+    scenarios = {
+        "canonique": payload,
+        "casse/accents": dict(payload, marque=payload["marque"].upper(), carburant=payload["carburant"].lower()),
+        "faute": dict(payload, marque=typo),
+        "faute sans mémo": dict(payload, marque=typo),
+        "inconnue": dict(payload, modele="Modèle inexistant"),
+    }
+    print(f"{'scénario':<16} {'p50 µs':>8} {'p99 µs':>8}  résolutions")
+    for name, body in scenarios.items():
+        request = schemas.PredictRequest(**body)
+        latencies = []
+        for _ in range(args.repeat):
+            if name == "faute sans mémo":
+                index.fields["marque"].memo.clear()
+            call_started = time.perf_counter()
+            _, lookups = index.normalize(request)
+            latencies.append(time.perf_counter() - call_started)
+        result = summarize(latencies, sum(latencies))
+        matches = ", ".join(f"{field}={lookup.match}" for field, lookup in lookups.items()) or "-"
+        print(f"{name:<16} {result['p50_ms'] * 1000:>8.1f} {result['p99_ms'] * 1000:>8.1f}  {matches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare la latence d'une page profonde entre pagination par décalage et par curseur.
+
+La base SQLite de test est agrandie en dupliquant les véhicules du dump jusqu'à
+`--rows` lignes, puis chaque page est lue avec `skip` puis avec `after_id`.
+
+Usage :
+    python -m benchmarks.bench_pagination --rows 1000000 --limit 50
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Nombre de véhicules dans la base de test")
+    parser.add_argument("--limit", type=int, default=50, help="Taille de page")
+    parser.add_argument("--repeat", type=int, default=5, help="Lectures par mesure")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_pagination.db"))
+    return parser.parse_args()
+
+
+def grow(path: str, rows: int):
+    connection = sqlite3.connect(path)
+    try:
+        count = connection.execute("SELECT COUNT(*) FROM Vehicule").fetchone()[0]
+        while count < rows:
+            connection.execute(
+                "INSERT INTO Vehicule (Annee, Kilometrage, Prix, Etat, Marque_ID, Modele_ID, Finition_ID, "
+                "Carburant_ID, Transmission_ID) SELECT Annee, Kilometrage, Prix, Etat, Marque_ID, Modele_ID, "
+                "Finition_ID, Carburant_ID, Transmission_ID FROM Vehicule LIMIT ?",
+                (rows - count,),
+            )
+            count = connection.execute("SELECT COUNT(*) FROM Vehicule").fetchone()[0]
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+    grow(args.db, args.rows)
+
+    import crud
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"{'profondeur':>12} {'skip (ms)':>12} {'curseur (ms)':>14}")
+        depth = args.limit
+        while depth < args.rows:
+            last_id = crud.get_vehicules(db, skip=depth - 1, limit=1)[0].id
+            offset_ms = timed(lambda: crud.get_vehicules(db, skip=depth, limit=args.limit), args.repeat)
+            cursor_ms = timed(lambda: crud.get_vehicules(db, limit=args.limit, after_id=last_id), args.repeat)
+            print(f"{depth:>12} {offset_ms:>12.2f} {cursor_ms:>14.2f}")
+            db.expunge_all()
+            depth *= 10
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Débit de GET /vehicules/ sur de grandes pages, selon la sérialisation :
+
+- orm : ancienne pile (objets ORM complétés par le cache de référence, validés par
+  schemas.Vehicule, encodés par le module json de la bibliothèque standard) ;
+- full : vue complète servie depuis les lignes SQL et encodée par orjson ;
+- flat : vue plate (`view=flat`), identifiants et noms des relations.
+
+Les pages au-delà de VEHICULES_STREAM_CHUNK_SIZE sont envoyées en streaming par
+l'API ; l'ancienne pile n'est mesurée que jusqu'à cette taille.
+
+Usage :
+    python -m benchmarks.bench_serialization --limits 100 500 2000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 500, 2000], help="Tailles de page mesurées")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes par mesure")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients simultanés")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_serialization.db"))
+    return parser.parse_args()
+
+
+async def run(app, path: str, requests: int, concurrency: int) -> dict:
+    import httpx
+
+    from benchmarks.suite import summarize
+
+    latencies = []
+    indexes = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        (await client.get(path)).raise_for_status()
+
+        async def worker():
+            for _ in indexes:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    from fastapi import Depends, FastAPI
+    from fastapi.responses import JSONResponse
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    import crud_async, schemas
+    import main as api
+    from database import get_async_db
+
+    logging.disable(logging.INFO)
+
+    # Ancienne pile : validation Pydantic des objets ORM et encodeur json standard
+    orm_app = FastAPI(default_response_class=JSONResponse)
+
+    @orm_app.get("/vehicules/", response_model=list[schemas.Vehicule])
+    async def read_vehicules(limit: int = 10, db: AsyncSession = Depends(get_async_db)):
+        with_relations = api.load_vehicule_relations()
+        vehicules = await crud_async.get_vehicules(db, limit=limit, with_relations=with_relations)
+        return await api.serialize_vehicules(vehicules, with_relations)
+
+    async def scenarios():
+        await api.app.router.startup()
+        try:
+            results = []
+            for limit in args.limits:
+                runs = [("full", api.app, ""), ("flat", api.app, "&view=flat")]
+                if limit <= api.VEHICULES_STREAM_CHUNK_SIZE:
+                    runs.insert(0, ("orm", orm_app, ""))
+                for name, app, query in runs:
+                    path = f"/vehicules/?limit={limit}{query}"
+                    results.append((limit, name, await run(app, path, args.requests, args.concurrency)))
+            return results
+        finally:
+            await api.app.router.shutdown()
+
+    print(f"{'limit':>6} {'pile':<5} {'req/s':>8} {'véhicules/s':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    for limit, name, result in asyncio.run(scenarios()):
+        print(
+            f"{limit:>6} {name:<5} {result['ops_per_second']:>8.1f} {result['ops_per_second'] * limit:>12.0f} "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import re
+import sqlite3
+
+from sqlalchemy import create_engine
+
+DUMP_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "babaste_predict_car.sql")
+
+
+def seed_sqlite(path: str, dump_path: str = DUMP_PATH) -> str:
+    """
+    Crée une base SQLite à partir du schéma SQLAlchemy et des données du dump MySQL.
+
+    Le fichier existant est remplacé. Les tables sont créées par `Base.metadata`,
+    puis les instructions INSERT du dump phpMyAdmin sont rejouées telles quelles
+    (SQLite accepte les identifiants entre accents graves).
+
+    Returns:
+        str: L'URL SQLAlchemy de la base créée.
+    """
+    import models
+    from database import Base
+
+    if os.path.exists(path):
+        os.remove(path)
+    url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    with open(dump_path, encoding="utf-8") as dump:
+        statements = re.findall(r"INSERT INTO .*?\);\n", dump.read(), re.S)
+    connection = sqlite3.connect(path)
+    try:
+        for statement in statements:
+            connection.execute(statement)
+        connection.commit()
+    finally:
+        connection.close()
+    return url
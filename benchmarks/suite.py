@@ -0,0 +1,339 @@
+"""
+Suite de benchmarks reproductible des chemins chauds de l'API, entièrement locale.
+
+L'application de main.py est servie en mémoire (httpx + ASGITransport) sur une base
+SQLite créée à partir de models/babaste_predict_car.sql, avec un utilisateur de test.
+Trois familles de mesures :
+
+- http : /predict (appels successifs puis concurrents), /token, parcours de
+  /vehicules/ par curseur et /users/me ;
+- micro : fonctions d'inférence (compilée, ligne seule et lot ; pipelines) et
+  fonctions de crud.py, appelées directement ;
+- replay : rejeu d'un fichier JSON Lines de requêtes HTTP (une par ligne :
+  {"method": "POST", "path": "/predict", "json": {...}, "auth": false}), en
+  concurrence. Les lignes sans `method` ni `path` sont ignorées ; les réponses en
+  erreur sont comptées au lieu d'interrompre la mesure.
+
+Les requêtes /predict sont construites à partir des véhicules de la base, avec un
+kilométrage décalé à chaque appel pour ne pas mesurer le cache des prédictions.
+
+Chaque scénario produit le nombre d'opérations, le débit et les percentiles de
+latence. `--output` écrit ces résultats dans un fichier JSON de référence ;
+`--compare` les confronte à une référence et signale (code de sortie 1) tout
+scénario dont la latence médiane augmente ou dont le débit baisse de plus de
+`--threshold`.
+
+Usage :
+    python -m benchmarks.suite --output benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.2
+    python -m benchmarks.suite --only micro --scale 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+DEFAULT_REPLAY = os.path.join(os.path.dirname(__file__), "replay.jsonl")
+BENCH_USER = {"nom": "bench", "email": "bench@example.com", "password": "bench-password"}
+GROUPS = ("http", "micro", "replay")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--compare", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Régression tolérée (0.2 : 20 %%)")
+    parser.add_argument("--only", choices=GROUPS, action="append", help="Familles de scénarios à exécuter")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplie le nombre d'itérations")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients simultanés des scénarios concurrents")
+    parser.add_argument("--replay", default=DEFAULT_REPLAY, help="Requêtes HTTP à rejouer (JSON Lines)")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_suite.db"))
+    return parser.parse_args()
+
+
+def summarize(latencies: list[float], seconds: float) -> dict:
+    """Résume des latences (secondes) mesurées sur une durée totale `seconds`."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(q: float) -> float:
+        return latencies[min(count - 1, int(q * count))] * 1000
+
+    return {
+        "ops": count,
+        "seconds": seconds,
+        "ops_per_second": count / seconds if seconds else 0.0,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": sum(latencies) / count * 1000,
+    }
+
+
+def measure(function, iterations: int, warmup: int = 3) -> dict:
+    """Appelle `function(i)` `iterations` fois et résume les latences."""
+    for i in range(warmup):
+        function(i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        function(i)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def measure_http(
+    client, build, iterations: int, concurrency: int = 1, warmup: int = 2, strict: bool = True
+) -> dict:
+    """
+    Envoie `iterations` requêtes construites par `build(i)` (kwargs de `client.request`)
+    avec `concurrency` clients simultanés. Avec `strict`, toute réponse en erreur
+    interrompt la mesure ; sinon les erreurs sont comptées dans `errors`.
+    """
+    for i in range(warmup):
+        response = await client.request(**build(i))
+        if strict:
+            response.raise_for_status()
+    latencies = []
+    errors = 0
+    indexes = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            call_started = time.perf_counter()
+            response = await client.request(**build(i))
+            latencies.append(time.perf_counter() - call_started)
+            if strict:
+                response.raise_for_status()
+            errors += response.is_error
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return {**summarize(latencies, time.perf_counter() - started), "errors": errors}
+
+
+def predict_payloads(path: str) -> list[dict]:
+    """Corps /predict tirés des véhicules de la base (noms des relations joints)."""
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(
+            "SELECT v.Kilometrage, v.Annee, ma.Nom, fi.Nom, ca.Type, tr.Type, mo.Nom, v.Etat "
+            "FROM Vehicule v JOIN Marque ma ON ma.ID_Marque = v.Marque_ID "
+            "JOIN Modele mo ON mo.ID_Modele = v.Modele_ID JOIN Finition fi ON fi.ID_Finition = v.Finition_ID "
+            "JOIN Carburant ca ON ca.ID_Carburant = v.Carburant_ID "
+            "JOIN Transmission tr ON tr.ID_Transmission = v.Transmission_ID ORDER BY v.ID_Vehicule"
+        ).fetchall()
+    finally:
+        connection.close()
+    fields = ("kilometrage", "annee", "marque", "finition", "carburant", "transmission", "modele", "etat")
+    return [dict(zip(fields, row)) for row in rows if all(value is not None for value in row)]
+
+
+def vary(payloads: list[dict], i: int) -> dict:
+    """Corps /predict n° i : kilométrage décalé pour que chaque appel manque le cache."""
+    payload = dict(payloads[i % len(payloads)])
+    payload["kilometrage"] = float(payload["kilometrage"]) + i + 1
+    return payload
+
+
+def read_replay(path: str) -> list[dict]:
+    requests = []
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if "method" in entry and "path" in entry:
+                requests.append(entry)
+    return requests
+
+
+async def http_scenarios(app, payloads: list[dict], scale: float, concurrency: int, replay: list[dict], groups) -> dict:
+    import httpx
+
+    def n(count: int) -> int:
+        return max(1, int(count * scale))
+
+    results = {}
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            login = {"username": BENCH_USER["nom"], "password": BENCH_USER["password"]}
+            token = (await client.post("/token", data=login)).json()["access_token"]
+            auth = {"Authorization": f"Bearer {token}"}
+
+            if "http" in groups:
+                offset = 0
+
+                def predict(i):
+                    return {"method": "POST", "url": "/predict", "json": vary(payloads, offset + i)}
+
+                results["http.predict.single"] = await measure_http(client, predict, n(300))
+                offset = 10**6
+                results["http.predict.concurrent"] = await measure_http(client, predict, n(1000), concurrency)
+                results["http.token"] = await measure_http(
+                    client, lambda i: {"method": "POST", "url": "/token", "data": login}, n(20)
+                )
+                results["http.users_me"] = await measure_http(
+                    client, lambda i: {"method": "GET", "url": "/users/me", "headers": auth}, n(500)
+                )
+
+                # Parcours complet de la table par pages de 50, en suivant X-Next-Cursor
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(max(1, int(3 * scale))):
+                    url = "/vehicules/?limit=50"
+                    while url:
+                        call_started = time.perf_counter()
+                        response = await client.get(url)
+                        latencies.append(time.perf_counter() - call_started)
+                        response.raise_for_status()
+                        cursor = response.headers.get("X-Next-Cursor")
+                        url = f"/vehicules/?limit=50&cursor={cursor}" if cursor else None
+                results["http.vehicules.pages"] = summarize(latencies, time.perf_counter() - started)
+
+            if "replay" in groups and replay:
+
+                def replayed(i):
+                    entry = replay[i % len(replay)]
+                    request = {"method": entry["method"], "url": entry["path"]}
+                    for key in ("json", "params", "data"):
+                        if key in entry:
+                            request[key] = entry[key]
+                    if entry.get("auth"):
+                        request["headers"] = auth
+                    return request
+
+                results["replay"] = await measure_http(
+                    client, replayed, n(20 * len(replay)), concurrency, strict=False
+                )
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def micro_scenarios(api, payloads: list[dict], scale: float) -> dict:
+    import crud, inference, schemas
+    from database import SessionLocal
+
+    def n(count: int) -> int:
+        return max(1, int(count * scale))
+
+    requests = [schemas.PredictRequest(**vary(payloads, i)) for i in range(1000)]
+    catboost_model, lr_model, compiled = api.get_serving_models()
+    results = {}
+    if compiled is not None:
+        results["micro.inference.compiled.single"] = measure(lambda i: compiled.predict([requests[i % 1000]]), n(2000))
+        results["micro.inference.compiled.batch1000"] = measure(lambda i: compiled.predict(requests), n(50))
+    if catboost_model is not None:
+        results["micro.inference.pipelines.batch1000"] = measure(
+            lambda i: inference.predict_frame(catboost_model, lr_model, inference.build_feature_frame(requests)), n(20)
+        )
+    results["micro.predict_with_models.batch64"] = measure(
+        lambda i: api.predict_with_models(requests[(i * 64) % 936 : (i * 64) % 936 + 64]), n(200)
+    )
+
+    db = SessionLocal()
+    try:
+        results["micro.crud.get_vehicules"] = measure(lambda i: crud.get_vehicules(db, limit=50, after_id=i % 500), n(500))
+        results["micro.crud.get_vehicule"] = measure(lambda i: crud.get_vehicule(db, 1 + i % 500), n(1000))
+        results["micro.crud.get_user_by_nom"] = measure(lambda i: crud.get_user_by_nom(db, BENCH_USER["nom"]), n(2000))
+        results["micro.crud.authenticate_user_by_nom"] = measure(
+            lambda i: crud.authenticate_user_by_nom(db, BENCH_USER["nom"], BENCH_USER["password"]), n(20), warmup=1
+        )
+    finally:
+        db.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Renvoie les régressions : latence médiane plus haute ou débit plus bas de plus de `threshold`."""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        if current["p50_ms"] > reference["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {reference['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if current["ops_per_second"] < reference["ops_per_second"] * (1 - threshold):
+            regressions.append(
+                f"{name}: débit {reference['ops_per_second']:.1f} -> {current['ops_per_second']:.1f} op/s"
+            )
+    return regressions
+
+
+def main():
+    args = parse_args()
+    groups = set(args.only or GROUPS)
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from benchmarks.seed import seed_sqlite
+
+    seed_sqlite(args.db)
+
+    import logging
+
+    import crud, schemas
+    import main as api
+    from database import SessionLocal
+
+    logging.disable(logging.INFO)
+    db = SessionLocal()
+    try:
+        crud.create_user(db, schemas.UserCreate(**BENCH_USER))
+    finally:
+        db.close()
+
+    payloads = predict_payloads(args.db)
+    replay = read_replay(args.replay) if "replay" in groups else []
+    if "replay" in groups and not replay:
+        print(f"Aucune requête HTTP à rejouer dans {args.replay}", file=sys.stderr)
+
+    results = {}
+    if groups & {"http", "replay"}:
+        results.update(asyncio.run(http_scenarios(api.app, payloads, args.scale, args.concurrency, replay, groups)))
+    if "micro" in groups:
+        results.update(micro_scenarios(api, payloads, args.scale))
+
+    print(f"{'scénario':<42} {'ops':>6} {'erreurs':>8} {'op/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<42} {result['ops']:>6} {result.get('errors', 0):>8} {result['ops_per_second']:>10.1f} "
+            f"{result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f}"
+        )
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as reference:
+            baseline = json.load(reference)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRégressions au-delà de {args.threshold:.0%} :")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nAucune régression au-delà de {args.threshold:.0%} par rapport à {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,20 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 import models, schemas
-import bcrypt
-from passlib.context import CryptContext
-from utils import verify_password, get_password_hash  # Assurez-vous que ces fonctions sont définies dans utils.py
+from utils import get_password_hash, password_hasher, token_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, password: str) -> bool:
-    return pwd_context.verify(plain_password, password)
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-# Fonction pour obtenir la liste des véhicules
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Fonction pour obtenir la liste des véhicules
-def get_vehicules(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Vehicule).offset(skip).limit(limit).all()
+# Fonction pour obtenir la liste des véhicules ; `after_id` active la pagination par curseur
+def get_vehicules(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    query = db.query(models.Vehicule).options(*models.vehicule_list_loading()).order_by(models.Vehicule.id)
+    if after_id is not None:
+        query = query.filter(models.Vehicule.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 # Fonction pour obtenir un véhicule par ID
 def get_vehicule(db: Session, vehicule_id: int):
-    vehicule = db.query(models.Vehicule).filter(models.Vehicule.id == vehicule_id).first()
+    vehicule = db.get(models.Vehicule, vehicule_id, options=models.vehicule_detail_loading(), populate_existing=True)
     if not vehicule:
         raise HTTPException(status_code=404, detail="Véhicule non trouvé")
     return vehicule
@@ -48,33 +34,34 @@ def create_vehicule(db: Session, vehicule: schemas.VehiculeCreate):
     )
     db.add(db_vehicule)
     db.commit()
-    db.refresh(db_vehicule)
-    return db_vehicule
+    return get_vehicule(db, db_vehicule.id)
 
-# Fonction pour mettre à jour un véhicule
+# Fonction pour mettre à jour un véhicule : UPDATE direct, puis relecture pour la réponse
 def update_vehicule(db: Session, vehicule_id: int, vehicule_update: schemas.VehiculeUpdate):
-    db_vehicule = db.query(models.Vehicule).filter(models.Vehicule.id == vehicule_id).first()
-    if not db_vehicule:
-        raise HTTPException(status_code=404, detail="Véhicule non trouvé")
     update_data = vehicule_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_vehicule, key, value)
-    db.commit()
-    db.refresh(db_vehicule)
-    return db_vehicule
-
-# Fonction pour supprimer un véhicule
+    if update_data:
+        db.query(models.Vehicule).filter(models.Vehicule.id == vehicule_id).update(
+            update_data, synchronize_session=False
+        )
+        db.commit()
+    return get_vehicule(db, vehicule_id)
+
+# Fonction pour supprimer un véhicule, sans le charger
 def delete_vehicule(db: Session, vehicule_id: int):
-    db_vehicule = db.query(models.Vehicule).filter(models.Vehicule.id == vehicule_id).first()
-    if not db_vehicule:
+    deleted = db.query(models.Vehicule).filter(models.Vehicule.id == vehicule_id).delete(synchronize_session=False)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Véhicule non trouvé")
-    db.delete(db_vehicule)
     db.commit()
     return {"message": "Véhicule supprimé avec succès"}
 
-# Fonction pour obtenir la liste des utilisateurs
-def get_users(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.User).offset(skip).limit(limit).all()
+# Fonction pour obtenir la liste des utilisateurs ; `after_id` active la pagination par curseur
+def get_users(db: Session, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    query = db.query(models.User).order_by(models.User.id)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 # Fonction pour obtenir un utilisateur par ID
 def get_user(db: Session, user_id: int):
@@ -98,9 +85,13 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     if not db_user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     update_data = user_update.dict(exclude_unset=True)
+    if "password" in update_data:
+        update_data["password"] = get_password_hash(update_data["password"])
     for key, value in update_data.items():
         setattr(db_user, key, value)
     db.commit()
+    # Les jetons en cours portent l'ancien nom et les anciens droits
+    token_cache.revoke_user(db_user.id)
     db.refresh(db_user)
     return db_user
 
@@ -111,6 +102,7 @@ def delete_user(db: Session, user_id: int):
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     db.delete(db_user)
     db.commit()
+    token_cache.revoke_user(user_id)
     return {"message": "Utilisateur supprimé avec succès"}
 
 
@@ -126,6 +118,12 @@ def authenticate_user_by_nom(db: Session, username: str, password: str):
     user = get_user_by_nom(db, username)
     if not user:
         return None
-    if not pwd_context.verify(password, user.password):  # Utilisez 'password' au lieu de 'hashed_password'
+    valid, new_hash = password_hasher.verify_and_update(password, user.password)
+    if not valid:
         return None
+    if new_hash is not None:
+        # Le coût bcrypt a changé depuis le hachage : le mot de passe en clair est disponible, on le refait
+        user.password = new_hash
+        db.commit()
+        password_hasher.record_rehash(user.nom)
     return user
@@ -0,0 +1,273 @@
+from typing import Callable
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import export, models, schemas
+from reference_cache import REFERENCE_TABLES, VEHICULE_COLUMNS, ReferenceCache
+from utils import password_hasher, token_cache
+
+# Versions asynchrones des fonctions de crud.py, utilisées avec AsyncSessionLocal
+
+
+def vehicule_loading(with_relations: bool, loading: Callable[[], list]) -> list:
+    """Options de chargement : aucune relation lorsque l'appelant les complète depuis le cache de référence."""
+    return loading() if with_relations else []
+
+# Fonction pour obtenir la liste des véhicules ; `after_id` active la pagination par curseur
+async def get_vehicules(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = None,
+    until_id: int | None = None,
+    with_relations: bool = True,
+):
+    query = (
+        select(models.Vehicule)
+        .options(*vehicule_loading(with_relations, models.vehicule_list_loading))
+        .order_by(models.Vehicule.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        query = query.where(models.Vehicule.id > after_id)
+    else:
+        query = query.offset(skip)
+    if until_id is not None:
+        query = query.where(models.Vehicule.id <= until_id)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+# Fonction pour obtenir des véhicules sous forme de lignes SQL, sans objets ORM
+async def get_vehicule_rows(
+    db: AsyncSession,
+    flat: bool = False,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: int | None = None,
+    until_id: int | None = None,
+) -> list:
+    """
+    Mêmes véhicules que `get_vehicules`, en tuples : les colonnes de Vehicule
+    (VEHICULE_COLUMNS), ou avec `flat` les colonnes de l'export, noms des relations
+    compris (export.COLUMN_NAMES). L'identifiant est toujours la première colonne.
+    """
+    if flat:
+        query = export.export_query()
+    else:
+        query = select(*(getattr(models.Vehicule, column) for column in VEHICULE_COLUMNS)).order_by(models.Vehicule.id)
+    query = query.limit(limit)
+    if after_id is not None:
+        query = query.where(models.Vehicule.id > after_id)
+    else:
+        query = query.offset(skip)
+    if until_id is not None:
+        query = query.where(models.Vehicule.id <= until_id)
+    result = await db.execute(query)
+    return result.all()
+
+# Fonction pour trouver la borne d'une page de véhicules sans charger les lignes
+async def get_vehicule_page_end(db: AsyncSession, after_id: int | None, limit: int):
+    """
+    Renvoie l'identifiant du dernier véhicule de la page qui suit `after_id` (depuis le
+    début si None), et s'il existe une page suivante. Le parcours ne lit que l'index de
+    la clé primaire.
+
+    Returns:
+        tuple[int | None, bool]: (dernier identifiant, page suivante) ; (None, False) si
+        moins de `limit` véhicules restent.
+    """
+    query = select(models.Vehicule.id).order_by(models.Vehicule.id).offset(limit - 1).limit(2)
+    if after_id is not None:
+        query = query.where(models.Vehicule.id > after_id)
+    result = await db.execute(query)
+    ids = result.scalars().all()
+    if not ids:
+        return None, False
+    return ids[0], len(ids) > 1
+
+def vehicule_search_conditions(filters: schemas.VehiculeSearch, references: ReferenceCache | None = None) -> list:
+    """
+    Traduit les filtres de recherche en conditions SQL sur les colonnes de Vehicule.
+
+    Les noms sont comparés sans tenir compte de la casse. Avec le cache de référence, ils
+    sont résolus en identifiants avant la requête (condition directe sur la clé étrangère) ;
+    sinon par une sous-requête sur la table de référence.
+    """
+    vehicule = models.Vehicule
+    conditions = [
+        getattr(vehicule, field) == getattr(filters, field)
+        for field in ("marque_id", "modele_id", "finition_id", "carburant_id", "transmission_id", "etat")
+        if getattr(filters, field) is not None
+    ]
+    for table, (model, name_attribute, _) in REFERENCE_TABLES.items():
+        name = getattr(filters, table)
+        if name is None:
+            continue
+        column = getattr(vehicule, f"{table}_id")
+        if references is not None and references.is_loaded:
+            conditions.append(column.in_(references.ids_for(table, name)))
+        else:
+            names = func.lower(getattr(model, name_attribute))
+            conditions.append(column.in_(select(model.id).where(names == name.lower())))
+    for field, column in (("annee", vehicule.annee), ("kilometrage", vehicule.kilometrage), ("prix", vehicule.prix)):
+        minimum, maximum = getattr(filters, f"{field}_min"), getattr(filters, f"{field}_max")
+        if minimum is not None:
+            conditions.append(column >= minimum)
+        if maximum is not None:
+            conditions.append(column <= maximum)
+    return conditions
+
+# Fonction pour rechercher des véhicules (filtres et tri exécutés en SQL)
+async def search_vehicules(
+    db: AsyncSession,
+    filters: schemas.VehiculeSearch,
+    with_relations: bool = True,
+    references: ReferenceCache | None = None,
+):
+    sort_column = getattr(models.Vehicule, filters.sort)
+    if filters.order == "desc":
+        order_by = (sort_column.desc(), models.Vehicule.id.desc())
+    else:
+        order_by = (sort_column.asc(), models.Vehicule.id.asc())
+    query = (
+        select(models.Vehicule)
+        .options(*vehicule_loading(with_relations, models.vehicule_list_loading))
+        .where(*vehicule_search_conditions(filters, references))
+        .order_by(*order_by)
+        .offset(filters.skip)
+        .limit(filters.limit)
+    )
+    result = await db.execute(query)
+    return result.scalars().all()
+
+# Fonction pour compter les véhicules correspondant aux filtres
+async def count_vehicules(
+    db: AsyncSession, filters: schemas.VehiculeSearch, references: ReferenceCache | None = None
+) -> int:
+    query = select(func.count()).select_from(models.Vehicule).where(*vehicule_search_conditions(filters, references))
+    return (await db.execute(query)).scalar_one()
+
+# Fonction pour obtenir un véhicule par ID
+async def get_vehicule(db: AsyncSession, vehicule_id: int, with_relations: bool = True):
+    # populate_existing : recharge aussi les relations d'un véhicule déjà présent dans la session
+    vehicule = await db.get(
+        models.Vehicule,
+        vehicule_id,
+        options=vehicule_loading(with_relations, models.vehicule_detail_loading),
+        populate_existing=True,
+    )
+    if not vehicule:
+        raise HTTPException(status_code=404, detail="Véhicule non trouvé")
+    return vehicule
+
+# Fonction pour créer un véhicule
+async def create_vehicule(db: AsyncSession, vehicule: schemas.VehiculeCreate, with_relations: bool = True):
+    db_vehicule = models.Vehicule(**vehicule.model_dump())
+    db.add(db_vehicule)
+    await db.commit()
+    if not with_relations:
+        return db_vehicule
+    return await get_vehicule(db, db_vehicule.id)
+
+# Fonction pour mettre à jour un véhicule : UPDATE direct, puis relecture pour la réponse
+async def update_vehicule(
+    db: AsyncSession, vehicule_id: int, vehicule_update: schemas.VehiculeUpdate, with_relations: bool = True
+):
+    values = vehicule_update.model_dump(exclude_unset=True)
+    if values:
+        await db.execute(
+            update(models.Vehicule)
+            .where(models.Vehicule.id == vehicule_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return await get_vehicule(db, vehicule_id, with_relations=with_relations)
+
+# Fonction pour supprimer un véhicule, sans le charger
+async def delete_vehicule(db: AsyncSession, vehicule_id: int):
+    result = await db.execute(
+        delete(models.Vehicule)
+        .where(models.Vehicule.id == vehicule_id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Véhicule non trouvé")
+    await db.commit()
+    return {"message": "Véhicule supprimé avec succès"}
+
+# Fonction pour obtenir la liste des utilisateurs ; `after_id` active la pagination par curseur
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    query = select(models.User).order_by(models.User.id).limit(limit)
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+# Fonction pour obtenir un utilisateur par ID
+async def get_user(db: AsyncSession, user_id: int):
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    return user
+
+# Fonction pour créer un utilisateur
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    # Le hachage bcrypt est coûteux en CPU : il est calculé dans le pool de processus dédié
+    password = await password_hasher.hash_async(user.password)
+    db_user = models.User(nom=user.nom, email=user.email, password=password)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+# Fonction pour mettre à jour un utilisateur
+async def update_user(db: AsyncSession, user_id: int, user_update: schemas.UserUpdate):
+    db_user = await get_user(db, user_id)
+    update_data = user_update.model_dump(exclude_unset=True)
+    if "password" in update_data:
+        update_data["password"] = await password_hasher.hash_async(update_data["password"])
+    for key, value in update_data.items():
+        setattr(db_user, key, value)
+    await db.commit()
+    # Les jetons en cours portent l'ancien nom et les anciens droits
+    token_cache.revoke_user(db_user.id)
+    await db.refresh(db_user)
+    return db_user
+
+# Fonction pour supprimer un utilisateur
+async def delete_user(db: AsyncSession, user_id: int):
+    db_user = await get_user(db, user_id)
+    await db.delete(db_user)
+    await db.commit()
+    token_cache.revoke_user(user_id)
+    return {"message": "Utilisateur supprimé avec succès"}
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email).limit(1))
+    return result.scalars().first()
+
+
+async def get_user_by_nom(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.nom == username).limit(1))
+    return result.scalars().first()
+
+
+async def authenticate_user_by_nom(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_nom(db, username)
+    if not user:
+        return None
+    valid, new_hash = await password_hasher.verify_and_update_async(password, user.password)
+    if not valid:
+        return None
+    if new_hash is not None:
+        # Le coût bcrypt a changé depuis le hachage : le mot de passe en clair est disponible, on le refait
+        user.password = new_hash
+        await db.commit()
+        password_hasher.record_rehash(user.nom)
+    return user
@@ -1,8 +1,12 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+import metrics
+
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
@@ -12,16 +16,73 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL n'est pas défini")
 
-engine = create_engine(DATABASE_URL)
+# Réglages du pool de connexions
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Pilotes asynchrones à utiliser pour chaque base lorsque ASYNC_DATABASE_URL n'est pas défini
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mariadb": "mariadb+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Convertit une URL SQLAlchemy synchrone (pymysql, sqlite...) vers son pilote asynchrone."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de pilote asynchrone connu pour {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def engine_options(url: str) -> dict:
+    """Options du pool de connexions ; SQLite garde le pool choisi par SQLAlchemy."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone (aiomysql en production, aiosqlite pour les tests)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Durée de chaque requête SQL, exposée par /metrics
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
 # Fonction pour obtenir une session de base de données
+# La connexion est prise au pool dès l'ouverture de la session, pour mesurer l'attente du pool
 def get_db():
     db = SessionLocal()
     try:
+        with metrics.timed("db_session_acquire"):
+            db.connection()
         yield db
     finally:
         db.close()
 
+
+# Fonction pour obtenir une session asynchrone de base de données
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        with metrics.timed("db_session_acquire"):
+            await db.connection()
+        yield db
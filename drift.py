@@ -0,0 +1,493 @@
+"""
+Surveillance en continu de la dérive des entrées de /predict par rapport aux données
+d'entraînement.
+
+Chaque requête acceptée met à jour, en temps constant, des statistiques de taille bornée :
+
+- kilométrage et année : échantillon de réservoir (algorithme R) et moments de Welford ;
+- champs catégoriels : comptage exact des catégories connues des OneHotEncoder
+  (vocabulaire borné), sketch count-min des catégories inconnues, dont la part et les
+  valeurs les plus fréquentes sont rapportées.
+
+Le rapport compare ces statistiques au profil d'entraînement `drift_profile.json`, écrit
+à côté des pickles par models/training_pipeline.py (ou par ce module, voir Usage) :
+indice de stabilité de population (PSI) et distance de Kolmogorov-Smirnov sur les
+tranches de quantiles d'entraînement, PSI et distance de variation totale sur les parts
+des catégories. Sans profil, seules les moyennes et écarts-types du StandardScaler et
+les vocabulaires des encodeurs servent de référence.
+
+Les statistiques portent sur une fenêtre glissante de `window_seconds` : à son
+expiration, la fenêtre courante devient la fenêtre précédente, toujours consultable.
+
+Usage :
+    python drift.py --data data/csv/voitures_aramisauto_cleaned.csv --models-dir ./models/pkl
+"""
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Callable
+
+from inference import COLUMN_MAPPING
+
+# Fichier du profil d'entraînement, relativement au répertoire des modèles
+PROFILE_FILE = "drift_profile.json"
+
+# Version du format du profil, vérifiée au chargement
+PROFILE_FORMAT = 1
+
+NUMERIC_FIELDS = ("kilometrage", "annee")
+CATEGORICAL_FIELDS = tuple(field for field in COLUMN_MAPPING if field not in NUMERIC_FIELDS)
+
+# Quantiles d'entraînement délimitant les tranches du PSI numérique (tous les 5 %)
+PROFILE_QUANTILES = [step / 20 for step in range(21)]
+
+# Quantiles rapportés pour la fenêtre courante
+REPORTED_QUANTILES = {"p05": 0.05, "p50": 0.5, "p95": 0.95}
+
+# Part minimale d'une tranche ou d'une catégorie dans le calcul du PSI (évite log(0))
+PSI_EPSILON = 1e-4
+
+
+def population_stability_index(actual: list[float], expected: list[float]) -> float:
+    return sum(
+        (max(p, PSI_EPSILON) - max(q, PSI_EPSILON)) * math.log(max(p, PSI_EPSILON) / max(q, PSI_EPSILON))
+        for p, q in zip(actual, expected)
+    )
+
+
+# --- Profil d'entraînement ----------------------------------------------------------
+
+
+def build_profile(df, max_categories: int = 1000) -> dict:
+    """
+    Calcule le profil de dérive d'un DataFrame d'entraînement (colonnes de COLUMN_MAPPING).
+
+    Args:
+        df (pd.DataFrame): Données d'entraînement.
+        max_categories (int): Nombre maximal de catégories conservées par champ ; les
+            suivantes sont regroupées dans `other_share`.
+    """
+    import numpy as np
+
+    profile = {"format": PROFILE_FORMAT, "rows": int(len(df)), "numeric": {}, "categorical": {}}
+    for field in NUMERIC_FIELDS:
+        values = df[COLUMN_MAPPING[field]].dropna().to_numpy(dtype=float)
+        quantiles = np.quantile(values, PROFILE_QUANTILES)
+        # Les valeurs discrètes (année) donnent des quantiles répétés : seules les bornes distinctes délimitent des tranches
+        edges = sorted(set(float(value) for value in quantiles[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        profile["numeric"][field] = {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "quantiles": {name: float(np.quantile(values, q)) for name, q in REPORTED_QUANTILES.items()},
+            "edges": edges,
+            "shares": [float(count) / len(values) for count in counts],
+        }
+    for field in CATEGORICAL_FIELDS:
+        shares = df[COLUMN_MAPPING[field]].dropna().astype(str).value_counts(normalize=True)
+        kept = shares.iloc[:max_categories]
+        profile["categorical"][field] = {
+            "distinct": int(len(shares)),
+            "shares": {str(value): float(share) for value, share in kept.items()},
+            "other_share": float(max(0.0, 1.0 - kept.sum())),
+        }
+    return profile
+
+
+def save_profile(profile: dict, models_dir: str) -> str:
+    """Écrit le profil dans `models_dir` (fichier temporaire puis renommage) et renvoie son chemin."""
+    path = os.path.join(models_dir, PROFILE_FILE)
+    handle, temporary = tempfile.mkstemp(dir=models_dir, prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            json.dump(profile, output, indent=2, ensure_ascii=False)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return path
+
+
+def load_profile(models_dir: str) -> dict | None:
+    """Renvoie le profil enregistré dans `models_dir`, ou None s'il est absent ou d'un autre format."""
+    try:
+        with open(os.path.join(models_dir, PROFILE_FILE), encoding="utf-8") as data:
+            profile = json.load(data)
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("format") == PROFILE_FORMAT else None
+
+
+class DriftReference:
+    """
+    Référence à laquelle le trafic est comparé.
+
+    Args:
+        vocabularies (dict[str, set[str]]): Catégories vues par les OneHotEncoder, par champ.
+        profile (dict | None): Profil d'entraînement (voir `build_profile`).
+        moments (dict[str, tuple[float, float]]): Moyenne et écart-type du StandardScaler
+            par champ numérique, utilisés lorsque le profil est absent.
+    """
+
+    def __init__(
+        self,
+        vocabularies: dict[str, set[str]],
+        profile: dict | None = None,
+        moments: dict[str, tuple[float, float]] | None = None,
+    ):
+        self.vocabularies = {field: frozenset(values) for field, values in vocabularies.items()}
+        self.profile = profile
+        self.moments = dict(moments or {})
+        if profile is not None:
+            for field, summary in profile["numeric"].items():
+                self.moments[field] = (summary["mean"], summary["std"])
+
+    @property
+    def source(self) -> str:
+        return "profile" if self.profile is not None else "encoders"
+
+
+# --- Statistiques en flux -----------------------------------------------------------
+
+
+class Reservoir:
+    """
+    Échantillon uniforme de taille bornée d'un flux de nombres (algorithme R), complété
+    par le nombre de valeurs, leur moyenne et leur variance (méthode de Welford).
+    """
+
+    __slots__ = ("size", "sample", "count", "mean", "_m2", "_random")
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = max(1, size)
+        self.sample: list[float] = []
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._random = rng.random
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if len(self.sample) < self.size:
+            self.sample.append(value)
+        else:
+            slot = int(self._random() * self.count)
+            if slot < self.size:
+                self.sample[slot] = value
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def copy(self) -> "Reservoir":
+        copy = Reservoir.__new__(Reservoir)
+        copy.size, copy.sample, copy.count = self.size, list(self.sample), self.count
+        copy.mean, copy._m2, copy._random = self.mean, self._m2, self._random
+        return copy
+
+    def quantiles(self, qs: dict[str, float]) -> dict[str, float]:
+        ordered = sorted(self.sample)
+        return {name: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for name, q in qs.items()}
+
+    def shares(self, edges: list[float]) -> list[float]:
+        """Part de l'échantillon dans chaque tranche délimitée par `edges` (bornes à droite exclues)."""
+        counts = [0] * (len(edges) + 1)
+        for value in self.sample:
+            counts[bisect_right(edges, value)] += 1
+        return [count / len(self.sample) for count in counts]
+
+
+class CountMinSketch:
+    """
+    Sketch count-min : fréquences approchées (par excès, d'au plus e·N/`width` avec une
+    probabilité 1 - e^-`depth`) d'un nombre quelconque de valeurs en mémoire fixe.
+    """
+
+    __slots__ = ("width", "depth", "rows", "total")
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = max(1, width)
+        self.depth = max(1, depth)
+        self.rows = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def _slots(self, value: str) -> tuple[int, int]:
+        # Double hachage : la position dans la ligne i vaut (first + i * second) % width
+        digest = hash(value)
+        return digest & 0xFFFFFFFF, ((digest >> 32) & 0xFFFFFFFF) | 1
+
+    def add(self, value: str):
+        self.total += 1
+        slot, step = self._slots(value)
+        width = self.width
+        for row in self.rows:
+            row[slot % width] += 1
+            slot += step
+
+    def estimate(self, value: str) -> int:
+        slot, step = self._slots(value)
+        return min(row[(slot + i * step) % self.width] for i, row in enumerate(self.rows))
+
+
+class _CategoryCounts:
+    """
+    Comptage des valeurs d'un champ catégoriel : exact pour le vocabulaire des encodeurs
+    (borné), sketch count-min pour les valeurs inconnues (non bornées), dont les
+    `max_top` plus fréquentes sont suivies.
+    """
+
+    __slots__ = ("known", "sketch", "total", "unseen", "top_unseen", "max_top", "tracks_unseen")
+
+    def __init__(self, vocabulary: frozenset | None, sketch_width: int, sketch_depth: int, max_top: int):
+        self.known = dict.fromkeys(vocabulary or (), 0)
+        self.sketch = CountMinSketch(sketch_width, sketch_depth)
+        self.total = 0
+        self.unseen = 0
+        self.top_unseen: dict[str, int] = {}
+        self.max_top = max_top
+        # Sans vocabulaire (champ ignoré par les encodeurs), toutes les valeurs passent par le sketch
+        self.tracks_unseen = vocabulary is not None
+
+    def add(self, value: str) -> bool:
+        """Compte `value` ; renvoie True si elle est inconnue des encodeurs."""
+        self.total += 1
+        known = self.known
+        if value in known:
+            known[value] += 1
+            return False
+        self.sketch.add(value)
+        if not self.tracks_unseen:
+            return False
+        self.unseen += 1
+        top = self.top_unseen
+        if value in top or len(top) < self.max_top:
+            top[value] = self.sketch.estimate(value)
+        else:
+            # Remplacement de la moins fréquente : O(max_top), seulement quand `value` la dépasse
+            estimate = self.sketch.estimate(value)
+            weakest = min(top, key=top.get)
+            if estimate > top[weakest]:
+                del top[weakest]
+                top[value] = estimate
+        return True
+
+    def estimate(self, value: str) -> int:
+        count = self.known.get(value)
+        return count if count is not None else min(self.sketch.estimate(value), self.total)
+
+
+class _Window:
+    """Statistiques d'une fenêtre de trafic."""
+
+    def __init__(self, reference: DriftReference, reservoir_size: int, sketch_width: int, sketch_depth: int, max_top: int, seed: int):
+        rng = random.Random(seed)
+        self.started_at = time.time()
+        self.requests = 0
+        self.requests_with_unseen = 0
+        self.numeric = {field: Reservoir(reservoir_size, rng) for field in NUMERIC_FIELDS}
+        self.categorical = {
+            field: _CategoryCounts(reference.vocabularies.get(field), sketch_width, sketch_depth, max_top)
+            for field in CATEGORICAL_FIELDS
+        }
+
+
+class DriftMonitor:
+    """
+    Statistiques de dérive des requêtes de prédiction, mises à jour en O(1) par requête.
+
+    Args:
+        reference (Callable[[], DriftReference]): Fonction renvoyant la référence ; appelée
+            au premier usage pour ne pas forcer le chargement des modèles à l'import.
+        reservoir_size (int): Taille des échantillons de kilométrage et d'année.
+        sketch_width (int): Largeur des sketches count-min des valeurs inconnues.
+        sketch_depth (int): Nombre de lignes des sketches count-min.
+        window_seconds (float): Durée d'une fenêtre de statistiques (0 : pas de rotation).
+        min_samples (int): Requêtes nécessaires avant de conclure à une dérive.
+        psi_threshold (float): PSI à partir duquel un champ est signalé.
+        unseen_rate_threshold (float): Part de catégories inconnues à partir de laquelle un champ est signalé.
+        max_top (int): Nombre de valeurs inconnues les plus fréquentes rapportées par champ.
+    """
+
+    def __init__(
+        self,
+        reference: Callable[[], DriftReference],
+        reservoir_size: int = 1024,
+        sketch_width: int = 2048,
+        sketch_depth: int = 4,
+        window_seconds: float = 3600,
+        min_samples: int = 200,
+        psi_threshold: float = 0.2,
+        unseen_rate_threshold: float = 0.05,
+        max_top: int = 10,
+    ):
+        self._load_reference = reference
+        self.reservoir_size = reservoir_size
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.psi_threshold = psi_threshold
+        self.unseen_rate_threshold = unseen_rate_threshold
+        self.max_top = max_top
+        self._reference: DriftReference | None = None
+        self._lock = threading.Lock()
+        self._windows = 0
+        # Les fenêtres sont créées au premier usage : leurs compteurs exacts dépendent du vocabulaire
+        self._current: _Window | None = None
+        self._previous: _Window | None = None
+        self._window_end = 0.0
+
+    @property
+    def reference_loaded(self) -> bool:
+        return self._reference is not None
+
+    def reference(self) -> DriftReference:
+        if self._reference is None:
+            self._reference = self._load_reference()
+        return self._reference
+
+    def reset(self):
+        """Oublie la référence et les fenêtres (nouvelle version de modèles)."""
+        with self._lock:
+            self._reference = None
+            self._current = self._previous = None
+
+    def _rotate(self, reference: DriftReference, now: float):
+        self._windows += 1
+        self._previous = self._current
+        self._current = _Window(
+            reference, self.reservoir_size, self.sketch_width, self.sketch_depth, self.max_top, self._windows
+        )
+        self._window_end = now + self.window_seconds if self.window_seconds > 0 else math.inf
+
+    def observe(self, request):
+        """Prend en compte une requête (déjà canonique) ; temps constant."""
+        reference = self.reference()
+        now = time.monotonic()
+        with self._lock:
+            if self._current is None or now >= self._window_end:
+                self._rotate(reference, now)
+            window = self._current
+            window.requests += 1
+            for field, reservoir in window.numeric.items():
+                reservoir.add(float(getattr(request, field)))
+            any_unseen = False
+            for field, counts in window.categorical.items():
+                if counts.add(getattr(request, field)):
+                    any_unseen = True
+            if any_unseen:
+                window.requests_with_unseen += 1
+
+    # --- Rapport ------------------------------------------------------------------
+
+    def _numeric_report(self, field: str, reservoir: Reservoir, reference: DriftReference) -> dict:
+        report = {"count": reservoir.count}
+        if not reservoir.count:
+            return report
+        report.update(mean=reservoir.mean, std=reservoir.std, quantiles=reservoir.quantiles(REPORTED_QUANTILES))
+        drift = False
+        moments = reference.moments.get(field)
+        if moments is not None:
+            mean, std = moments
+            report["reference"] = {"mean": mean, "std": std}
+            report["mean_shift_std"] = (reservoir.mean - mean) / std if std else None
+        summary = reference.profile["numeric"].get(field) if reference.profile else None
+        if summary is not None:
+            report["reference"]["quantiles"] = summary["quantiles"]
+            shares = reservoir.shares(summary["edges"])
+            report["psi"] = population_stability_index(shares, summary["shares"])
+            cumulative = expected = ks = 0.0
+            for p, q in zip(shares, summary["shares"]):
+                cumulative += p
+                expected += q
+                ks = max(ks, abs(cumulative - expected))
+            report["ks"] = ks
+            drift = report["psi"] >= self.psi_threshold
+        report["drift"] = drift and reservoir.count >= self.min_samples
+        return report
+
+    def _categorical_report(self, field: str, counts: _CategoryCounts, top_unseen: dict, reference: DriftReference) -> dict:
+        total = counts.total
+        report = {"count": total}
+        if not total:
+            return report
+        drift = False
+        if counts.tracks_unseen:
+            report["unseen"] = counts.unseen
+            report["unseen_rate"] = counts.unseen / total
+            report["top_unseen"] = dict(sorted(top_unseen.items(), key=lambda item: item[1], reverse=True))
+            drift = report["unseen_rate"] >= self.unseen_rate_threshold
+        summary = reference.profile["categorical"].get(field) if reference.profile else None
+        if summary is not None:
+            values = list(summary["shares"])
+            expected = [summary["shares"][value] for value in values]
+            actual = [counts.estimate(value) / total for value in values]
+            # Les estimations du sketch sont par excès : leur somme est ramenée à 1 au plus avant de calculer le reste
+            covered = sum(actual)
+            if covered > 1:
+                actual = [share / covered for share in actual]
+            actual.append(max(0.0, 1.0 - sum(actual)))
+            expected.append(summary["other_share"])
+            report["psi"] = population_stability_index(actual, expected)
+            report["total_variation"] = sum(abs(p - q) for p, q in zip(actual, expected)) / 2
+            shifts = sorted(
+                zip(values + ["(autres)"], actual, expected), key=lambda item: abs(item[1] - item[2]), reverse=True
+            )
+            report["top_shifts"] = [
+                {"value": value, "share": p, "reference_share": q} for value, p, q in shifts[:5]
+            ]
+            drift = drift or report["psi"] >= self.psi_threshold
+        report["drift"] = drift and total >= self.min_samples
+        return report
+
+    def _window_report(self, window: _Window, reference: DriftReference) -> dict:
+        with self._lock:
+            # Copie sous verrou de ce qui peut changer de taille ; les calculs se font ensuite hors verrou
+            numeric = {field: reservoir.copy() for field, reservoir in window.numeric.items()}
+            top_unseen = {field: dict(counts.top_unseen) for field, counts in window.categorical.items()}
+            requests, with_unseen = window.requests, window.requests_with_unseen
+        fields = {field: self._numeric_report(field, reservoir, reference) for field, reservoir in numeric.items()}
+        for field, counts in window.categorical.items():
+            fields[field] = self._categorical_report(field, counts, top_unseen[field], reference)
+        return {
+            "started_at": datetime.fromtimestamp(window.started_at, timezone.utc).isoformat(),
+            "requests": requests,
+            "unseen_request_rate": with_unseen / requests if requests else 0.0,
+            "drifted": [field for field, report in fields.items() if report.get("drift")],
+            "fields": fields,
+        }
+
+    def report(self) -> dict:
+        reference = self.reference()
+        current, previous = self._current, self._previous
+        return {
+            "reference": reference.source,
+            "profile_rows": reference.profile["rows"] if reference.profile else None,
+            "window_seconds": self.window_seconds,
+            "min_samples": self.min_samples,
+            "psi_threshold": self.psi_threshold,
+            "unseen_rate_threshold": self.unseen_rate_threshold,
+            "current": self._window_report(current, reference) if current is not None else None,
+            "previous": self._window_report(previous, reference) if previous is not None else None,
+        }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="CSV d'entraînement nettoyé")
+    parser.add_argument("--models-dir", default="./models/pkl")
+    args = parser.parse_args()
+    print(save_profile(build_profile(pd.read_csv(args.data)), args.models_dir))
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "vehicules.ndjson"),
+    "csv": ("text/csv; charset=utf-8", "vehicules.csv"),
+    "parquet": ("application/vnd.apache.parquet", "vehicules.parquet"),
+}
+
+# Colonnes exportées : (nom, expression SQL, type Parquet)
+EXPORT_COLUMNS = (
+    ("id", models.Vehicule.id, "int64"),
+    ("annee", models.Vehicule.annee, "int64"),
+    ("kilometrage", models.Vehicule.kilometrage, "float64"),
+    ("prix", models.Vehicule.prix, "float64"),
+    ("etat", models.Vehicule.etat, "string"),
+    ("marque_id", models.Vehicule.marque_id, "int64"),
+    ("modele_id", models.Vehicule.modele_id, "int64"),
+    ("finition_id", models.Vehicule.finition_id, "int64"),
+    ("carburant_id", models.Vehicule.carburant_id, "int64"),
+    ("transmission_id", models.Vehicule.transmission_id, "int64"),
+    ("marque", models.Marque.name, "string"),
+    ("modele", models.Modele.name, "string"),
+    ("finition", models.Finition.name, "string"),
+    ("carburant", models.Carburant.type, "string"),
+    ("transmission", models.Transmission.type, "string"),
+)
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+
+def export_query():
+    """Lignes de Vehicule avec les noms de leurs relations, sans passer par les objets ORM."""
+    vehicule = models.Vehicule
+    return (
+        select(*(column for _, column, _ in EXPORT_COLUMNS))
+        .outerjoin(models.Marque, vehicule.marque_id == models.Marque.id)
+        .outerjoin(models.Modele, vehicule.modele_id == models.Modele.id)
+        .outerjoin(models.Finition, vehicule.finition_id == models.Finition.id)
+        .outerjoin(models.Carburant, vehicule.carburant_id == models.Carburant.id)
+        .outerjoin(models.Transmission, vehicule.transmission_id == models.Transmission.id)
+        .order_by(vehicule.id)
+    )
+
+
+class NdjsonEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: list) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(COLUMN_NAMES, row)), ensure_ascii=False) + "\n" for row in rows
+        ).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(COLUMN_NAMES)
+        return self._drain()
+
+    def encode(self, rows: list) -> bytes:
+        self._writer.writerows(rows)
+        return self._drain()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont le contenu est récupéré et vidé après chaque groupe de lignes."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # ParquetWriter calcule les décalages des pages à partir de la position courante
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """Écrit un groupe de lignes Parquet par bloc reçu ; le pied de fichier est envoyé à la fermeture."""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, getattr(pa, type)()) for name, _, type in EXPORT_COLUMNS])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: list) -> bytes:
+        columns = list(zip(*rows))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def make_encoder(format: str):
+    """
+    Renvoie l'encodeur du format demandé.
+
+    Raises:
+        ImportError: pyarrow n'est pas disponible pour le format parquet.
+    """
+    if format == "csv":
+        return CsvEncoder()
+    if format == "parquet":
+        return ParquetEncoder()
+    return NdjsonEncoder()
+
+
+async def stream_export(
+    session_factory: Callable[[], AsyncSession], encoder, chunk_size: int = 5000
+) -> AsyncIterator[bytes]:
+    """
+    Lit la table Vehicule par un curseur côté serveur (`yield_per`) et renvoie chaque bloc
+    de `chunk_size` lignes déjà encodé : la mémoire utilisée ne dépend pas du nombre de
+    lignes exportées.
+    """
+    header = encoder.header()
+    if header:
+        yield header
+    # La session est ouverte dans le générateur : elle doit vivre aussi longtemps que la réponse
+    async with session_factory() as db:
+        result = await db.stream(export_query().execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            yield encoder.encode(rows)
+    footer = encoder.close()
+    if footer:
+        yield footer
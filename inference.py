@@ -0,0 +1,502 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import metrics
+import schemas
+
+# Correspondance entre les champs de PredictRequest et les colonnes utilisées lors de l'entraînement
+COLUMN_MAPPING = {
+    "kilometrage": "Kilometrage",
+    "annee": "Annee",
+    "marque": "Marque",
+    "finition": "Finition",
+    "carburant": "Carburant",
+    "transmission": "Transmission",
+    "modele": "Modele",
+    "etat": "Etat",
+}
+
+# Correspondance inverse : colonne d'entraînement -> champ de PredictRequest
+FIELD_MAPPING = {column: field for field, column in COLUMN_MAPPING.items()}
+
+# Champs de PredictRequest auxquels les contributions des explications sont rapportées
+EXPLAINED_FIELDS = list(COLUMN_MAPPING)
+
+# En dessous de ce nombre de lignes, les valeurs SHAP de CatBoost sont calculées sans
+# précalcul : le précalcul coûte un temps fixe par appel (~0,3 s pour le modèle servi)
+# qui n'est rentabilisé qu'au-delà de quelques dizaines de lignes
+SHAP_PRECALC_MIN_ROWS = 64
+
+
+def build_feature_frame(requests: list[schemas.PredictRequest]) -> pd.DataFrame:
+    """
+    Construit un DataFrame colonnaire à partir d'une liste de requêtes de prédiction.
+
+    Les colonnes sont remplies directement avec les noms attendus par les modèles,
+    ce qui évite de construire une ligne par requête puis de renommer le tout.
+
+    Args:
+        requests (list[schemas.PredictRequest]): Les requêtes à convertir.
+
+    Returns:
+        pd.DataFrame: Une ligne par requête, dans le même ordre.
+    """
+    return pd.DataFrame(
+        {
+            column: [getattr(request, field) for request in requests]
+            for field, column in COLUMN_MAPPING.items()
+        }
+    )
+
+
+def category_vocabularies(*pipelines) -> dict[str, set[str]]:
+    """
+    Extrait les catégories connues des OneHotEncoder de chaque pipeline.
+
+    Returns:
+        dict[str, set[str]]: Champ de PredictRequest -> catégories vues à l'entraînement.
+    """
+    vocabularies: dict[str, set[str]] = {}
+    for pipeline in pipelines:
+        for _, transformer, columns in pipeline.steps[0][1].transformers_:
+            if type(transformer).__name__ != "OneHotEncoder":
+                continue
+            for column, categories in zip(columns, transformer.categories_):
+                vocabularies.setdefault(FIELD_MAPPING[column], set()).update(
+                    value for value in categories if isinstance(value, str)
+                )
+    return vocabularies
+
+
+def evaluate_price(lr_prediction) -> str:
+    """Traduit la classe prédite par la régression logistique en libellé."""
+    return "Abordable" if lr_prediction == 1 else "Pas abordable"
+
+
+def predict_frame(catboost_model, lr_model, input_data: pd.DataFrame) -> list[dict]:
+    """
+    Applique les deux modèles sur toutes les lignes d'un DataFrame en un seul appel chacun.
+
+    Returns:
+        list[dict]: Un résultat par ligne, dans l'ordre du DataFrame.
+    """
+    # Le formatage du DataFrame est coûteux : il n'a lieu que si le niveau DEBUG est actif
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug(f"Entrées de la prédiction ({len(input_data)} lignes) :\n{input_data}")
+
+    with metrics.timed("catboost_predict"):
+        cb_predictions = catboost_model.predict(input_data)
+    with metrics.timed("logreg_predict"):
+        lr_predictions = lr_model.predict(input_data)
+
+    return [
+        {
+            "catboost_prediction": float(cb_prediction),
+            "Logistic_Regression_evaluation": evaluate_price(lr_prediction),
+        }
+        for cb_prediction, lr_prediction in zip(cb_predictions, lr_predictions)
+    ]
+
+
+def predict_requests(
+    catboost_model, lr_model, requests: list[schemas.PredictRequest], compiled: "CompiledModels | None" = None
+) -> list[dict]:
+    """
+    Prédit un lot de requêtes avec un seul appel vectorisé par modèle.
+
+    Le chemin compilé est utilisé lorsqu'il est fourni ; les pipelines sklearn servent
+    de repli. Les pipelines peuvent être None lorsque le chemin compilé provient d'un
+    bundle d'inférence (voir model_export.py).
+
+    Si l'appel vectorisé échoue, chaque requête est reprise individuellement afin
+    d'isoler les lignes fautives : leur résultat est alors l'exception levée.
+
+    Returns:
+        list[dict | Exception]: Un résultat (ou une erreur) par requête, dans le même ordre.
+    """
+    if not requests:
+        return []
+    try:
+        if compiled is not None:
+            return compiled.predict(requests)
+        with metrics.timed("feature_frame"):
+            input_data = build_feature_frame(requests)
+        return predict_frame(catboost_model, lr_model, input_data)
+    except Exception as e:
+        logging.warning(f"Échec de la prédiction vectorisée, reprise ligne par ligne : {e}")
+
+    results = []
+    for request in requests:
+        try:
+            if catboost_model is None:
+                # Modèles chargés depuis un bundle d'inférence : pas de pipeline sklearn de repli
+                results.extend(compiled.predict([request]))
+            else:
+                results.extend(predict_frame(catboost_model, lr_model, build_feature_frame([request])))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def explain_requests(
+    catboost_model, lr_model, requests: list[schemas.PredictRequest], compiled: "CompiledModels | None" = None
+) -> list[dict]:
+    """
+    Prédit et explique un lot de requêtes (voir `CompiledModels.explain`).
+
+    Les explications sont calculées sur les matrices du chemin compilé ; s'il n'a pas
+    été retenu, il est reconstruit depuis les pipelines, sans contrôle d'équivalence.
+    Comme pour `predict_requests`, un échec du lot entraîne une reprise ligne par ligne.
+
+    Returns:
+        list[dict | Exception]: Un résultat (ou une erreur) par requête, dans le même ordre.
+    """
+    if not requests:
+        return []
+    if compiled is None:
+        compiled = CompiledModels.from_pipelines(catboost_model, lr_model)
+    try:
+        return compiled.explain(requests)
+    except Exception as e:
+        logging.warning(f"Échec de l'explication vectorisée, reprise ligne par ligne : {e}")
+
+    results = []
+    for request in requests:
+        try:
+            results.extend(compiled.explain([request]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class CompiledPreprocessor:
+    """
+    Reproduit un ColumnTransformer (StandardScaler + OneHotEncoder) sans pandas ni sklearn.
+
+    Les moyennes et écarts-types du scaler ainsi que les vocabulaires de l'encodeur sont
+    lus une seule fois ; chaque catégorie est ensuite associée directement à l'indice de
+    sa colonne one-hot. Une catégorie inconnue n'active aucune colonne, comme avec
+    `OneHotEncoder(handle_unknown="ignore")`.
+
+    Args:
+        n_features (int): Nombre de colonnes en sortie du préprocesseur.
+        numeric (list[tuple[str, int, float, float]]): (champ, indice, moyenne, écart-type).
+        categorical (list[tuple[str, dict[str, int]]]): (champ, catégorie -> indice).
+    """
+
+    def __init__(self, n_features: int, numeric: list[tuple], categorical: list[tuple]):
+        self.n_features = n_features
+        self.numeric = numeric
+        self.categorical = categorical
+
+    @classmethod
+    def from_column_transformer(cls, column_transformer) -> "CompiledPreprocessor":
+        numeric, categorical = [], []
+        for name, transformer, columns in column_transformer.transformers_:
+            if name == "remainder":
+                if transformer != "drop" or len(columns):
+                    raise ValueError("Colonnes restantes non supportées")
+                continue
+            start = column_transformer.output_indices_[name].start
+            fields = [FIELD_MAPPING[column] for column in columns]
+            if type(transformer).__name__ == "StandardScaler":
+                means = transformer.mean_ if transformer.with_mean else np.zeros(len(fields))
+                scales = transformer.scale_ if transformer.with_std else np.ones(len(fields))
+                for offset, field in enumerate(fields):
+                    numeric.append((field, start + offset, float(means[offset]), float(scales[offset])))
+            elif type(transformer).__name__ == "OneHotEncoder":
+                if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise ValueError("OneHotEncoder avec drop/infrequent non supporté")
+                for field, categories in zip(fields, transformer.categories_):
+                    categorical.append((field, {value: start + i for i, value in enumerate(categories)}))
+                    start += len(categories)
+            else:
+                raise ValueError(f"Transformateur non supporté : {name}")
+        n_features = max(indices.stop for indices in column_transformer.output_indices_.values())
+        return cls(n_features, numeric, categorical)
+
+    def scaled_values(self, request) -> list[tuple[int, float]]:
+        """Renvoie les couples (indice, valeur centrée réduite) des colonnes numériques."""
+        return [
+            (index, (float(getattr(request, field)) - mean) / scale)
+            for field, index, mean, scale in self.numeric
+        ]
+
+    def active_indices(self, request) -> list[int]:
+        """Renvoie les indices des colonnes one-hot activées par la requête."""
+        indices = []
+        for field, vocabulary in self.categorical:
+            index = vocabulary.get(getattr(request, field))
+            if index is not None:
+                indices.append(index)
+        return indices
+
+    def row(self, request) -> list[float]:
+        """Transforme une requête en ligne dense (liste Python), sans passer par NumPy."""
+        values = [0.0] * self.n_features
+        for index, value in self.scaled_values(request):
+            values[index] = value
+        for index in self.active_indices(request):
+            values[index] = 1.0
+        return values
+
+    def transform(self, requests: list) -> sparse.csr_matrix:
+        """
+        Transforme un lot de requêtes en matrice creuse (une ligne par requête).
+
+        La matrice est construite directement au format CSR : CatBoost la consomme
+        nativement et bien plus vite qu'une matrice dense de même forme.
+        """
+        indptr, indices, data = [0], [], []
+        for request in requests:
+            for index, value in self.scaled_values(request):
+                indices.append(index)
+                data.append(value)
+            active = self.active_indices(request)
+            indices.extend(active)
+            data.extend([1.0] * len(active))
+            indptr.append(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(requests), self.n_features))
+
+    def field_matrix(self, fields: list[str]) -> sparse.csr_matrix:
+        """
+        Matrice (colonnes de sortie x champs) valant 1 lorsque la colonne provient du champ :
+        multiplier des contributions par colonne par cette matrice les rapporte aux champs.
+
+        Les colonnes one-hot d'un champ sont contiguës, catégories non textuelles (NaN) en
+        dernier : une colonne sans catégorie connue, écartée à l'export du bundle, revient
+        au champ de la colonne qui la précède.
+        """
+        owners: list[str | None] = [None] * self.n_features
+        for field, index, _, _ in self.numeric:
+            owners[index] = field
+        for field, vocabulary in self.categorical:
+            for index in vocabulary.values():
+                owners[index] = field
+        for index in range(1, self.n_features):
+            if owners[index] is None:
+                owners[index] = owners[index - 1]
+        rows = [index for index, field in enumerate(owners) if field is not None]
+        columns = [fields.index(owners[index]) for index in rows]
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(self.n_features, len(fields)))
+
+
+class CompiledModels:
+    """
+    Chemin d'inférence compilé, sans pandas, pour les pipelines CatBoost et régression logistique.
+
+    Le modèle CatBoost reçoit directement la matrice numérique produite par son
+    préprocesseur compilé. La régression logistique est évaluée par arithmétique
+    simple : intercept + somme des coefficients des colonnes actives.
+    """
+
+    def __init__(self, catboost_preprocessor, catboost_regressor, lr_preprocessor, lr_coef, lr_intercept, lr_classes):
+        self.catboost_preprocessor = catboost_preprocessor
+        self.catboost_regressor = catboost_regressor
+        self.lr_preprocessor = lr_preprocessor
+        self.lr_coef = np.asarray(lr_coef, dtype=float)
+        self.lr_coef_list = self.lr_coef.tolist()
+        self.lr_intercept = float(lr_intercept)
+        self.lr_classes = list(lr_classes)
+        self.catboost_fields = catboost_preprocessor.field_matrix(EXPLAINED_FIELDS)
+        self.lr_fields = lr_preprocessor.field_matrix(EXPLAINED_FIELDS)
+
+    @classmethod
+    def from_pipelines(cls, catboost_model, lr_model) -> "CompiledModels":
+        classifier = lr_model.steps[-1][1]
+        if classifier.coef_.shape[0] != 1:
+            raise ValueError("Seule la régression logistique binaire est supportée")
+        return cls(
+            CompiledPreprocessor.from_column_transformer(catboost_model.steps[0][1]),
+            catboost_model.steps[-1][1],
+            CompiledPreprocessor.from_column_transformer(lr_model.steps[0][1]),
+            classifier.coef_[0],
+            classifier.intercept_[0],
+            classifier.classes_,
+        )
+
+    def _lr_decision(self, request) -> float:
+        coef = self.lr_coef_list
+        decision = self.lr_intercept
+        for index, value in self.lr_preprocessor.scaled_values(request):
+            decision += coef[index] * value
+        for index in self.lr_preprocessor.active_indices(request):
+            decision += coef[index]
+        return decision
+
+    def vocabularies(self) -> dict[str, set[str]]:
+        """Mêmes vocabulaires que `category_vocabularies`, lus depuis les préprocesseurs compilés."""
+        vocabularies: dict[str, set[str]] = {}
+        for preprocessor in (self.catboost_preprocessor, self.lr_preprocessor):
+            for field, vocabulary in preprocessor.categorical:
+                vocabularies.setdefault(field, set()).update(
+                    value for value in vocabulary if isinstance(value, str)
+                )
+        return vocabularies
+
+    def predict(self, requests: list) -> list[dict]:
+        """Prédit un lot de requêtes ; renvoie un résultat par requête, dans le même ordre."""
+        if not requests:
+            return []
+        if len(requests) == 1:
+            # Une seule ligne : liste Python pour CatBoost et arithmétique simple pour la régression logistique
+            request = requests[0]
+            with metrics.timed("feature_frame"):
+                features = self.catboost_preprocessor.row(request)
+            with metrics.timed("catboost_predict"):
+                cb_predictions = [self.catboost_regressor.predict(features)]
+            with metrics.timed("logreg_predict"):
+                decisions = [self._lr_decision(request)]
+            return self._results(cb_predictions, decisions)
+        with metrics.timed("feature_frame"):
+            features = self.catboost_preprocessor.transform(requests)
+            lr_features = self.lr_preprocessor.transform(requests)
+        return self._predict_matrices(features, lr_features)
+
+    def _predict_matrices(self, features: sparse.csr_matrix, lr_features: sparse.csr_matrix) -> list[dict]:
+        with metrics.timed("catboost_predict"):
+            cb_predictions = self.catboost_regressor.predict(features)
+        with metrics.timed("logreg_predict"):
+            decisions = lr_features @ self.lr_coef + self.lr_intercept
+        return self._results(cb_predictions, decisions)
+
+    def _results(self, cb_predictions, decisions) -> list[dict]:
+        return [
+            {
+                "catboost_prediction": float(cb_prediction),
+                "Logistic_Regression_evaluation": evaluate_price(self.lr_classes[int(decision > 0)]),
+            }
+            for cb_prediction, decision in zip(cb_predictions, decisions)
+        ]
+
+    def explain(self, requests: list) -> list[dict]:
+        """
+        Prédit un lot de requêtes et explique chaque prédiction, champ par champ.
+
+        Pour CatBoost, les valeurs SHAP natives (`ShapValues`) de toutes les colonnes du
+        préprocesseur sont rapportées aux champs de la requête (somme des colonnes one-hot
+        d'un champ) : valeur de base + somme des contributions = prix prédit. Pour la
+        régression logistique, la contribution d'un champ est la somme coefficient x valeur
+        de ses colonnes : intercept + somme = logit de la classe positive.
+
+        Les matrices du lot sont construites une seule fois et servent à la fois aux
+        prédictions (même calcul que `predict` sur un lot) et aux contributions.
+
+        Returns:
+            list[dict]: Résultat de `predict` complété d'une clé `explanation`, par requête.
+        """
+        if not requests:
+            return []
+        from catboost import Pool
+
+        with metrics.timed("feature_frame"):
+            features = self.catboost_preprocessor.transform(requests)
+            lr_features = self.lr_preprocessor.transform(requests)
+        results = self._predict_matrices(features, lr_features)
+        with metrics.timed("catboost_shap"):
+            shap_mode = "UsePreCalc" if len(requests) >= SHAP_PRECALC_MIN_ROWS else "NoPreCalc"
+            shap_values = self.catboost_regressor.get_feature_importance(
+                Pool(features), type="ShapValues", shap_mode=shap_mode
+            )
+        with metrics.timed("logreg_explain"):
+            cb_contributions = (shap_values[:, :-1] @ self.catboost_fields).tolist()
+            lr_contributions = (lr_features.multiply(self.lr_coef).tocsr() @ self.lr_fields).toarray().tolist()
+        for result, cb_base, cb_row, lr_row in zip(
+            results, shap_values[:, -1].tolist(), cb_contributions, lr_contributions
+        ):
+            result["explanation"] = {
+                "catboost": {"base_value": cb_base, "contributions": dict(zip(EXPLAINED_FIELDS, cb_row))},
+                "Logistic_Regression": {
+                    "base_value": self.lr_intercept,
+                    "contributions": dict(zip(EXPLAINED_FIELDS, lr_row)),
+                },
+            }
+        return results
+
+
+def validation_requests(vocabularies: dict[str, set[str]], size: int = 32) -> list[schemas.PredictRequest]:
+    """
+    Construit un lot de contrôle couvrant le vocabulaire de chaque colonne catégorielle.
+
+    Le lot se termine par une ligne dont toutes les catégories sont inconnues.
+    """
+    vocabularies = {field: sorted(values) for field, values in vocabularies.items() if values}
+    rows = min(size, max((len(values) for values in vocabularies.values()), default=1))
+    requests = [
+        schemas.PredictRequest(
+            kilometrage=1000.0 + 7919 * i,
+            annee=2005 + i % 20,
+            **{field: values[i % len(values)] for field, values in vocabularies.items()},
+        )
+        for i in range(rows)
+    ]
+    requests.append(requests[0].model_copy(update={field: "__inconnu__" for field in vocabularies}))
+    return requests
+
+
+def check_equivalence(compiled: CompiledModels, catboost_model, lr_model, requests: list, rtol: float = 1e-6) -> float:
+    """
+    Vérifie que le chemin compilé reproduit les pipelines, en lot et ligne par ligne.
+
+    Returns:
+        float: Plus grand écart absolu observé sur le prix prédit par CatBoost.
+
+    Raises:
+        ValueError: Si une classe diffère ou si un prix s'écarte au-delà de `rtol`.
+    """
+    expected = predict_frame(catboost_model, lr_model, build_feature_frame(requests))
+    actual = compiled.predict(requests) + [compiled.predict([request])[0] for request in requests]
+    max_error = 0.0
+    for got, want in zip(actual, expected + expected):
+        if got["Logistic_Regression_evaluation"] != want["Logistic_Regression_evaluation"] or not np.isclose(
+            got["catboost_prediction"], want["catboost_prediction"], rtol=rtol
+        ):
+            raise ValueError(f"Prédiction divergente : {got} != {want}")
+        max_error = max(max_error, abs(got["catboost_prediction"] - want["catboost_prediction"]))
+    return max_error
+
+
+def compile_models(catboost_model, lr_model, rtol: float = 1e-6):
+    """
+    Construit le chemin d'inférence compilé et vérifie qu'il reproduit les pipelines.
+
+    Returns:
+        CompiledModels | None: None si les pipelines ne sont pas supportés ou si les
+        prédictions divergent ; l'inférence retombe alors sur les pipelines sklearn.
+    """
+    try:
+        compiled = CompiledModels.from_pipelines(catboost_model, lr_model)
+        probes = validation_requests(category_vocabularies(catboost_model, lr_model))
+        check_equivalence(compiled, catboost_model, lr_model, probes, rtol=rtol)
+    except Exception as e:
+        logging.warning(f"Chemin d'inférence compilé indisponible, utilisation des pipelines : {e}")
+        return None
+    return compiled
+
+
+def validate_models(catboost_model, lr_model, compiled: CompiledModels | None = None):
+    """
+    Vérifie qu'une version de modèles produit des prédictions exploitables sur un lot de contrôle.
+
+    Sans pipelines (bundle d'inférence), seul le chemin compilé est vérifié.
+
+    Raises:
+        ValueError: Si le classifieur n'est pas binaire, si une prédiction échoue ou si un
+            prix prédit n'est pas un nombre fini positif.
+    """
+    classes = compiled.lr_classes if lr_model is None else getattr(lr_model, "classes_", [])
+    if set(classes) != {0, 1}:
+        raise ValueError("Le modèle de régression logistique doit prédire les classes 0 et 1")
+    vocabularies = compiled.vocabularies() if lr_model is None else category_vocabularies(catboost_model, lr_model)
+    requests = validation_requests(vocabularies)
+    results = predict_requests(catboost_model, lr_model, requests, compiled=compiled)
+    if len(results) != len(requests):
+        raise ValueError("Le nombre de prédictions ne correspond pas au lot de contrôle")
+    for request, result in zip(requests, results):
+        if isinstance(result, Exception):
+            raise ValueError(f"Échec de la prédiction de contrôle {request}: {result}")
+        if not np.isfinite(result["catboost_prediction"]) or result["catboost_prediction"] < 0:
+            raise ValueError(f"Prix prédit invalide pour {request}: {result['catboost_prediction']}")
@@ -0,0 +1,204 @@
+"""
+Chargement en masse de véhicules depuis un fichier JSON Lines ou CSV.
+
+Chaque ligne donne les colonnes de Vehicule ; les relations sont données par
+identifiant (`marque_id`...) ou par nom (`marque`, `modele`, `finition`, `carburant`,
+`transmission`), résolu via le cache de référence. Les lignes valides sont insérées par
+lots, chaque lot dans sa propre transaction ; une ligne en erreur est signalée sans
+interrompre le chargement.
+
+Usage :
+    python ingest.py annonces.jsonl --chunk-size 1000
+    python ingest.py annonces.csv --format csv
+"""
+import argparse
+import csv
+import json
+import logging
+import time
+from typing import IO, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import models, schemas
+from reference_cache import ReferenceCache
+
+INGEST_FORMATS = ("jsonl", "csv")
+
+# Relations résolues pour chaque ligne ; la marque en premier, pour résoudre modèles et finitions dans la marque
+REFERENCE_FIELDS = ("marque", "modele", "finition", "carburant", "transmission")
+
+# Colonnes insérées dans Vehicule
+VEHICULE_FIELDS = tuple(schemas.VehiculeBase.model_fields)
+
+
+def read_rows(stream: IO[str], format: str = "jsonl") -> Iterator[tuple[int, dict | Exception]]:
+    """
+    Lit le flux ligne par ligne, sans le charger en mémoire.
+
+    Returns:
+        Iterator[tuple[int, dict | Exception]]: (numéro de ligne, données), ou l'erreur de
+        lecture de la ligne.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Les cellules vides sont des valeurs absentes ; les cellules sans en-tête sont ignorées
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"JSON invalide : {e}")
+            continue
+        if not isinstance(data, dict):
+            yield line_number, ValueError("Objet JSON attendu")
+            continue
+        yield line_number, data
+
+
+def format_validation_error(error: ValidationError, root: str = "ligne") -> str:
+    """Résume une ValidationError en une ligne ; `root` désigne l'erreur portant sur l'objet entier."""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in detail['loc']) or root}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def resolve_row(data: dict, references: ReferenceCache) -> dict:
+    """
+    Valide une ligne et remplace les noms des relations par leurs identifiants.
+
+    Raises:
+        ValueError: Ligne invalide, relation manquante ou inconnue.
+    """
+    try:
+        row = schemas.VehiculeIngest.model_validate(data)
+    except ValidationError as e:
+        raise ValueError(format_validation_error(e))
+    values = {field: getattr(row, field) for field in VEHICULE_FIELDS}
+    for table in REFERENCE_FIELDS:
+        id_field = f"{table}_id"
+        name = getattr(row, table)
+        if values[id_field] is not None:
+            if references.get(table, values[id_field]) is None:
+                raise ValueError(f"{id_field} inconnu : {values[id_field]}")
+        elif name is not None:
+            values[id_field] = references.id_for(table, name, marque_id=values["marque_id"])
+            if values[id_field] is None:
+                raise ValueError(f"{table} inconnu : '{name}'")
+        else:
+            raise ValueError(f"{table} manquant")
+    return values
+
+
+def insert_chunk(db: Session, chunk: list[tuple[int, dict]], report: schemas.VehiculeBulkReport, max_errors: int):
+    """Insère un lot en un seul executemany ; en cas d'échec, réessaie ligne par ligne pour isoler les fautives."""
+    report.chunks += 1
+    try:
+        db.execute(insert(models.Vehicule), [values for _, values in chunk])
+        db.commit()
+        report.inserted += len(chunk)
+        return
+    except SQLAlchemyError:
+        db.rollback()
+    for line, values in chunk:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.Vehicule), [values])
+            report.inserted += 1
+        except SQLAlchemyError as e:
+            record_error(report, line, str(getattr(e, "orig", None) or e), max_errors)
+    db.commit()
+
+
+def record_error(report: schemas.VehiculeBulkReport, line: int, error: str, max_errors: int):
+    report.failed += 1
+    if len(report.errors) < max_errors:
+        report.errors.append(schemas.VehiculeBulkError(line=line, error=error))
+    else:
+        report.errors_truncated = True
+
+
+def ingest(
+    db: Session,
+    stream: IO[str],
+    references: ReferenceCache,
+    format: str = "jsonl",
+    chunk_size: int = 1000,
+    max_errors: int = 1000,
+) -> schemas.VehiculeBulkReport:
+    """
+    Charge les véhicules du flux par lots de `chunk_size` lignes.
+
+    Args:
+        db (Session): Session synchrone ; une transaction par lot.
+        stream (IO[str]): Flux texte JSON Lines ou CSV (avec en-tête).
+        references (ReferenceCache): Cache de référence chargé, pour la résolution des noms.
+        format (str): "jsonl" ou "csv".
+        chunk_size (int): Nombre de lignes par insertion.
+        max_errors (int): Nombre maximal d'erreurs détaillées dans le rapport.
+
+    Returns:
+        schemas.VehiculeBulkReport: Lignes lues, insérées, en erreur, et débit.
+    """
+    if format not in INGEST_FORMATS:
+        raise ValueError(f"Format inconnu : {format}")
+    report = schemas.VehiculeBulkReport()
+    started = time.perf_counter()
+    chunk: list[tuple[int, dict]] = []
+    for line, data in read_rows(stream, format):
+        report.rows += 1
+        try:
+            if isinstance(data, Exception):
+                raise data
+            chunk.append((line, resolve_row(data, references)))
+        except ValueError as e:
+            record_error(report, line, str(e), max_errors)
+            continue
+        if len(chunk) >= chunk_size:
+            insert_chunk(db, chunk, report, max_errors)
+            chunk = []
+    if chunk:
+        insert_chunk(db, chunk, report, max_errors)
+    report.seconds = time.perf_counter() - started
+    report.rows_per_second = report.rows / report.seconds if report.seconds else 0.0
+    logging.info(
+        f"Chargement en masse : {report.inserted}/{report.rows} véhicules insérés en "
+        f"{report.seconds:.2f} s ({report.rows_per_second:.0f} lignes/s, {report.failed} en erreur)"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Fichier JSON Lines ou CSV")
+    parser.add_argument("--format", choices=INGEST_FORMATS, help="Format du fichier (déduit de l'extension par défaut)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Lignes par insertion")
+    parser.add_argument("--max-errors", type=int, default=1000, help="Erreurs détaillées au maximum")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    db = SessionLocal()
+    try:
+        references = ReferenceCache()
+        references.load(db)
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = ingest(db, stream, references, format, args.chunk_size, args.max_errors)
+    finally:
+        db.close()
+    for error in report.errors:
+        print(f"ligne {error.line}: {error.error}")
+    print(
+        f"{report.inserted} insérés, {report.failed} en erreur sur {report.rows} lignes "
+        f"({report.rows_per_second:.0f} lignes/s)"
+    )
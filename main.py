@@ -1,31 +1,80 @@
+import io
 import os
+import tempfile
+import time
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Depends, status
-from passlib.context import CryptContext
+from fastapi import FastAPI, HTTPException, Depends, status, Body, BackgroundTasks, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from typing import Annotated, Any, Literal
+from cachetools import TTLCache
 from sqlalchemy.orm import Session
-import joblib
-from catboost import CatBoostClassifier
+from sqlalchemy.ext.asyncio import AsyncSession
+import orjson
 import pandas as pd
 import logging
-from utils import get_password_hash, verify_password  # Importer les fonctions de hachage
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
 # Import des modules locaux
-import models, schemas, crud
-from database import SessionLocal, engine
+import models, schemas, crud, crud_async, export, inference, ingest, metrics, model_export
+from batching import PredictionBatcher
+from prediction_cache import PredictionCache
+from prediction_log import PredictionLogWriter
+from drift import DriftMonitor, DriftReference, load_profile
+from normalization import CategoryNormalizer, Normalization, NormalizationIndex
+from model_registry import ModelRegistry, ModelStore
+from reference_cache import ReferenceCache
+from database import SessionLocal, AsyncSessionLocal, engine, get_async_db
+from pagination import decode_cursor, next_cursor_headers, set_next_cursor
+from passwords import PasswordHasherBusy
+from tokens import TokenClaims
+from utils import ACCESS_TOKEN_EXPIRE_MINUTES, password_hasher, token_cache
 
 # Configuration des variables globales
 SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", 10000))
+PREDICT_EXPLAIN_MAX_ITEMS = int(os.getenv("PREDICT_EXPLAIN_MAX_ITEMS", 1000))
+PREDICT_COALESCE_MAX_SIZE = int(os.getenv("PREDICT_COALESCE_MAX_SIZE", 64))
+PREDICT_COALESCE_MAX_WAIT_MS = float(os.getenv("PREDICT_COALESCE_MAX_WAIT_MS", 5))
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", 10000))
+PREDICT_CACHE_TTL_SECONDS = float(os.getenv("PREDICT_CACHE_TTL_SECONDS", 3600))
+PREDICT_CACHE_KM_BUCKET = float(os.getenv("PREDICT_CACHE_KM_BUCKET", 0))
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "false").lower() in ("1", "true", "yes")
+MODEL_VERSION = os.getenv("MODEL_VERSION", "default")
+MODEL_VERSIONS_DIR = os.getenv("MODEL_VERSIONS_DIR", "./models/versions")
+VEHICULES_MAX_LIMIT = int(os.getenv("VEHICULES_MAX_LIMIT", 50000))
+VEHICULES_STREAM_CHUNK_SIZE = int(os.getenv("VEHICULES_STREAM_CHUNK_SIZE", 500))
+USERS_MAX_LIMIT = int(os.getenv("USERS_MAX_LIMIT", 1000))
+SEARCH_COUNT_CACHE_SIZE = int(os.getenv("SEARCH_COUNT_CACHE_SIZE", 1024))
+SEARCH_COUNT_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_COUNT_CACHE_TTL_SECONDS", 60))
+VEHICULES_EXPORT_CHUNK_SIZE = int(os.getenv("VEHICULES_EXPORT_CHUNK_SIZE", 5000))
+VEHICULES_BULK_CHUNK_SIZE = int(os.getenv("VEHICULES_BULK_CHUNK_SIZE", 1000))
+VEHICULES_BULK_SPOOL_BYTES = int(os.getenv("VEHICULES_BULK_SPOOL_BYTES", 16 * 1024 * 1024))
+REFERENCE_CACHE_ENABLED = os.getenv("REFERENCE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REFERENCE_CACHE_REFRESH_SECONDS = float(os.getenv("REFERENCE_CACHE_REFRESH_SECONDS", 300))
+PREDICT_VALIDATE_REFERENCES = os.getenv("PREDICT_VALIDATE_REFERENCES", "true").lower() in ("1", "true", "yes")
+PREDICT_NORMALIZE_CATEGORIES = os.getenv("PREDICT_NORMALIZE_CATEGORIES", "true").lower() in ("1", "true", "yes")
+PREDICT_NORMALIZE_FUZZY = os.getenv("PREDICT_NORMALIZE_FUZZY", "true").lower() in ("1", "true", "yes")
+PREDICTION_LOG_ENABLED = os.getenv("PREDICTION_LOG_ENABLED", "true").lower() in ("1", "true", "yes")
+PREDICTION_LOG_QUEUE_SIZE = int(os.getenv("PREDICTION_LOG_QUEUE_SIZE", 10000))
+PREDICTION_LOG_FLUSH_MS = float(os.getenv("PREDICTION_LOG_FLUSH_MS", 500))
+PREDICTION_LOG_FLUSH_ROWS = int(os.getenv("PREDICTION_LOG_FLUSH_ROWS", 500))
+DRIFT_MONITOR_ENABLED = os.getenv("DRIFT_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+DRIFT_RESERVOIR_SIZE = int(os.getenv("DRIFT_RESERVOIR_SIZE", 1024))
+DRIFT_SKETCH_WIDTH = int(os.getenv("DRIFT_SKETCH_WIDTH", 2048))
+DRIFT_WINDOW_SECONDS = float(os.getenv("DRIFT_WINDOW_SECONDS", 3600))
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", 200))
+DRIFT_PSI_THRESHOLD = float(os.getenv("DRIFT_PSI_THRESHOLD", 0.2))
+DRIFT_UNSEEN_RATE_THRESHOLD = float(os.getenv("DRIFT_UNSEEN_RATE_THRESHOLD", 0.05))
 
 # Configurer le logging
 logging.basicConfig(
@@ -33,7 +82,8 @@ logging.basicConfig(
 )
 
 # Initialiser l'application FastAPI
-app = FastAPI()
+# orjson pour toutes les réponses JSON, plutôt que le module json de la bibliothèque standard
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configurer CORS
 app.add_middleware(
@@ -44,26 +94,223 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latence par route et requêtes en cours, exposées par /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Monter le dossier static pour servir le fichier favicon.ico
 app.mount("/static/", StaticFiles(directory="static"), name="static")
 
-# Dépendance pour obtenir une session DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_models(registry: ModelRegistry | None = None):
+    """Renvoie les modèles CatBoost et de régression logistique, chargés au premier appel."""
+    registry = registry or model_store.active
+    return registry.get("catboost"), registry.get("logistic_regression")
+
+
+def load_compiled_models(registry: ModelRegistry):
+    """Bundle d'inférence exporté s'il est présent et à jour, sinon chemin compilé depuis les pipelines."""
+    if model_export.has_bundle(registry.models_dir):
+        try:
+            return registry.get("bundle")
+        except Exception as e:
+            logging.warning(f"Bundle d'inférence inutilisable dans {registry.models_dir}, utilisation des pipelines : {e}")
+    return inference.compile_models(*get_models(registry))
+
+
+def get_compiled_models(registry: ModelRegistry | None = None):
+    """Chemin d'inférence compilé (sans pandas), vérifié contre les pipelines à sa construction."""
+    registry = registry or model_store.active
+    return registry.derive("compiled", lambda: load_compiled_models(registry))
+
+
+def get_serving_models(registry: ModelRegistry | None = None):
+    """
+    Renvoie (CatBoost, régression logistique, chemin compilé) pour une version ; les
+    pipelines valent None lorsque la version est servie par son bundle d'inférence.
+    """
+    registry = registry or model_store.active
+    compiled = get_compiled_models(registry)
+    if registry.is_loaded("bundle"):
+        return None, None, compiled
+    return (*get_models(registry), compiled)
+
+
+def get_vocabularies() -> dict[str, set[str]]:
+    catboost_model, Logistic_Regression_model, compiled = get_serving_models()
+    if catboost_model is None:
+        return compiled.vocabularies()
+    return inference.category_vocabularies(catboost_model, Logistic_Regression_model)
+
+
+def predict_with_models(requests: list[schemas.PredictRequest]) -> list[dict]:
+    # La version active est lue une seule fois : le lot se termine sur cette version même si elle change entre-temps
+    catboost_model, Logistic_Regression_model, compiled = get_serving_models(model_store.active)
+    return inference.predict_requests(catboost_model, Logistic_Regression_model, requests, compiled=compiled)
+
+
+def explain_with_models(requests: list[schemas.PredictRequest]) -> list[dict]:
+    catboost_model, Logistic_Regression_model, compiled = get_serving_models(model_store.active)
+    return inference.explain_requests(catboost_model, Logistic_Regression_model, requests, compiled=compiled)
+
+
+def validate_model_version(registry: ModelRegistry):
+    catboost_model, Logistic_Regression_model, compiled = get_serving_models(registry)
+    inference.validate_models(catboost_model, Logistic_Regression_model, compiled=compiled)
+
+
+def load_drift_reference() -> DriftReference:
+    """Profil d'entraînement de la version active, complété par les encodeurs et le scaler servis."""
+    registry = model_store.active
+    compiled = get_compiled_models(registry)
+    moments = {field: (mean, scale) for field, _, mean, scale in compiled.catboost_preprocessor.numeric}
+    return DriftReference(get_vocabularies(), load_profile(registry.models_dir), moments)
+
+
+def serving_model_files(registry: ModelRegistry) -> list[str]:
+    """Modèles préchargés avant la validation d'une version : ceux qui la serviront, jamais gradient_boosting."""
+    if model_export.has_bundle(registry.models_dir):
+        return ["bundle"]
+    return ["catboost", "logistic_regression"]
+
+
+def on_model_swap(registry: ModelRegistry):
+    prediction_cache.clear()
+    drift_monitor.reset()
+
+
+# Versions de modèles : chargement paresseux au premier usage (bundle d'inférence si exporté,
+# pickles sinon), tableaux projetés en mémoire, activation à chaud après validation
+model_store = ModelStore(
+    "./models/pkl",
+    MODEL_VERSIONS_DIR,
+    validate=validate_model_version,
+    on_swap=on_model_swap,
+    active_version=MODEL_VERSION,
+    preload=serving_model_files,
+)
+
+
+@app.on_event("startup")
+def warm_up_models():
+    # Préchargement optionnel pour éviter que la première requête paie le chargement
+    if MODEL_WARMUP:
+        get_serving_models()
+
+# Cache des prédictions, invalidé automatiquement lorsque les fichiers de models/pkl changent
+prediction_cache = PredictionCache(
+    get_vocabularies,
+    max_size=PREDICT_CACHE_SIZE,
+    ttl_seconds=PREDICT_CACHE_TTL_SECONDS,
+    km_bucket=PREDICT_CACHE_KM_BUCKET,
+)
+
+# Regrouper les appels concurrents à /predict en un seul appel vectorisé par modèle
+prediction_batcher = PredictionBatcher(
+    predict_with_models,
+    max_batch_size=PREDICT_COALESCE_MAX_SIZE,
+    max_wait_ms=PREDICT_COALESCE_MAX_WAIT_MS,
+)
+
+
+# Même regroupement pour les prédictions expliquées (valeurs SHAP calculées sur tout le lot)
+explanation_batcher = PredictionBatcher(
+    explain_with_models,
+    max_batch_size=PREDICT_COALESCE_MAX_SIZE,
+    max_wait_ms=PREDICT_COALESCE_MAX_WAIT_MS,
+)
+
+
+@app.on_event("shutdown")
+async def stop_prediction_batcher():
+    await prediction_batcher.stop()
+    await explanation_batcher.stop()
+
+# Statistiques de dérive des entrées de /predict, comparées au profil d'entraînement
+drift_monitor = DriftMonitor(
+    load_drift_reference,
+    reservoir_size=DRIFT_RESERVOIR_SIZE,
+    sketch_width=DRIFT_SKETCH_WIDTH,
+    window_seconds=DRIFT_WINDOW_SECONDS,
+    min_samples=DRIFT_MIN_SAMPLES,
+    psi_threshold=DRIFT_PSI_THRESHOLD,
+    unseen_rate_threshold=DRIFT_UNSEEN_RATE_THRESHOLD,
+)
+
+# Journal des appels à /predict (table Prediction_Log), écrit par lots en tâche de fond
+prediction_log = PredictionLogWriter(
+    AsyncSessionLocal,
+    max_queue=PREDICTION_LOG_QUEUE_SIZE,
+    flush_interval_ms=PREDICTION_LOG_FLUSH_MS,
+    flush_rows=PREDICTION_LOG_FLUSH_ROWS,
+)
+
+
+@app.on_event("shutdown")
+async def stop_prediction_log():
+    # Après les batchers : les dernières prédictions sont journalisées avant la fermeture
+    await prediction_log.stop()
+
+
+def cached_prediction(key: tuple, explain: bool) -> dict | None:
+    """
+    Résultat en cache pour une requête. Une prédiction et son explication partagent la
+    même entrée : une entrée expliquée sert aussi les requêtes sans explication (sans
+    la clé `explanation`), l'inverse est un défaut de cache.
+    """
+    cached = prediction_cache.get(key)
+    if cached is None or "explanation" not in cached:
+        return None if explain else cached
+    if explain:
+        return cached
+    return {field: value for field, value in cached.items() if field != "explanation"}
+
+# Tables de référence (carburants, transmissions, marques, modèles, finitions) gardées en mémoire
+reference_cache = ReferenceCache()
+
+
+@app.on_event("startup")
+async def load_reference_cache():
+    # En cas d'échec, les véhicules sont servis avec leurs relations chargées depuis la base
+    if REFERENCE_CACHE_ENABLED:
+        await reference_cache.refresh_from(AsyncSessionLocal)
+        reference_cache.start(AsyncSessionLocal, REFERENCE_CACHE_REFRESH_SECONDS)
+
 
-# Charger les modèles nécessaires
-try:
-    catboost_model = joblib.load("./models/pkl/catboost_model.pkl")
-except FileNotFoundError:
-    print("Le fichier catboost_model.pkl est introuvable.")
-except Exception as e:
-    print(f"Erreur lors du chargement du modèle CatBoost : {e}")
+@app.on_event("shutdown")
+async def stop_reference_cache():
+    await reference_cache.stop()
 
-Logistic_Regression_model = joblib.load("./models/pkl/Logistic_Regression_model.pkl")
+
+def load_vehicule_relations() -> bool:
+    """Les relations sont chargées depuis la base seulement si le cache de référence n'est pas disponible."""
+    return not (REFERENCE_CACHE_ENABLED and reference_cache.is_loaded)
+
+
+async def serialize_vehicules(vehicules: list, with_relations: bool) -> list:
+    """Complète les relations des véhicules chargés sans elles depuis le cache de référence."""
+    if with_relations:
+        return vehicules
+    await reference_cache.ensure_covered(vehicules, AsyncSessionLocal)
+    return [reference_cache.vehicule(vehicule) for vehicule in vehicules]
+
+# Pool de processus bcrypt : démarré avec l'application pour que la première connexion ne paie pas son lancement
+@app.on_event("startup")
+def start_password_hasher():
+    password_hasher.start()
+
+
+@app.on_event("shutdown")
+async def stop_password_hasher():
+    await run_in_threadpool(password_hasher.shutdown)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    # File bcrypt pleine : refuser tout de suite plutôt que de laisser les connexions s'accumuler
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service d'authentification saturé, réessayez plus tard"},
+        headers={"Retry-After": "1"},
+    )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -72,40 +319,59 @@ def read_root():
     return {"message": "Bienvenue sur l'API de prédiction de prix de voitures"}
 
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+def create_access_token(user: models.User, expires_delta: timedelta | None = None) -> str:
+    """
+    Jeton signé portant l'identité et les droits de l'utilisateur (voir tokens.TokenClaims),
+    pour que les requêtes authentifiées n'aient pas à relire la table Users.
+    """
+    issued_at = time.time()
+    expires_at = issued_at + (expires_delta or timedelta(minutes=15)).total_seconds()
+    claims = TokenClaims.from_user(user, issued_at=issued_at, expires_at=expires_at)
+    encoded_jwt = jwt.encode(claims.to_payload(), SECRET_KEY, algorithm=ALGORITHM)
+    # Le jeton vient d'être signé : inutile de le vérifier à sa première utilisation
+    token_cache.set(encoded_jwt, claims)
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """
+    Utilisateur du jeton, sans accès à la base dans le cas courant.
+
+    Un jeton déjà vérifié est servi par `token_cache` ; sinon sa signature est vérifiée et
+    ses claims gardés. Seuls les jetons émis avant l'ajout de l'identifiant dans les
+    claims demandent encore une lecture de Users (par nom, indexé). Dans tous les cas,
+    les jetons révoqués par une modification de l'utilisateur sont refusés.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    claims = token_cache.get(token)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_nom(db, username=username)
-    if user is None:
+        if payload.get("sub") is None or payload.get("exp") is None:
+            raise credentials_exception
+        claims = TokenClaims.from_payload(payload)
+        if claims is None:
+            async with AsyncSessionLocal() as db:
+                user = await crud_async.get_user_by_nom(db, username=payload["sub"])
+            if user is None:
+                raise credentials_exception
+            claims = TokenClaims.from_user(user, issued_at=payload.get("iat"), expires_at=float(payload["exp"]))
+        token_cache.set(token, claims)
+    if token_cache.is_revoked(claims):
         raise credentials_exception
-    return user
+    return claims
 
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.authenticate_user_by_nom(db, form_data.username, form_data.password)
+    user = await crud_async.authenticate_user_by_nom(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -113,116 +379,560 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.nom}, expires_delta=access_token_expires
-    )
+    access_token = create_access_token(user, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+# Représentations de GET /vehicules/ : complète (schemas.Vehicule, relations imbriquées)
+# ou plate (identifiants et noms des relations, colonnes de l'export)
+VehiculeView = Literal["full", "flat"]
+
+
+def use_vehicule_rows(view: VehiculeView, with_relations: bool) -> bool:
+    """
+    Chemin rapide : lignes SQL sérialisées directement par orjson, sans objets ORM ni
+    validation Pydantic. Toujours pour la vue plate ; pour la vue complète, lorsque le
+    cache de référence fournit les relations.
+    """
+    return view == "flat" or not with_relations
+
+
+async def encode_vehicule_rows(rows: list, view: VehiculeView) -> bytes:
+    """Encode en tableau JSON des lignes lues par `crud_async.get_vehicule_rows`."""
+    if view == "flat":
+        return orjson.dumps([dict(zip(export.COLUMN_NAMES, row)) for row in rows])
+    await reference_cache.ensure_covered(rows, AsyncSessionLocal)
+    return orjson.dumps(reference_cache.vehicule_dicts(rows))
+
+
+async def stream_vehicules(after_id: int | None, until_id: int | None, view: VehiculeView):
+    # La session est ouverte dans le générateur : elle doit vivre aussi longtemps que la réponse
+    yield b"["
+    first = True
+    with_relations = load_vehicule_relations()
+    use_rows = use_vehicule_rows(view, with_relations)
+    async with AsyncSessionLocal() as db:
+        while True:
+            if use_rows:
+                rows = await crud_async.get_vehicule_rows(
+                    db, flat=view == "flat", limit=VEHICULES_STREAM_CHUNK_SIZE, after_id=after_id, until_id=until_id
+                )
+                if not rows:
+                    break
+                # Retirer les crochets : les blocs sont concaténés dans un seul tableau
+                chunk = (await encode_vehicule_rows(rows, view))[1:-1]
+                after_id = rows[-1][0]
+            else:
+                vehicules = await crud_async.get_vehicules(
+                    db,
+                    limit=VEHICULES_STREAM_CHUNK_SIZE,
+                    after_id=after_id,
+                    until_id=until_id,
+                    with_relations=with_relations,
+                )
+                if not vehicules:
+                    break
+                chunk = b",".join(
+                    schemas.Vehicule.model_validate(vehicule, from_attributes=True).model_dump_json().encode()
+                    for vehicule in await serialize_vehicules(vehicules, with_relations)
+                )
+                after_id = vehicules[-1].id
+                # Libérer les objets déjà envoyés pour garder une mémoire bornée
+                db.expunge_all()
+            yield chunk if first else b"," + chunk
+            first = False
+    yield b"]"
+
+
 @app.get("/vehicules/", response_model=list[schemas.Vehicule])
-def read_vehicules(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.get_vehicules(db, skip=skip, limit=limit)
+async def read_vehicules(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=VEHICULES_MAX_LIMIT),
+    cursor: str | None = None,
+    view: VehiculeView = "full",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Liste les véhicules par ordre d'identifiant.
+
+    Le curseur de la page suivante est renvoyé dans l'en-tête `X-Next-Cursor`. Avec un
+    curseur, la page est lue par clé (`ID_Vehicule > dernier identifiant`) : sa latence
+    ne dépend pas de la profondeur. `skip` reste accepté pour compatibilité. Au-delà de
+    VEHICULES_STREAM_CHUNK_SIZE éléments, la liste est envoyée par blocs en streaming.
+
+    `view=flat` renvoie une représentation plate, sans objets imbriqués : les colonnes
+    du véhicule suivies des noms de marque, modèle, finition, carburant et transmission
+    (mêmes champs que /vehicules/export).
+    """
+    after_id = decode_cursor(cursor) if cursor else None
+
+    if limit > VEHICULES_STREAM_CHUNK_SIZE:
+        if after_id is None and skip:
+            # Convertir l'ancien décalage en borne de clé, une seule fois
+            after_id, _ = await crud_async.get_vehicule_page_end(db, None, skip)
+            if after_id is None:
+                return []
+        until_id, has_more = await crud_async.get_vehicule_page_end(db, after_id, limit)
+        return StreamingResponse(
+            stream_vehicules(after_id, until_id, view),
+            media_type="application/json",
+            headers=next_cursor_headers(request, until_id if has_more else None),
+        )
+
+    with_relations = load_vehicule_relations()
+    if use_vehicule_rows(view, with_relations):
+        rows = await crud_async.get_vehicule_rows(
+            db, flat=view == "flat", skip=skip, limit=limit + 1, after_id=after_id
+        )
+        next_id = rows[limit - 1][0] if len(rows) > limit else None
+        # Réponse déjà encodée : ni response_model ni en-têtes de `response` ne s'appliquent
+        return Response(
+            await encode_vehicule_rows(rows[:limit], view),
+            media_type="application/json",
+            headers=next_cursor_headers(request, next_id),
+        )
+
+    vehicules = await crud_async.get_vehicules(
+        db, skip=skip, limit=limit + 1, after_id=after_id, with_relations=with_relations
+    )
+    if len(vehicules) > limit:
+        vehicules = vehicules[:limit]
+        set_next_cursor(request, response, vehicules[-1].id)
+    return await serialize_vehicules(vehicules, with_relations)
+
+
+# Nombre total de résultats par combinaison de filtres, mis en cache pour éviter un COUNT(*) par page
+search_count_cache = TTLCache(maxsize=SEARCH_COUNT_CACHE_SIZE, ttl=SEARCH_COUNT_CACHE_TTL_SECONDS)
+
+
+@app.get("/vehicules/search", response_model=schemas.VehiculeSearchResponse)
+async def search_vehicules(
+    filters: Annotated[schemas.VehiculeSearch, Query()], db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recherche des véhicules par marque, modèle, finition, carburant, transmission (identifiant
+    ou nom), état, plages d'années, de kilométrage et de prix, avec tri. Le total est mis en
+    cache quelques secondes par jeu de filtres (`total_cached` l'indique) : il peut donc
+    légèrement retarder sur les écritures. Les noms sont comparés sans tenir compte de la
+    casse, et résolus en identifiants par le cache de référence lorsqu'il est chargé.
+    """
+    with_relations = load_vehicule_relations()
+    references = reference_cache if REFERENCE_CACHE_ENABLED else None
+    items = await crud_async.search_vehicules(db, filters, with_relations=with_relations, references=references)
+
+    count_key = tuple(sorted(filters.model_dump(exclude={"sort", "order", "skip", "limit"}).items()))
+    total = search_count_cache.get(count_key)
+    total_cached = total is not None
+    if total is None:
+        if filters.skip == 0 and len(items) < filters.limit:
+            # La première page est incomplète : le total est connu sans COUNT(*)
+            total = len(items)
+        else:
+            total = await crud_async.count_vehicules(db, filters, references=references)
+        search_count_cache[count_key] = total
+
+    return {"total": total, "total_cached": total_cached, "items": await serialize_vehicules(items, with_relations)}
+
+
+@app.get("/vehicules/export")
+def export_vehicules(format: Literal["ndjson", "csv", "parquet"] = "ndjson"):
+    """
+    Exporte toute la table Vehicule (avec les noms des relations) en NDJSON, CSV ou
+    Parquet. Les lignes sont lues par un curseur côté serveur et envoyées par blocs de
+    VEHICULES_EXPORT_CHUNK_SIZE : la mémoire reste constante quelle que soit la taille
+    de la table.
+    """
+    try:
+        encoder = export.make_encoder(format)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Export Parquet indisponible (pyarrow ne peut pas être importé)")
+    media_type, filename = export.EXPORT_FORMATS[format]
+    return StreamingResponse(
+        export.stream_export(AsyncSessionLocal, encoder, VEHICULES_EXPORT_CHUNK_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get("/vehicules/{vehicule_id}", response_model=schemas.Vehicule)
-def read_vehicule(vehicule_id: int, db: Session = Depends(get_db)):
-    vehicule = crud.get_vehicule(db, vehicule_id=vehicule_id)
+async def read_vehicule(vehicule_id: int, db: AsyncSession = Depends(get_async_db)):
+    with_relations = load_vehicule_relations()
+    vehicule = await crud_async.get_vehicule(db, vehicule_id=vehicule_id, with_relations=with_relations)
     if vehicule is None:
         raise HTTPException(status_code=404, detail="Véhicule non trouvé")
-    return vehicule
+    return (await serialize_vehicules([vehicule], with_relations))[0]
 
 @app.post("/vehicules/", response_model=schemas.Vehicule, status_code=201)
-def create_vehicule(vehicule: schemas.VehiculeCreate, db: Session = Depends(get_db)):
-    return crud.create_vehicule(db=db, vehicule=vehicule)
+async def create_vehicule(vehicule: schemas.VehiculeCreate, db: AsyncSession = Depends(get_async_db)):
+    with_relations = load_vehicule_relations()
+    db_vehicule = await crud_async.create_vehicule(db=db, vehicule=vehicule, with_relations=with_relations)
+    return (await serialize_vehicules([db_vehicule], with_relations))[0]
+
+
+def _ingest_upload(upload, format: str, chunk_size: int) -> schemas.VehiculeBulkReport:
+    db = SessionLocal()
+    try:
+        stream = io.TextIOWrapper(upload, encoding="utf-8-sig", errors="replace", newline="")
+        return ingest.ingest(db, stream, reference_cache, format=format, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
+@app.post("/vehicules/bulk", response_model=schemas.VehiculeBulkReport)
+async def bulk_create_vehicules(
+    request: Request,
+    format: Literal["jsonl", "csv"] | None = None,
+    chunk_size: int = Query(VEHICULES_BULK_CHUNK_SIZE, ge=1, le=10000),
+):
+    """
+    Charge des véhicules en masse depuis un corps JSON Lines ou CSV (format déduit du
+    Content-Type si absent). Les relations peuvent être données par nom ; les lignes sont
+    insérées par lots de `chunk_size`, une transaction par lot, et les lignes en erreur
+    sont détaillées dans le rapport sans interrompre le chargement.
+    """
+    format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    if not reference_cache.is_loaded and not await reference_cache.refresh_from(AsyncSessionLocal):
+        raise HTTPException(status_code=503, detail="Tables de référence indisponibles")
+
+    # Le corps est recopié au fil de l'eau (en mémoire puis sur disque) avant d'être analysé ligne par ligne
+    with tempfile.SpooledTemporaryFile(max_size=VEHICULES_BULK_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        return await run_in_threadpool(_ingest_upload, upload, format, chunk_size)
 
 @app.put("/vehicules/{vehicule_id}", response_model=schemas.Vehicule)
-def update_vehicule(vehicule_id: int, vehicule_update: schemas.VehiculeUpdate, db: Session = Depends(get_db)):
-    db_vehicule = crud.update_vehicule(db=db, vehicule_id=vehicule_id, vehicule_update=vehicule_update)
+async def update_vehicule(vehicule_id: int, vehicule_update: schemas.VehiculeUpdate, db: AsyncSession = Depends(get_async_db)):
+    with_relations = load_vehicule_relations()
+    db_vehicule = await crud_async.update_vehicule(
+        db=db, vehicule_id=vehicule_id, vehicule_update=vehicule_update, with_relations=with_relations
+    )
     if db_vehicule is None:
         raise HTTPException(status_code=404, detail="Véhicule non trouvé")
-    return db_vehicule
+    return (await serialize_vehicules([db_vehicule], with_relations))[0]
 
 @app.delete("/vehicules/{vehicule_id}", response_model=dict)
-def delete_vehicule(vehicule_id: int, db: Session = Depends(get_db)):
-    return crud.delete_vehicule(db=db, vehicule_id=vehicule_id)
+async def delete_vehicule(vehicule_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.delete_vehicule(db=db, vehicule_id=vehicule_id)
 
 
 @app.get("/users/", response_model=list[schemas.User])
-def read_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    users = crud.get_users(db, skip=skip, limit=limit)
+async def read_users(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=USERS_MAX_LIMIT),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    after_id = decode_cursor(cursor) if cursor else None
+    users = await crud_async.get_users(db, skip=skip, limit=limit + 1, after_id=after_id)
+    if len(users) > limit:
+        users = users[:limit]
+        set_next_cursor(request, response, users[-1].id)
     return users
 
+# Déclarée avant /users/{user_id}, qui capturerait sinon "me" comme identifiant
+@app.get("/users/me", response_model=schemas.User)
+async def read_users_me(current_user: TokenClaims = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Le jeton ne porte que l'identité et les droits : le profil complet est lu par clé primaire
+    return await crud_async.get_user(db, user_id=current_user.id)
+
+
 @app.get("/users/{user_id}", response_model=schemas.User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    user = crud.get_user(db, user_id=user_id)
+async def read_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user(db, user_id=user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     return user
 
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db=db, user=user)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_user(db=db, user=user)
 
 @app.put("/users/{user_id}", response_model=schemas.User)
-def update_user(user_id: int, user: schemas.UserUpdate, db: Session = Depends(get_db)):
-    return crud.update_user(db=db, user_id=user_id, user_update=user)
+async def update_user(user_id: int, user: schemas.UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.update_user(db=db, user_id=user_id, user_update=user)
 
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    return crud.delete_user(db=db, user_id=user_id)
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.delete_user(db=db, user_id=user_id)
 
 
-@app.get("/users/me", response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(get_current_user)):
+def get_current_superuser(current_user: TokenClaims = Depends(get_current_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Droits administrateur requis")
     return current_user
 
-@app.post("/predict")
-def predict(request: schemas.PredictRequest):
 
+@app.get("/admin/models")
+def list_model_versions(current_user: TokenClaims = Depends(get_current_superuser)):
+    return model_store.stats()
+
+
+def _activate_model_version(version: str):
     try:
-        # Convertir les données de la requête en DataFrame
-        input_data = pd.DataFrame([request.model_dump()])
-        logging.info(f"Input data: {input_data}")
-
-        # Renommer les colonnes pour correspondre à celles utilisées lors de l'entraînement
-        input_data = input_data.rename(
-            columns={
-                "kilometrage": "Kilometrage",
-                "annee": "Annee",
-                "marque": "Marque",
-                "finition": "Finition",
-                "carburant": "Carburant",
-                "transmission": "Transmission",
-                "modele": "Modele",
-                "etat": "Etat",
-            }
-        )
-        logging.info(f"Input data with correct column names: {input_data}")
+        model_store.activate(version)
+    except Exception as e:
+        logging.error(f"Échec de l'activation de la version de modèles {version}: {e}")
+
+
+@app.post("/admin/models/{version}/activate", status_code=202)
+def activate_model_version(
+    version: str,
+    background_tasks: BackgroundTasks,
+    current_user: TokenClaims = Depends(get_current_superuser),
+):
+    """Charge et valide la version en tâche de fond, puis la rend active ; suivre l'état via GET /admin/models."""
+    if version not in model_store.versions():
+        raise HTTPException(status_code=404, detail="Version de modèles introuvable")
+    background_tasks.add_task(_activate_model_version, version)
+    return {"message": f"Activation de la version {version} en cours", "active": model_store.active.version}
+
+
+@app.post("/admin/models/rollback")
+def rollback_model_version(current_user: TokenClaims = Depends(get_current_superuser)):
+    try:
+        registry = model_store.rollback()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": "Retour à la version précédente effectué", "active": registry.version}
+
+# Champs de PredictRequest vérifiés contre les tables de référence avant la prédiction
+REFERENCE_FIELDS = ("marque", "modele", "finition", "carburant", "transmission")
+
+
+def build_normalization_index() -> NormalizationIndex:
+    return NormalizationIndex(
+        get_vocabularies(),
+        {field: reference_cache.names(field) for field in REFERENCE_FIELDS},
+        fuzzy=PREDICT_NORMALIZE_FUZZY,
+    )
+
+
+# Index des orthographes connues des champs catégoriels (encodeurs, puis tables de référence),
+# reconstruit au premier usage qui suit un changement de version de modèles ou de tables
+category_normalizer = CategoryNormalizer(
+    build_normalization_index, lambda: (model_store.active.version, reference_cache.version)
+)
+
 
-        # Faire la prédiction directement avec le modèle CatBoosting
-        cb_prediction = catboost_model.predict(input_data)[0]
-        logging.info(f"CatBoost prediction: {cb_prediction}")
+def request_preparation_ready() -> bool:
+    """
+    Indique si prepare_request et le suivi de dérive n'ont rien à construire : vocabulaires
+    des modèles, index de normalisation et référence de dérive sont à jour.
+    """
+    return (
+        prediction_cache.vocabularies_loaded
+        and (not PREDICT_NORMALIZE_CATEGORIES or category_normalizer.is_current())
+        and (not DRIFT_MONITOR_ENABLED or drift_monitor.reference_loaded)
+    )
 
-        # Faire la prédiction directement avec le modèle de régression logistique
-        lr_prediction = Logistic_Regression_model.predict(input_data)[0]
-        logging.info(f"Logistic Regression prediction: {lr_prediction}")
 
-        # Déterminer si le prix est bon ou mauvais
-        price_evaluation = "Abordable" if lr_prediction == 1 else "Pas abordable"
+def build_request_preparation():
+    """Charge les modèles servis et construit ce qui manque à prepare_request (plusieurs centaines de ms)."""
+    prediction_cache.warm_up()
+    if PREDICT_NORMALIZE_CATEGORIES:
+        category_normalizer.index()
+    if DRIFT_MONITOR_ENABLED:
+        drift_monitor.reference()
+
+
+@app.on_event("startup")
+async def warm_up_request_preparation():
+    # Après le chargement du cache de référence : l'index de normalisation en dépend
+    if MODEL_WARMUP:
+        await run_in_threadpool(build_request_preparation)
+
+
+def unknown_references(request: schemas.PredictRequest) -> list[str]:
+    """
+    Renvoie les champs dont la valeur (canonique) n'est connue ni des tables de référence
+    ni du vocabulaire d'entraînement des modèles. La vérification est ignorée tant que le
+    cache de référence n'est pas chargé, ou si PREDICT_VALIDATE_REFERENCES est désactivé.
+    """
+    if not (PREDICT_VALIDATE_REFERENCES and reference_cache.is_loaded):
+        return []
+    return [
+        field
+        for field in REFERENCE_FIELDS
+        if not reference_cache.has_name(field, getattr(request, field))
+        and not prediction_cache.knows(field, getattr(request, field))
+    ]
+
+
+def prepare_request(
+    request: schemas.PredictRequest,
+) -> tuple[schemas.PredictRequest, dict[str, Normalization], list[str]]:
+    """
+    Ramène les champs catégoriels sur leur orthographe connue puis met la requête sous
+    forme canonique. Renvoie aussi la résolution des champs qui n'étaient pas canoniques
+    et les champs de REFERENCE_FIELDS restés inconnus.
+    """
+    lookups = {}
+    if PREDICT_NORMALIZE_CATEGORIES:
+        request, lookups = category_normalizer.normalize(request)
+    request = prediction_cache.canonicalize(request)
+    return request, lookups, unknown_references(request)
+
+
+def normalized_fields(lookups: dict[str, Normalization]) -> dict[str, dict]:
+    """Champs corrigés par la normalisation, tels que rapportés dans les réponses."""
+    return {field: lookup.to_dict() for field, lookup in lookups.items() if lookup.value is not None}
+
+
+def _format_unknown_references(
+    request: schemas.PredictRequest, fields: list[str], lookups: dict[str, Normalization]
+) -> str:
+    details = []
+    for field in fields:
+        lookup = lookups.get(field)
+        detail = f"{field}: valeur inconnue '{lookup.input if lookup else getattr(request, field)}'"
+        if lookup and lookup.suggestions:
+            detail += f" (suggestions : {', '.join(lookup.suggestions)})"
+        details.append(detail)
+    return "; ".join(details)
 
-        return {
-            "catboost_prediction": float(cb_prediction),
-            "Logistic_Regression_evaluation": price_evaluation,
-        }
 
+@app.post("/predict")
+async def predict(request: schemas.PredictRequest, explain: bool = False):
+    """
+    Prédit le prix d'un véhicule et évalue s'il est abordable. Avec `explain=true`, la
+    réponse contient aussi la contribution de chaque champ aux deux modèles
+    (voir schemas.PredictExplanation).
+
+    Les champs catégoriels sont ramenés sur leur orthographe connue (casse, accents,
+    fautes de frappe) ; les champs corrigés sont rapportés dans `normalized` (voir
+    schemas.CategoryNormalization). Une valeur inconnue des tables de référence et des
+    modèles est refusée (422) avec les valeurs proches en suggestion.
+    """
+    started = time.perf_counter()
+    try:
+        if not request_preparation_ready():
+            # Premier appel, nouvelle version de modèles ou de tables : la construction se fait
+            # dans le pool de threads pour ne pas bloquer la boucle d'événements
+            await run_in_threadpool(build_request_preparation)
+        request, lookups, unknown = prepare_request(request)
+        if DRIFT_MONITOR_ENABLED:
+            # Avant le refus : une valeur inconnue est justement un signal de dérive
+            drift_monitor.observe(request)
+        if unknown:
+            raise HTTPException(status_code=422, detail=_format_unknown_references(request, unknown, lookups))
+
+        version = model_store.active.version
+        key = prediction_cache.key(request, version)
+        result = cached_prediction(key, explain)
+        cached = result is not None
+        if not cached:
+            # La requête est regroupée avec les appels concurrents puis prédite par les deux modèles
+            batcher = explanation_batcher if explain else prediction_batcher
+            result = await batcher.submit(request)
+            prediction_cache.set(key, result)
+        if PREDICTION_LOG_ENABLED:
+            # Simple dépôt dans une file : l'écriture en base a lieu par lots, hors de la requête
+            prediction_log.record(request, result, version, (time.perf_counter() - started) * 1000, cached)
+        normalized = normalized_fields(lookups)
+        if normalized:
+            # Copie : le résultat est partagé avec le cache des prédictions
+            result = {**result, "normalized": normalized}
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Erreur lors de la prédiction: {e}")
         raise HTTPException(status_code=400, detail="Erreur lors de la prédiction")
 
 
+@app.get("/predict/stats")
+def predict_stats():
+    return {
+        "batching": prediction_batcher.stats(),
+        "explanation_batching": explanation_batcher.stats(),
+        "cache": prediction_cache.stats(),
+        "models": model_store.active.stats(),
+        "references": reference_cache.stats(),
+        "log": prediction_log.stats(),
+        "normalization": category_normalizer.stats(),
+    }
+
+
+@app.get("/monitoring/drift")
+def read_drift():
+    """
+    Dérive des entrées de /predict et /predict/batch par rapport aux données d'entraînement,
+    sur la fenêtre courante et la précédente (voir drift.DriftMonitor). Les requêtes refusées
+    pour une valeur inconnue sont comptées. Un champ figure dans `drifted` lorsque son PSI
+    ou sa part de catégories inconnues des encodeurs dépasse le seuil configuré, sur au
+    moins DRIFT_MIN_SAMPLES requêtes.
+    """
+    return drift_monitor.report()
+
+
+@app.post("/predict/batch", response_model=schemas.PredictBatchResponse)
+def predict_batch(items: list[dict[str, Any]] = Body(...), explain: bool = False):
+    """
+    Prédit un lot de véhicules en un seul appel par modèle.
+
+    Chaque élément est validé individuellement : une ligne invalide reçoit sa propre
+    erreur sans faire échouer le reste du lot. Les résultats sont renvoyés dans l'ordre
+    des éléments reçus. Avec `explain=true`, chaque prédiction est expliquée comme sur
+    /predict ; le lot est alors limité à PREDICT_EXPLAIN_MAX_ITEMS éléments.
+    """
+    max_items = PREDICT_EXPLAIN_MAX_ITEMS if explain else PREDICT_BATCH_MAX_ITEMS
+    if len(items) > max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux (maximum {max_items} éléments)",
+        )
+
+    results = [schemas.PredictBatchItem(index=index) for index in range(len(items))]
+    result_model = schemas.ExplainedPredictResult if explain else schemas.PredictResult
+    version = model_store.active.version
+    pending_indexes, pending_requests = [], []
+    for index, item in enumerate(items):
+        try:
+            request = schemas.PredictRequest.model_validate(item)
+        except ValidationError as e:
+            results[index].error = ingest.format_validation_error(e, root="body")
+            continue
+        request, lookups, unknown = prepare_request(request)
+        if DRIFT_MONITOR_ENABLED:
+            drift_monitor.observe(request)
+        if unknown:
+            results[index].error = _format_unknown_references(request, unknown, lookups)
+            continue
+        normalized = normalized_fields(lookups)
+        if normalized:
+            results[index].normalized = {
+                field: schemas.CategoryNormalization(**lookup) for field, lookup in normalized.items()
+            }
+        cached = cached_prediction(prediction_cache.key(request, version), explain)
+        if cached is not None:
+            results[index].prediction = result_model(**cached)
+        else:
+            pending_indexes.append(index)
+            pending_requests.append(request)
+
+    predictions = (explain_with_models if explain else predict_with_models)(pending_requests)
+    for index, request, prediction in zip(pending_indexes, pending_requests, predictions):
+        if isinstance(prediction, Exception):
+            logging.error(f"Erreur lors de la prédiction de la ligne {index}: {prediction}")
+            results[index].error = "Erreur lors de la prédiction"
+        else:
+            prediction_cache.set(prediction_cache.key(request, version), prediction)
+            results[index].prediction = result_model(**prediction)
+
+    return schemas.PredictBatchResponse(
+        results=results, errors=sum(result.error is not None for result in results)
+    )
+
+
 @app.post("/login", response_model=schemas.User)
-def login(nom: str, password: str, db: Session = Depends(get_db)):
-    user = crud.authenticate_user_by_nom(db, nom, password)
+async def login(nom: str, password: str, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.authenticate_user_by_nom(db, nom, password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -232,36 +942,27 @@ def login(nom: str, password: str, db: Session = Depends(get_db)):
 
 
 @app.post("/signup", response_model=schemas.User)
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Vérifier si l'utilisateur existe déjà
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email déjà enregistré")
 
-    # Créer un nouvel utilisateur
-    password = get_password_hash(user.password)
-    new_user = models.User(
-        nom=user.nom, email=user.email, password=password
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
-    return new_user
+    # Créer un nouvel utilisateur : seuls nom, email et mot de passe (haché dans le pool bcrypt) sont repris
+    return await crud_async.create_user(db=db, user=user)
 
 
 @app.post("/update-password")
-def update_password(email: str, new_password: str, db: Session = Depends(get_db)):
+async def update_password(email: str, new_password: str, db: AsyncSession = Depends(get_async_db)):
     # Vérifier si l'utilisateur existe
-    db_user = crud.get_user_by_email(db, email=email)
+    db_user = await crud_async.get_user_by_email(db, email=email)
     if not db_user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
-    # Mettre à jour le mot de passe
-    password = get_password_hash(new_password)
-    db_user.password = password
-    db.commit()
-    db.refresh(db_user)
+    # Mettre à jour le mot de passe, haché dans le pool bcrypt
+    db_user.password = await password_hasher.hash_async(new_password)
+    await db.commit()
+    token_cache.revoke_user(db_user.id)
 
     return {"message": "Mot de passe mis à jour avec succès"}
 
@@ -270,6 +971,12 @@ def update_password(email: str, new_password: str, db: Session = Depends(get_db)
 def health_check():
     return {"status": "ok"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Métriques au format texte de Prometheus (latences par route, étapes internes, requêtes SQL)."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database import engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+
+def split_statements(sql: str) -> list[str]:
+    """Découpe un script SQL en instructions, en ignorant les commentaires `--`."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def applied_versions(connection) -> set[str]:
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS Schema_Migrations ("
+            "Version VARCHAR(255) NOT NULL PRIMARY KEY, Applied_At DATETIME NOT NULL)"
+        )
+    )
+    return {row[0] for row in connection.execute(text("SELECT Version FROM Schema_Migrations"))}
+
+
+def migrate(dry_run: bool = False, mark_applied: bool = False) -> list[str]:
+    """
+    Applique, dans l'ordre, les scripts de migrations/ qui ne l'ont pas encore été.
+
+    Chaque script appliqué est enregistré dans la table Schema_Migrations. Avec
+    `mark_applied`, les scripts sont seulement enregistrés : utile pour une base créée
+    par `Base.metadata.create_all`, qui contient déjà le schéma à jour.
+
+    Returns:
+        list[str]: Les versions appliquées (ou à appliquer avec `dry_run`).
+    """
+    applied = []
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+        version = os.path.splitext(os.path.basename(path))[0]
+        if version in done:
+            continue
+        applied.append(version)
+        if dry_run:
+            logging.info(f"Migration à appliquer : {version}")
+            continue
+        with open(path, encoding="utf-8") as script, engine.begin() as connection:
+            for statement in [] if mark_applied else split_statements(script.read()):
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO Schema_Migrations (Version, Applied_At) VALUES (:version, :applied_at)"),
+                {"version": version, "applied_at": datetime.utcnow()},
+            )
+        logging.info(f"Migration appliquée : {version}")
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Applique les migrations SQL de migrations/")
+    parser.add_argument("--dry-run", action="store_true", help="Affiche les migrations sans les appliquer")
+    parser.add_argument(
+        "--mark-applied", action="store_true", help="Enregistre les migrations sans les exécuter (base déjà à jour)"
+    )
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run, mark_applied=args.mark_applied)
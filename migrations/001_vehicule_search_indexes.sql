@@ -0,0 +1,9 @@
+-- Index composites utilisés par GET /vehicules/search
+-- Les filtres les plus fréquents combinent une dimension (marque, modèle, carburant)
+-- avec une plage d'années et de prix, triée par prix.
+
+CREATE INDEX ix_vehicule_marque_annee_prix ON Vehicule (Marque_ID, Annee, Prix);
+CREATE INDEX ix_vehicule_modele_annee_prix ON Vehicule (Modele_ID, Annee, Prix);
+CREATE INDEX ix_vehicule_carburant_prix ON Vehicule (Carburant_ID, Prix);
+CREATE INDEX ix_vehicule_annee_kilometrage ON Vehicule (Annee, Kilometrage);
+CREATE INDEX ix_vehicule_prix ON Vehicule (Prix);
@@ -0,0 +1,4 @@
+-- Index sur Users.Nom, utilisé par la connexion (/token, /login) et par la lecture
+-- des jetons émis sans identifiant d'utilisateur dans leurs claims.
+
+CREATE INDEX ix_Users_Nom ON Users (Nom);
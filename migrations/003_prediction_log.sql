@@ -0,0 +1,22 @@
+-- Journal des appels à /predict (voir models.PredictionLog et prediction_log.py)
+-- Les lignes sont insérées par lots ; l'index sur la date sert aux analyses par période.
+
+CREATE TABLE Prediction_Log (
+    ID_Log INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Created_At DATETIME NOT NULL,
+    Kilometrage FLOAT,
+    Annee INTEGER,
+    Marque VARCHAR(255),
+    Modele VARCHAR(255),
+    Finition VARCHAR(255),
+    Carburant VARCHAR(255),
+    Transmission VARCHAR(255),
+    Etat VARCHAR(255),
+    Catboost_Prediction FLOAT,
+    Logistic_Regression_Evaluation VARCHAR(32),
+    Model_Version VARCHAR(255),
+    Latency_Ms FLOAT,
+    Cached BOOLEAN
+);
+
+CREATE INDEX ix_Prediction_Log_Created_At ON Prediction_Log (Created_At);
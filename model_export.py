@@ -0,0 +1,236 @@
+"""
+Exporte les pipelines CatBoost et régression logistique de models/pkl en un bundle
+d'inférence compact, chargé sans sklearn, pandas ni joblib.
+
+Le bundle se compose de deux fichiers, écrits à côté des pickles :
+
+- `catboost.cbm` : le régresseur CatBoost au format natif ;
+- `inference_bundle.npz` : tableaux NumPy plats (sans pickle) décrivant les deux
+  préprocesseurs (moyennes et écarts-types du StandardScaler, vocabulaires et indices
+  des colonnes du OneHotEncoder) ainsi que les coefficients, l'intercept et les classes
+  de la régression logistique.
+
+Le chargement reconstruit directement un `inference.CompiledModels`. Avant d'être
+conservé, le bundle est rechargé depuis le disque et ses prédictions sont comparées à
+celles des pipelines sur un échantillon (CSV/Parquet fourni avec `--sample`, sinon un
+lot de contrôle couvrant tout le vocabulaire).
+
+Usage :
+    python model_export.py --models-dir ./models/pkl
+    python model_export.py --models-dir ./models/versions/v2 --sample holdout.csv --sample-size 2000
+"""
+import argparse
+import hashlib
+import logging
+import os
+import sys
+
+import numpy as np
+
+from inference import CompiledModels, CompiledPreprocessor
+
+# Fichiers du bundle, relativement au répertoire des modèles
+BUNDLE_FILE = "inference_bundle.npz"
+CATBOOST_FILE = "catboost.cbm"
+
+# Version du format des tableaux, vérifiée au chargement
+BUNDLE_FORMAT = 1
+
+# Pickles dont le bundle est dérivé ; un bundle exporté depuis d'autres pickles est refusé
+SOURCE_FILES = ("catboost_model.pkl", "Logistic_Regression_model.pkl")
+
+# Préfixes des préprocesseurs dans le fichier .npz
+PREPROCESSORS = ("catboost", "lr")
+
+
+def has_bundle(models_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(models_dir, name)) for name in (BUNDLE_FILE, CATBOOST_FILE))
+
+
+def sources_sha256(models_dir: str) -> str:
+    """Empreinte des pickles sources présents ; chaîne vide si aucun n'est présent."""
+    digest = hashlib.sha256()
+    found = False
+    for name in SOURCE_FILES:
+        path = os.path.join(models_dir, name)
+        if os.path.exists(path):
+            found = True
+            digest.update(name.encode())
+            with open(path, "rb") as handle:
+                for block in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest() if found else ""
+
+
+def _preprocessor_arrays(prefix: str, preprocessor: CompiledPreprocessor) -> dict[str, np.ndarray]:
+    arrays = {
+        f"{prefix}_n_features": np.array(preprocessor.n_features, dtype=np.int64),
+        f"{prefix}_numeric_fields": np.array([field for field, _, _, _ in preprocessor.numeric], dtype=str),
+        f"{prefix}_numeric_indices": np.array([index for _, index, _, _ in preprocessor.numeric], dtype=np.int64),
+        f"{prefix}_means": np.array([mean for _, _, mean, _ in preprocessor.numeric], dtype=np.float64),
+        f"{prefix}_scales": np.array([scale for _, _, _, scale in preprocessor.numeric], dtype=np.float64),
+        f"{prefix}_categorical_fields": np.array([field for field, _ in preprocessor.categorical], dtype=str),
+    }
+    for position, (_, vocabulary) in enumerate(preprocessor.categorical):
+        # Les catégories non textuelles (NaN) ne peuvent correspondre à aucun champ de PredictRequest
+        items = [(value, index) for value, index in vocabulary.items() if isinstance(value, str)]
+        arrays[f"{prefix}_categories_{position}"] = np.array([value for value, _ in items], dtype=str)
+        arrays[f"{prefix}_category_indices_{position}"] = np.array([index for _, index in items], dtype=np.int64)
+    return arrays
+
+
+def _preprocessor_from_arrays(prefix: str, arrays) -> CompiledPreprocessor:
+    numeric = [
+        (str(field), int(index), float(mean), float(scale))
+        for field, index, mean, scale in zip(
+            arrays[f"{prefix}_numeric_fields"],
+            arrays[f"{prefix}_numeric_indices"],
+            arrays[f"{prefix}_means"],
+            arrays[f"{prefix}_scales"],
+        )
+    ]
+    categorical = [
+        (
+            str(field),
+            dict(
+                zip(
+                    arrays[f"{prefix}_categories_{position}"].tolist(),
+                    arrays[f"{prefix}_category_indices_{position}"].tolist(),
+                )
+            ),
+        )
+        for position, field in enumerate(arrays[f"{prefix}_categorical_fields"])
+    ]
+    return CompiledPreprocessor(int(arrays[f"{prefix}_n_features"]), numeric, categorical)
+
+
+def export_bundle(catboost_model, lr_model, models_dir: str) -> dict[str, str]:
+    """
+    Écrit le bundle d'inférence des deux pipelines dans `models_dir`.
+
+    L'empreinte des pickles présents dans `models_dir` est enregistrée dans le bundle :
+    il est refusé au chargement si ces pickles changent. Les fichiers sont d'abord écrits
+    sous un nom temporaire puis renommés : un worker qui charge le bundle au même moment
+    ne voit jamais un fichier partiel.
+
+    Returns:
+        dict[str, str]: Chemins des fichiers écrits (`bundle`, `catboost`).
+
+    Raises:
+        ValueError: Si les pipelines ne peuvent pas être compilés.
+    """
+    compiled = CompiledModels.from_pipelines(catboost_model, lr_model)
+    arrays = {
+        "format": np.array(BUNDLE_FORMAT, dtype=np.int64),
+        "catboost_file": np.array(CATBOOST_FILE),
+        "sources_sha256": np.array(sources_sha256(models_dir)),
+        "lr_coef": compiled.lr_coef,
+        "lr_intercept": np.array(compiled.lr_intercept, dtype=np.float64),
+        "lr_classes": np.asarray(compiled.lr_classes, dtype=np.int64),
+    }
+    arrays.update(_preprocessor_arrays("catboost", compiled.catboost_preprocessor))
+    arrays.update(_preprocessor_arrays("lr", compiled.lr_preprocessor))
+
+    paths = {"bundle": os.path.join(models_dir, BUNDLE_FILE), "catboost": os.path.join(models_dir, CATBOOST_FILE)}
+    temporary = {name: f"{path}.tmp" for name, path in paths.items()}
+    try:
+        compiled.catboost_regressor.save_model(temporary["catboost"], format="cbm")
+        with open(temporary["bundle"], "wb") as handle:
+            np.savez_compressed(handle, **arrays)
+        # Le .npz est renommé en dernier : sa présence signale un bundle complet
+        os.replace(temporary["catboost"], paths["catboost"])
+        os.replace(temporary["bundle"], paths["bundle"])
+    finally:
+        for path in temporary.values():
+            if os.path.exists(path):
+                os.remove(path)
+    return paths
+
+
+def load_bundle(path: str) -> CompiledModels:
+    """
+    Charge un bundle d'inférence ; `path` est le fichier .npz ou son répertoire.
+
+    Raises:
+        ValueError: Si le format du bundle n'est pas supporté, ou si les pickles présents
+            à côté du bundle ne sont plus ceux dont il a été exporté (modèles réentraînés
+            sans réexport).
+    """
+    from catboost import CatBoostRegressor
+
+    if os.path.isdir(path):
+        path = os.path.join(path, BUNDLE_FILE)
+    with np.load(path, allow_pickle=False) as arrays:
+        if int(arrays["format"]) != BUNDLE_FORMAT:
+            raise ValueError(f"Format de bundle non supporté : {int(arrays['format'])}")
+        models_dir = os.path.dirname(path)
+        expected, current = str(arrays["sources_sha256"]), sources_sha256(models_dir)
+        if expected and current and expected != current:
+            raise ValueError("Bundle d'inférence périmé : les pickles ont changé depuis l'export")
+        catboost_path = os.path.join(models_dir, str(arrays["catboost_file"]))
+        preprocessors = {prefix: _preprocessor_from_arrays(prefix, arrays) for prefix in PREPROCESSORS}
+        lr_coef = arrays["lr_coef"]
+        lr_intercept = float(arrays["lr_intercept"])
+        lr_classes = arrays["lr_classes"].tolist()
+    regressor = CatBoostRegressor()
+    regressor.load_model(catboost_path, format="cbm")
+    return CompiledModels(preprocessors["catboost"], regressor, preprocessors["lr"], lr_coef, lr_intercept, lr_classes)
+
+
+def bundle_size(models_dir: str) -> int:
+    """Taille totale en octets des fichiers du bundle."""
+    return sum(os.path.getsize(os.path.join(models_dir, name)) for name in (BUNDLE_FILE, CATBOOST_FILE))
+
+
+def sample_requests(path: str, size: int) -> list:
+    """Lit au plus `size` lignes complètes d'un CSV/Parquet (colonnes de /predict ou d'entraînement)."""
+    import pandas as pd
+
+    import schemas
+    from inference import COLUMN_MAPPING
+    from score import read_chunks
+
+    frame = next(read_chunks(path, size), pd.DataFrame())
+    frame = frame.rename(columns={column: field for field, column in COLUMN_MAPPING.items()})
+    requests = []
+    for row in frame[list(COLUMN_MAPPING)].to_dict("records"):
+        try:
+            requests.append(schemas.PredictRequest(**row))
+        except Exception:
+            continue
+    return requests
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models-dir", default="./models/pkl", help="Répertoire des pickles et du bundle")
+    parser.add_argument("--sample", help="CSV ou Parquet d'exemples mis de côté pour vérifier l'équivalence")
+    parser.add_argument("--sample-size", type=int, default=1000, help="Lignes lues dans --sample")
+    parser.add_argument("--rtol", type=float, default=1e-6, help="Tolérance relative sur le prix prédit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+
+    import inference
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(args.models_dir)
+    catboost_model, lr_model = registry.get("catboost"), registry.get("logistic_regression")
+    paths = export_bundle(catboost_model, lr_model, args.models_dir)
+
+    if args.sample:
+        requests = sample_requests(args.sample, args.sample_size)
+    else:
+        requests = inference.validation_requests(inference.category_vocabularies(catboost_model, lr_model), size=256)
+    try:
+        max_error = inference.check_equivalence(load_bundle(paths["bundle"]), catboost_model, lr_model, requests, rtol=args.rtol)
+    except Exception:
+        for path in paths.values():
+            os.remove(path)
+        raise
+    pickles = sum(os.path.getsize(registry.path(name)) for name in ("catboost", "logistic_regression"))
+    logging.info(
+        f"Bundle écrit dans {args.models_dir} : {bundle_size(args.models_dir) / 1e3:.0f} Ko "
+        f"(pickles : {pickles / 1e3:.0f} Ko), équivalent sur {len(requests)} lignes "
+        f"(écart maximal {max_error:.3g})"
+    )
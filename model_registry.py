@@ -0,0 +1,271 @@
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable
+
+# Fichiers des modèles connus, relativement au répertoire du registre
+MODEL_FILES = {
+    "catboost": "catboost_model.pkl",
+    "logistic_regression": "Logistic_Regression_model.pkl",
+    "gradient_boosting": "Gradient_Boosting_model.pkl",
+    # Bundle d'inférence compact (voir model_export.py), chargé sans joblib ni sklearn
+    "bundle": "inference_bundle.npz",
+}
+
+
+def current_rss() -> int:
+    """Renvoie la mémoire résidente du processus en octets (pic mémoire hors Linux)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoadedModel:
+    """Un modèle chargé et les mesures relevées lors de son chargement."""
+
+    def __init__(self, name: str, path: str, model: Any, load_seconds: float, rss_delta: int):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.load_seconds = load_seconds
+        self.rss_delta = rss_delta
+        self.file_size = os.path.getsize(path)
+        self.loaded_at = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "file_size_bytes": self.file_size,
+            "load_seconds": self.load_seconds,
+            "rss_delta_bytes": self.rss_delta,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Registre partagé des modèles, chargés paresseusement au premier usage.
+
+    Les pickles sont ouverts avec `joblib.load(..., mmap_mode="r")` : les tableaux NumPy
+    qu'ils contiennent restent projetés en mémoire depuis le fichier, de sorte que les
+    pages sont partagées entre workers lorsque l'application est préchargée avant le
+    fork (par exemple `gunicorn --preload`). Le bundle d'inférence (`.npz` + `.cbm`) est
+    lu par `model_export.load_bundle`. Les objets dérivés des modèles (chemin
+    compilé, vocabulaires...) sont mémorisés avec `derive`.
+
+    Args:
+        models_dir (str): Répertoire contenant les fichiers de modèles.
+        files (dict[str, str]): Nom logique -> nom de fichier.
+        mmap_mode (str | None): Mode de projection mémoire passé à joblib.
+        version (str): Identifiant de la version de modèles servie par ce registre.
+    """
+
+    def __init__(
+        self,
+        models_dir: str = "./models/pkl",
+        files: dict[str, str] = MODEL_FILES,
+        mmap_mode: str | None = "r",
+        version: str = "default",
+    ):
+        self.models_dir = models_dir
+        self.version = version
+        self.files = dict(files)
+        self.mmap_mode = mmap_mode
+        self._models: dict[str, LoadedModel] = {}
+        self._derived: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.models_dir, self.files[name])
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """Renvoie le modèle `name`, en le chargeant au premier appel."""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded.model
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                loaded = self._load(name)
+                self._models[name] = loaded
+        return loaded.model
+
+    def _load(self, name: str) -> LoadedModel:
+        if name not in self.files:
+            raise KeyError(f"Modèle inconnu : {name}")
+        path = self.path(name)
+        rss_before = current_rss()
+        started = time.perf_counter()
+        model = self._read(path)
+        loaded = LoadedModel(name, path, model, time.perf_counter() - started, current_rss() - rss_before)
+        logging.info(
+            f"Modèle {name} chargé depuis {path} en {loaded.load_seconds:.3f} s "
+            f"({loaded.rss_delta / 1e6:.1f} Mo de mémoire résidente)"
+        )
+        return loaded
+
+    def _read(self, path: str) -> Any:
+        if path.endswith(".npz"):
+            from model_export import load_bundle
+
+            return load_bundle(path)
+        import joblib
+
+        return joblib.load(path, mmap_mode=self.mmap_mode)
+
+    def derive(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Renvoie l'objet dérivé `key`, construit une seule fois avec `factory`."""
+        if key in self._derived:
+            return self._derived[key]
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory()
+        return self._derived[key]
+
+    def warm_up(self, names: list[str] | None = None):
+        """Charge immédiatement les modèles indiqués (tous par défaut)."""
+        for name in names or list(self.files):
+            self.get(name)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "models_dir": self.models_dir,
+            "mmap_mode": self.mmap_mode,
+            "loaded": [self._models[name].stats() for name in self._models],
+            "available": [name for name in self.files if os.path.exists(self.path(name))],
+        }
+
+
+class ModelStore:
+    """
+    Magasin de versions de modèles, avec activation à chaud et retour arrière.
+
+    Chaque version est un répertoire de `versions_dir` contenant les mêmes fichiers que
+    `models/pkl` ; ce dernier est exposé sous le nom `default`. Une version est chargée
+    et validée avant que la référence `active` ne soit remplacée par une simple
+    affectation : les requêtes en cours, qui ont déjà lu l'ancienne référence, se
+    terminent sur l'ancienne version. La version précédente reste en mémoire pour
+    permettre un retour arrière immédiat.
+
+    Args:
+        default_dir (str): Répertoire de la version `default`.
+        versions_dir (str): Répertoire contenant une sous-arborescence par version.
+        validate (Callable[[ModelRegistry], None]): Vérification exécutée avant l'activation ;
+            doit lever une exception si la version est inutilisable.
+        on_swap (Callable[[ModelRegistry], None] | None): Appelée après chaque changement de version.
+        active_version (str): Version servie au démarrage (chargée paresseusement).
+        preload (list[str] | Callable[[ModelRegistry], list[str]] | None): Modèles chargés avant
+            la validation d'une nouvelle version, ou fonction les choisissant d'après son
+            registre ; None laisse la validation charger ce dont elle a besoin.
+    """
+
+    def __init__(
+        self,
+        default_dir: str,
+        versions_dir: str,
+        validate: Callable[[ModelRegistry], None],
+        on_swap: Callable[[ModelRegistry], None] | None = None,
+        active_version: str = "default",
+        preload: list[str] | Callable[[ModelRegistry], list[str]] | None = None,
+    ):
+        self.default_dir = default_dir
+        self.versions_dir = versions_dir
+        self.validate = validate
+        self.on_swap = on_swap
+        self.preload = preload
+        self.status: dict[str, str] = {}
+        self.history: list[str] = []
+        self._previous: ModelRegistry | None = None
+        self._swap_lock = threading.Lock()
+        self.active = self._registry(active_version)
+        self.status[active_version] = "active"
+
+    def path(self, version: str) -> str:
+        if version == "default":
+            return self.default_dir
+        if version in ("", ".", "..") or os.path.basename(version) != version:
+            raise KeyError(f"Version invalide : {version}")
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self) -> list[str]:
+        try:
+            names = sorted(entry.name for entry in os.scandir(self.versions_dir) if entry.is_dir())
+        except FileNotFoundError:
+            names = []
+        return ["default"] + names
+
+    def _registry(self, version: str) -> ModelRegistry:
+        path = self.path(version)
+        if not os.path.isdir(path):
+            raise KeyError(f"Version de modèles introuvable : {version}")
+        return ModelRegistry(path, version=version)
+
+    def load(self, version: str) -> ModelRegistry:
+        """Charge et valide une version sans l'activer."""
+        self.status[version] = "loading"
+        try:
+            registry = self._registry(version)
+            preload = self.preload(registry) if callable(self.preload) else self.preload
+            if preload:
+                registry.warm_up(preload)
+            self.validate(registry)
+        except Exception as e:
+            self.status[version] = f"failed: {e}"
+            raise
+        self.status[version] = "ready"
+        return registry
+
+    def _swap(self, registry: ModelRegistry, record_history: bool):
+        previous = self.active
+        self.active = registry
+        self._previous = previous
+        if record_history:
+            self.history.append(previous.version)
+        self.status[previous.version] = "ready"
+        self.status[registry.version] = "active"
+        logging.info(f"Version de modèles active : {previous.version} -> {registry.version}")
+        if self.on_swap is not None:
+            self.on_swap(registry)
+
+    def activate(self, version: str) -> ModelRegistry:
+        """Charge, valide puis active `version` ; la version courante reste servie en cas d'échec."""
+        with self._swap_lock:
+            if version == self.active.version:
+                return self.active
+            registry = self.load(version)
+            self._swap(registry, record_history=True)
+            return registry
+
+    def rollback(self) -> ModelRegistry:
+        """Réactive la version précédente de l'historique."""
+        with self._swap_lock:
+            if not self.history:
+                raise ValueError("Aucune version précédente")
+            version = self.history[-1]
+            if self._previous is not None and self._previous.version == version:
+                registry = self._previous
+            else:
+                registry = self.load(version)
+            self.history.pop()
+            self._swap(registry, record_history=False)
+            return registry
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active.version,
+            "history": list(self.history),
+            "versions": [
+                {"version": version, "status": self.status.get(version, "available")}
+                for version in self.versions()
+            ],
+            "registry": self.active.stats(),
+        }
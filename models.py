@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, DateTime, Index
 from database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import joinedload, relationship, selectinload
 
 class Vehicule(Base):
     __tablename__ = "Vehicule"
@@ -15,12 +15,23 @@ class Vehicule(Base):
     carburant_id = Column("Carburant_ID", Integer, ForeignKey("Carburant.ID_Carburant"), index=True)
     transmission_id = Column("Transmission_ID", Integer, ForeignKey("Transmission.ID_Transmission"), index=True)
 
-    # Relations
-    carburant = relationship("Carburant", back_populates="vehicules", lazy="joined")
-    transmission = relationship("Transmission", back_populates="vehicules", lazy="joined")
-    modele = relationship("Modele", back_populates="vehicules", lazy="joined")
-    marque = relationship("Marque", back_populates="vehicules", lazy="joined")
-    finition = relationship("Finition", back_populates="vehicules", lazy="joined")
+    # Index composites pour les combinaisons de filtres de /vehicules/search
+    # (voir migrations/001_vehicule_search_indexes.sql)
+    __table_args__ = (
+        Index("ix_vehicule_marque_annee_prix", "Marque_ID", "Annee", "Prix"),
+        Index("ix_vehicule_modele_annee_prix", "Modele_ID", "Annee", "Prix"),
+        Index("ix_vehicule_carburant_prix", "Carburant_ID", "Prix"),
+        Index("ix_vehicule_annee_kilometrage", "Annee", "Kilometrage"),
+        Index("ix_vehicule_prix", "Prix"),
+    )
+
+    # Relations : jamais chargées implicitement, chaque requête choisit sa stratégie
+    # (voir vehicule_list_loading / vehicule_detail_loading)
+    carburant = relationship("Carburant", back_populates="vehicules", lazy="raise_on_sql")
+    transmission = relationship("Transmission", back_populates="vehicules", lazy="raise_on_sql")
+    modele = relationship("Modele", back_populates="vehicules", lazy="raise_on_sql")
+    marque = relationship("Marque", back_populates="vehicules", lazy="raise_on_sql")
+    finition = relationship("Finition", back_populates="vehicules", lazy="raise_on_sql")
 
 class Carburant(Base):
     __tablename__ = "Carburant"
@@ -68,8 +79,46 @@ class User(Base):
     __tablename__ = "Users"
     id = Column("ID_User", Integer, primary_key=True, index=True)
     email = Column("Email", String, unique=True, index=True, nullable=False)
-    nom = Column("Nom", String, nullable=False)
+    # Index : la connexion (/token, /login) recherche l'utilisateur par nom
+    # (voir migrations/002_users_nom_index.sql)
+    nom = Column("Nom", String, nullable=False, index=True)
     password = Column("Password", String, nullable=False)
     is_active = Column("Is_Active", Boolean, default=True)
     is_superuser = Column("Is_Superuser", Boolean, default=False)
     profile_image = Column("Profile_Image", String, nullable=True)
+
+
+# Journal des appels à /predict pour l'analyse de dérive : entrées (forme canonique), sorties
+# des deux modèles, version et latence. Alimenté par lots par prediction_log.PredictionLogWriter
+# (voir migrations/003_prediction_log.sql)
+class PredictionLog(Base):
+    __tablename__ = "Prediction_Log"
+    id = Column("ID_Log", Integer, primary_key=True)
+    created_at = Column("Created_At", DateTime, nullable=False, index=True)
+    kilometrage = Column("Kilometrage", Float)
+    annee = Column("Annee", Integer)
+    marque = Column("Marque", String(255))
+    modele = Column("Modele", String(255))
+    finition = Column("Finition", String(255))
+    carburant = Column("Carburant", String(255))
+    transmission = Column("Transmission", String(255))
+    etat = Column("Etat", String(255))
+    catboost_prediction = Column("Catboost_Prediction", Float)
+    lr_evaluation = Column("Logistic_Regression_Evaluation", String(32))
+    model_version = Column("Model_Version", String(255))
+    latency_ms = Column("Latency_Ms", Float)
+    cached = Column("Cached", Boolean, default=False)
+
+
+# Relations de Vehicule nécessaires à la sérialisation de schemas.Vehicule
+VEHICULE_RELATIONS = (Vehicule.carburant, Vehicule.transmission, Vehicule.modele, Vehicule.marque, Vehicule.finition)
+
+
+def vehicule_list_loading() -> list:
+    """Listes : une requête IN par table de dimension au lieu d'une jointure à 6 tables par ligne."""
+    return [selectinload(relation) for relation in VEHICULE_RELATIONS]
+
+
+def vehicule_detail_loading() -> list:
+    """Lecture d'un seul véhicule : une seule requête avec les jointures."""
+    return [joinedload(relation) for relation in VEHICULE_RELATIONS]
@@ -0,0 +1,344 @@
+"""
+Pipeline d'entraînement des modèles servis par l'API (remplace model_training.py et
+training_forest.py).
+
+- Le CSV est lu une seule fois ; son empreinte SHA-256 identifie le jeu de données.
+- Le préprocesseur (StandardScaler + OneHotEncoder) est mis en cache sur disque par
+  `Pipeline(memory=...)` : il n'est ajusté qu'une fois par pli, quel que soit le nombre
+  de combinaisons d'hyperparamètres essayées.
+- La recherche d'hyperparamètres utilise HalvingGridSearchCV par défaut (ou une
+  recherche aléatoire, ou la grille complète).
+- Chaque modèle est écrit dans models/pkl avec un manifeste JSON (empreintes, meilleurs
+  paramètres, métriques, durées). Un modèle dont le manifeste a la même empreinte
+  (données, grille, recherche) est sauté : relancer le script après une interruption
+  reprend là où il s'était arrêté.
+- Le profil des données (quantiles, parts des catégories) est écrit à côté des modèles
+  (drift_profile.json) : /monitoring/drift y compare le trafic reçu.
+
+Usage :
+    python models/training_pipeline.py --data data/csv/voitures_aramisauto_cleaned.csv
+    python models/training_pipeline.py --data ... --models catboost Logistic_Regression --search randomized --n-iter 20
+    python models/training_pipeline.py --data ... --force
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import joblib
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (active HalvingGridSearchCV)
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, RandomizedSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# Lancé comme script : la racine du dépôt doit être importable (models.py y occulte le répertoire models/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drift import build_profile, save_profile  # noqa: E402
+from inference import COLUMN_MAPPING  # noqa: E402
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pkl")
+NUMERIC_COLUMNS = ["Annee", "Kilometrage"]
+CATEGORICAL_COLUMNS = [column for column in COLUMN_MAPPING.values() if column not in NUMERIC_COLUMNS]
+TARGET = "Prix"
+RANDOM_STATE = 42
+
+
+def _catboost():
+    from catboost import CatBoostRegressor
+
+    return CatBoostRegressor(random_state=RANDOM_STATE, verbose=0, thread_count=1)
+
+
+# Modèles entraînables : nom -> (fichier, tâche, fabrique de l'estimateur, grille, colonnes exclues)
+MODEL_SPECS = {
+    "catboost": (
+        "catboost_model.pkl",
+        "regression",
+        _catboost,
+        {
+            "regressor__iterations": [500, 1000],
+            "regressor__learning_rate": [0.05, 0.1],
+            "regressor__depth": [6, 8],
+        },
+        [],
+    ),
+    "Gradient_Boosting": (
+        "Gradient_Boosting_model.pkl",
+        "regression",
+        lambda: GradientBoostingRegressor(random_state=RANDOM_STATE),
+        {
+            "regressor__n_estimators": [500],
+            "regressor__learning_rate": [0.2],
+            "regressor__max_depth": [5],
+            "regressor__max_features": ["sqrt"],
+        },
+        [],
+    ),
+    "Random_Forest": (
+        "Random_Forest_model.pkl",
+        "regression",
+        lambda: RandomForestRegressor(random_state=RANDOM_STATE),
+        {
+            "regressor__n_estimators": [100, 200, 300, 400],
+            "regressor__max_depth": [10, 14, 18, None],
+            "regressor__max_features": ["sqrt", "log2"],
+            "regressor__min_samples_split": [2, 5, 10],
+            "regressor__min_samples_leaf": [1, 2, 4],
+        },
+        [],
+    ),
+    # La régression logistique servie n'utilise pas la finition
+    "Logistic_Regression": (
+        "Logistic_Regression_model.pkl",
+        "classification",
+        lambda: LogisticRegression(max_iter=1000),
+        {
+            "classifier__C": [0.1, 1.0, 10.0],
+            "classifier__solver": ["liblinear", "lbfgs"],
+        },
+        ["Finition"],
+    ),
+}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as data:
+        for block in iter(lambda: data.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(data_sha256: str, name: str, param_grid: dict, search: dict) -> str:
+    """Empreinte d'un entraînement : données, modèle, grille, recherche et version de scikit-learn."""
+    payload = json.dumps(
+        {
+            "data": data_sha256,
+            "model": name,
+            "param_grid": param_grid,
+            "search": search,
+            "sklearn": sklearn.__version__,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def manifest_path(artifact_path: str) -> str:
+    return os.path.splitext(artifact_path)[0] + ".manifest.json"
+
+
+def read_manifest(artifact_path: str) -> dict | None:
+    try:
+        with open(manifest_path(artifact_path), encoding="utf-8") as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write(path: str, write):
+    """Écrit dans un fichier temporaire du même répertoire puis le renomme."""
+    directory = os.path.dirname(path)
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    os.close(handle)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def build_pipeline(step: str, estimator, drop_columns: list[str], memory) -> Pipeline:
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), NUMERIC_COLUMNS),
+            (
+                "cat",
+                OneHotEncoder(handle_unknown="ignore"),
+                [column for column in CATEGORICAL_COLUMNS if column not in drop_columns],
+            ),
+        ]
+    )
+    return Pipeline(steps=[("preprocessor", preprocessor), (step, estimator)], memory=memory)
+
+
+def search_settings(method: str = "halving", cv: int = 5, factor: int = 3, n_iter: int = 20) -> dict:
+    """Réglages de la recherche qui influencent le résultat (et donc l'empreinte)."""
+    settings = {"method": method, "cv": cv}
+    if method == "halving":
+        settings["factor"] = factor
+    elif method == "randomized":
+        settings["n_iter"] = n_iter
+    return settings
+
+
+def make_search(pipeline: Pipeline, param_grid: dict, search: dict, n_jobs: int):
+    common = {"cv": search["cv"], "n_jobs": n_jobs}
+    if search["method"] == "halving":
+        return HalvingGridSearchCV(
+            pipeline, param_grid, factor=search["factor"], random_state=RANDOM_STATE, **common
+        )
+    if search["method"] == "randomized":
+        return RandomizedSearchCV(
+            pipeline, param_grid, n_iter=search["n_iter"], random_state=RANDOM_STATE, **common
+        )
+    return GridSearchCV(pipeline, param_grid, **common)
+
+
+def train_model(
+    name: str,
+    df: pd.DataFrame,
+    data_path: str,
+    data_sha256: str,
+    search: dict,
+    models_dir: str = MODELS_DIR,
+    cache_dir: str | None = None,
+    force: bool = False,
+    n_jobs: int = -1,
+) -> dict:
+    """
+    Entraîne le modèle `name`, l'écrit dans `models_dir` avec son manifeste et renvoie ce dernier.
+    Si le manifeste existant a la même empreinte, l'entraînement est sauté.
+    """
+    filename, task, factory, param_grid, drop_columns = MODEL_SPECS[name]
+    artifact_path = os.path.join(models_dir, filename)
+    key = fingerprint(data_sha256, name, param_grid, search)
+    previous = read_manifest(artifact_path)
+    if not force and previous and previous.get("fingerprint") == key and os.path.exists(artifact_path):
+        logging.info(f"{name} : données et paramètres inchangés, entraînement sauté")
+        return previous
+
+    started = time.perf_counter()
+    features = df[NUMERIC_COLUMNS + CATEGORICAL_COLUMNS]
+    if task == "classification":
+        # Le seuil d'« abordabilité » est la médiane des prix du jeu d'entraînement
+        threshold = float(df[TARGET].median())
+        target = (df[TARGET] > threshold).astype(int)
+        step = "classifier"
+    else:
+        threshold = None
+        target = df[TARGET]
+        step = "regressor"
+    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=RANDOM_STATE)
+
+    memory = joblib.Memory(cache_dir, verbose=0) if cache_dir else None
+    grid_search = make_search(build_pipeline(step, factory(), drop_columns, memory), param_grid, search, n_jobs)
+    search_started = time.perf_counter()
+    grid_search.fit(X_train, y_train)
+    search_seconds = time.perf_counter() - search_started
+
+    best = grid_search.best_estimator_
+    # Le modèle servi ne doit pas dépendre du cache disque du préprocesseur
+    best.memory = None
+    y_pred = best.predict(X_test)
+    if task == "classification":
+        metrics = {"accuracy": float(accuracy_score(y_test, y_pred))}
+    else:
+        metrics = {
+            "mse": float(mean_squared_error(y_test, y_pred)),
+            "mae": float(mean_absolute_error(y_test, y_pred)),
+            "r2": float(r2_score(y_test, y_pred)),
+        }
+
+    _atomic_write(artifact_path, lambda path: joblib.dump(best, path))
+    manifest = {
+        "model": name,
+        "artifact": filename,
+        "task": task,
+        "fingerprint": key,
+        "data": {"path": data_path, "sha256": data_sha256, "rows": len(df)},
+        "features": {
+            "numeric": NUMERIC_COLUMNS,
+            "categorical": [column for column in CATEGORICAL_COLUMNS if column not in drop_columns],
+        },
+        "threshold": threshold,
+        "search": search,
+        "param_grid": param_grid,
+        "n_candidates": len(grid_search.cv_results_["params"]),
+        "best_params": grid_search.best_params_,
+        "best_cv_score": float(grid_search.best_score_),
+        "metrics": metrics,
+        "timings": {
+            "search_seconds": search_seconds,
+            "total_seconds": time.perf_counter() - started,
+        },
+        "versions": {"python": platform.python_version(), "sklearn": sklearn.__version__},
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    def write_manifest(path: str):
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump(manifest, output, indent=2, ensure_ascii=False, default=str)
+
+    _atomic_write(manifest_path(artifact_path), write_manifest)
+    logging.info(
+        f"{name} : {manifest['n_candidates']} combinaisons en {search_seconds:.1f} s, "
+        f"meilleurs paramètres {grid_search.best_params_}, métriques {metrics}"
+    )
+    return manifest
+
+
+def train(
+    data_path: str,
+    names: list[str] | None = None,
+    search: dict | None = None,
+    models_dir: str = MODELS_DIR,
+    cache_dir: str | None = None,
+    force: bool = False,
+    n_jobs: int = -1,
+) -> dict[str, dict]:
+    """Entraîne les modèles demandés (tous par défaut) sur le CSV `data_path`, lu une seule fois."""
+    search = search or search_settings()
+    data_sha256 = file_sha256(data_path)
+    df = pd.read_csv(data_path)
+    profile = build_profile(df)
+    profile["data"] = {"path": data_path, "sha256": data_sha256}
+    save_profile(profile, models_dir)
+    manifests = {}
+    for name in names or list(MODEL_SPECS):
+        manifests[name] = train_model(name, df, data_path, data_sha256, search, models_dir, cache_dir, force, n_jobs)
+    return manifests
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="CSV d'entraînement nettoyé")
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_SPECS), help="Modèles à entraîner (tous par défaut)")
+    parser.add_argument("--search", choices=("halving", "randomized", "grid"), default="halving")
+    parser.add_argument("--n-iter", type=int, default=20, help="Combinaisons essayées par la recherche aléatoire")
+    parser.add_argument("--factor", type=int, default=3, help="Facteur d'élimination de HalvingGridSearchCV")
+    parser.add_argument("--cv", type=int, default=5, help="Nombre de plis de validation croisée")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument(
+        "--cache-dir",
+        default=os.path.join(tempfile.gettempdir(), "predict_car_training_cache"),
+        help="Cache disque des préprocesseurs ajustés (Pipeline(memory=...))",
+    )
+    parser.add_argument("--force", action="store_true", help="Réentraîne même si rien n'a changé")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    train(
+        args.data,
+        args.models,
+        search_settings(args.search, args.cv, args.factor, args.n_iter),
+        args.models_dir,
+        args.cache_dir,
+        args.force,
+        args.n_jobs,
+    )
@@ -0,0 +1,257 @@
+"""
+Index de normalisation des champs catégoriels de PredictRequest.
+
+Les valeurs connues d'un champ sont celles des OneHotEncoder (orthographe préférée, celle
+que les modèles ont vue) complétées par les noms des tables de référence. Une valeur
+reçue est résolue, du plus rapide au plus coûteux :
+
+1. identité : la valeur est déjà une orthographe canonique ;
+2. pliage : comparaison après suppression des accents, de la casse et des espaces
+   superflus (« electrique » -> « Électrique », « PEUGEOT » -> « Peugeot ») ;
+3. approximation : les candidats partageant le plus de trigrammes avec la valeur pliée
+   sont classés par coefficient de Dice. Le meilleur n'est retenu que s'il est à une
+   distance d'édition d'au plus 1 (2 au-delà de 8 caractères), seul à cette distance,
+   et s'il contient les mêmes chiffres (« 208 » n'est jamais corrigé en « 2008 ») ;
+   sinon la valeur est inconnue et les candidats sont proposés comme suggestions.
+
+Les résultats des valeurs non canoniques sont mémorisés (mémoire bornée) : une même
+faute de frappe n'est résolue qu'une fois.
+"""
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable
+
+import metrics
+import schemas
+
+category_normalizations = metrics.registry.register(
+    metrics.Counter(
+        "predict_category_normalizations_total",
+        "Valeurs catégorielles de /predict corrigées ou inconnues, par champ et par type de résolution.",
+        ("field", "match"),
+    )
+)
+
+
+def fold(value: str) -> str:
+    """Forme de comparaison : espaces normalisés, sans accents, casse repliée."""
+    decomposed = unicodedata.normalize("NFKD", " ".join(value.split()))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def trigrams(folded: str) -> set[str]:
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distance de Damerau-Levenshtein restreinte, ou `limit + 1` dès qu'elle dépasse `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+def _digits(value: str) -> str:
+    return "".join(char for char in value if char.isdigit())
+
+
+@dataclass(frozen=True)
+class Normalization:
+    """Résolution d'une valeur ; `value` vaut None si elle est inconnue."""
+
+    input: str
+    value: str | None
+    match: str
+    score: float = 1.0
+    suggestions: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {"input": self.input, "value": self.value, "match": self.match, "score": self.score}
+
+
+class _FieldIndex:
+    def __init__(
+        self, encoded: Iterable[str], references: Iterable[str], max_suggestions: int, min_similarity: float, memo_size: int
+    ):
+        self.max_suggestions = max_suggestions
+        self.min_similarity = min_similarity
+        self.memo_size = memo_size
+        # Forme pliée -> orthographe canonique : la première rencontrée l'emporte (encodeurs avant tables)
+        encoded = sorted(value for value in encoded if isinstance(value, str))
+        self.by_fold: dict[str, str] = {}
+        for value in [*encoded, *references]:
+            if value.strip():
+                self.by_fold.setdefault(fold(value), value)
+        # Toute catégorie des encodeurs est canonique, même si une autre se plie comme elle
+        self.canonical = frozenset(self.by_fold.values()) | frozenset(encoded)
+        self.folded = list(self.by_fold)
+        self.sizes = []
+        self.postings: dict[str, list[int]] = {}
+        for position, folded in enumerate(self.folded):
+            grams = trigrams(folded)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        self.memo: dict[str, Normalization] = {}
+
+    def lookup(self, value: str) -> Normalization | None:
+        if value in self.canonical:
+            return None
+        result = self.memo.get(value)
+        if result is None:
+            result = self._resolve(value)
+            if len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[value] = result
+        return result
+
+    def _resolve(self, value: str) -> Normalization:
+        folded = fold(value)
+        canonical = self.by_fold.get(folded)
+        if canonical is not None:
+            return Normalization(value, canonical, "folded")
+
+        grams = trigrams(folded)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for position in self.postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        ranked = sorted(
+            ((2 * count / (len(grams) + self.sizes[position]), position) for position, count in shared.items()),
+            reverse=True,
+        )
+        candidates = [(score, position) for score, position in ranked[:self.max_suggestions] if score >= self.min_similarity]
+        suggestions = tuple(self.by_fold[self.folded[position]] for _, position in candidates)
+
+        limit = 1 if len(folded) <= 8 else 2
+        digits = _digits(folded)
+        close = [
+            (distance, score, position)
+            for score, position in candidates
+            if _digits(self.folded[position]) == digits
+            and (distance := edit_distance(folded, self.folded[position], limit)) <= limit
+        ]
+        if close:
+            best = min(distance for distance, _, _ in close)
+            closest = [(score, position) for distance, score, position in close if distance == best]
+            if len(closest) == 1:
+                score, position = closest[0]
+                return Normalization(value, self.by_fold[self.folded[position]], "fuzzy", round(score, 3), suggestions)
+        return Normalization(value, None, "unknown", round(candidates[0][0], 3) if candidates else 0.0, suggestions)
+
+
+class NormalizationIndex:
+    """
+    Index des valeurs connues de chaque champ catégoriel.
+
+    Args:
+        vocabularies (dict[str, Iterable[str]]): Catégories vues par les encodeurs, par champ.
+        references (dict[str, Iterable[str]] | None): Noms des tables de référence, par champ.
+        fuzzy (bool): Applique les corrections approximatives ; sinon elles ne sont que suggérées.
+        max_suggestions (int): Nombre maximal de suggestions par valeur inconnue.
+        min_similarity (float): Coefficient de Dice minimal d'une suggestion.
+        memo_size (int): Nombre de résolutions mémorisées par champ.
+    """
+
+    def __init__(
+        self,
+        vocabularies: dict[str, Iterable[str]],
+        references: dict[str, Iterable[str]] | None = None,
+        fuzzy: bool = True,
+        max_suggestions: int = 5,
+        min_similarity: float = 0.3,
+        memo_size: int = 10000,
+    ):
+        references = references or {}
+        self.fuzzy = fuzzy
+        self.fields = {
+            field: _FieldIndex(
+                vocabularies.get(field, ()),
+                [name for name in references.get(field, ()) if isinstance(name, str)],
+                max_suggestions,
+                min_similarity,
+                memo_size,
+            )
+            for field in schemas.PredictRequest.model_fields
+            if field in vocabularies or field in references
+        }
+
+    def lookup(self, field: str, value: str) -> Normalization | None:
+        """Résout `value` ; None si elle est déjà canonique ou si le champ n'est pas indexé."""
+        index = self.fields.get(field)
+        return index.lookup(value) if index is not None else None
+
+    def normalize(self, request: schemas.PredictRequest) -> tuple[schemas.PredictRequest, dict[str, Normalization]]:
+        """
+        Renvoie la requête dont les champs résolus portent leur valeur canonique, et les
+        résolutions des champs qui n'étaient pas canoniques (corrigés ou inconnus).
+        """
+        lookups, update = {}, {}
+        for field, index in self.fields.items():
+            result = index.lookup(getattr(request, field))
+            if result is None:
+                continue
+            if result.match == "fuzzy" and not self.fuzzy:
+                result = Normalization(result.input, None, "unknown", result.score, result.suggestions)
+            lookups[field] = result
+            category_normalizations.inc(field, result.match)
+            if result.value is not None:
+                update[field] = result.value
+        return (request.model_copy(update=update) if update else request), lookups
+
+    def stats(self) -> dict:
+        return {
+            field: {"values": len(index.folded), "trigrams": len(index.postings), "memo": len(index.memo)}
+            for field, index in self.fields.items()
+        }
+
+
+class CategoryNormalizer:
+    """
+    Index de normalisation reconstruit à la demande lorsque sa source change (version des
+    modèles, instantané des tables de référence).
+
+    Args:
+        build (Callable[[], NormalizationIndex]): Construit l'index depuis les sources courantes.
+        version (Callable[[], Hashable]): Identifie l'état des sources ; l'index est reconstruit
+            au premier usage qui suit un changement.
+    """
+
+    def __init__(self, build: Callable[[], NormalizationIndex], version: Callable[[], Hashable]):
+        self._build = build
+        self._version = version
+        self._index: NormalizationIndex | None = None
+        self._built_for: Hashable = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def is_current(self) -> bool:
+        """Indique si l'index est construit pour l'état courant des sources."""
+        return self._index is not None and self._version() == self._built_for
+
+    def index(self) -> NormalizationIndex:
+        version = self._version()
+        if self._index is None or version != self._built_for:
+            with self._lock:
+                if self._index is None or version != self._built_for:
+                    self._index = self._build()
+                    self._built_for = version
+                    self.builds += 1
+        return self._index
+
+    def normalize(self, request: schemas.PredictRequest) -> tuple[schemas.PredictRequest, dict[str, Normalization]]:
+        return self.index().normalize(request)
+
+    def stats(self) -> dict:
+        return {"builds": self.builds, "fields": self._index.stats() if self._index is not None else {}}
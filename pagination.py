@@ -0,0 +1,42 @@
+import base64
+import json
+
+from fastapi import HTTPException, Request, Response
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode l'identifiant du dernier élément renvoyé en curseur opaque."""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Décode un curseur produit par `encode_cursor` ; lève une erreur 400 s'il est invalide."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(payload)["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    return last_id
+
+
+def next_cursor_headers(request: Request, last_id: int | None) -> dict[str, str]:
+    """
+    En-têtes décrivant la page suivante.
+
+    Le corps des réponses paginées reste une liste : le curseur est transmis dans
+    l'en-tête `X-Next-Cursor`, accompagné d'un en-tête `Link` (rel="next") prêt à suivre.
+    Aucun en-tête n'est renvoyé s'il n'y a pas de page suivante.
+    """
+    if last_id is None:
+        return {}
+    cursor = encode_cursor(last_id)
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+    return {"X-Next-Cursor": cursor, "Link": f'<{next_url}>; rel="next"'}
+
+
+def set_next_cursor(request: Request, response: Response, last_id: int | None):
+    """Ajoute les en-têtes de la page suivante à la réponse."""
+    response.headers.update(next_cursor_headers(request, last_id))
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+import metrics
+
+password_hash_pending = metrics.registry.register(
+    metrics.Gauge("password_hash_pending", "Hachages et vérifications bcrypt admis et non terminés.")
+)
+password_hash_rejected = metrics.registry.register(
+    metrics.Counter("password_hash_rejected_total", "Opérations bcrypt refusées faute de place dans la file.")
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Levée lorsque la file du pool de hachage est pleine : la requête doit être retentée plus tard."""
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    """
+    Contexte passlib pour un coût bcrypt donné.
+
+    Les hachages d'un autre coût (plus faible ou plus élevé) sont signalés comme à mettre
+    à jour par `verify_and_update`, ce qui permet de les refaire à la connexion.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+# Fonctions exécutées dans les processus du pool (elles doivent être importables)
+def _warm_up(rounds: int):
+    crypt_context(rounds).hash("")
+
+
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> tuple[bool, str | None]:
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Hachage et vérification bcrypt dans un pool de processus dédié et borné.
+
+    bcrypt coûte volontairement plusieurs centaines de millisecondes de CPU : exécuté
+    dans le pool de threads de l'application, il prive /predict de CPU et de threads
+    pendant une vague de connexions. Ici, le calcul a lieu dans `workers` processus
+    séparés ; au plus `max_pending` opérations sont admises à la fois (en cours ou en
+    file), au-delà `PasswordHasherBusy` est levée immédiatement plutôt que d'accumuler
+    de la latence.
+
+    Le pool est démarré par `start` au lancement de l'application, avant que le serveur
+    n'ouvre des connexions ou ne crée d'autres threads. Avec `workers=0`, le calcul est
+    fait dans le processus appelant : directement pour les appels synchrones, dans le
+    pool de threads de la boucle pour les appels asynchrones (comportement antérieur).
+
+    Args:
+        rounds (int): Coût bcrypt (log2 du nombre d'itérations).
+        workers (int): Nombre de processus du pool.
+        max_pending (int): Nombre maximal d'opérations admises simultanément.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 1, max_pending: int = 32):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def start(self):
+        """Crée le pool et démarre ses processus, pour que la première connexion ne paie pas leur lancement."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                pool = self._pool
+            else:
+                return
+        for future in [pool.submit(_warm_up, self.rounds) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _admit(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                password_hash_rejected.inc()
+                raise PasswordHasherBusy(f"{self._pending} opérations bcrypt déjà en cours")
+            self._pending += 1
+        password_hash_pending.inc()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+        password_hash_pending.dec()
+
+    def _run(self, function, *args):
+        if self.workers > 0 and self._pool is None:
+            self.start()
+        self._admit()
+        try:
+            if self._pool is None:
+                return function(*args)
+            return self._pool.submit(function, *args).result()
+        finally:
+            self._release()
+
+    async def _run_async(self, function, *args):
+        if self.workers > 0 and self._pool is None:
+            await asyncio.to_thread(self.start)
+        self._admit()
+        try:
+            if self._pool is None:
+                # Sans pool : pool de threads par défaut de la boucle, pour ne jamais la bloquer
+                return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+            return await asyncio.wrap_future(self._pool.submit(function, *args))
+        finally:
+            self._release()
+
+    # Variante bloquante, pour les fonctions synchrones (crud.py, scripts)
+    def hash(self, password: str) -> str:
+        with metrics.timed("password_hash"):
+            return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """Renvoie (valide, nouveau hachage ou None si le coût du hachage est déjà le bon)."""
+        with metrics.timed("password_verify"):
+            return self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self.verify_and_update(password, hashed)[0]
+
+    # Variante asynchrone : la boucle d'événements attend le pool sans occuper de thread
+    async def hash_async(self, password: str) -> str:
+        with metrics.timed("password_hash"):
+            return await self._run_async(_hash, password, self.rounds)
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        with metrics.timed("password_verify"):
+            return await self._run_async(_verify_and_update, password, hashed, self.rounds)
+
+    def record_rehash(self, username: str):
+        self.rehashed += 1
+        logging.info(f"Mot de passe de {username} haché de nouveau avec le coût bcrypt {self.rounds}")
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
@@ -0,0 +1,184 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import schemas
+from inference import COLUMN_MAPPING
+
+
+def models_signature(directory: str) -> tuple:
+    """Renvoie une empreinte (nom, date de modification, taille) des fichiers de modèles."""
+    try:
+        entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return ()
+    return tuple(
+        (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for entry in entries
+        if entry.is_file()
+    )
+
+
+class PredictionCache:
+    """
+    Cache LRU/TTL des prédictions, indexé par la forme canonique d'une PredictRequest.
+
+    La forme canonique normalise les espaces, ramène la casse des catégories sur
+    l'orthographe vue à l'entraînement et, si `km_bucket` est positif, remplace le
+    kilométrage par le centre de sa tranche. Le cache est vidé automatiquement dès que
+    les fichiers du répertoire des modèles changent.
+
+    Args:
+        vocabularies (Callable[[], dict[str, set[str]]]): Fonction renvoyant les catégories
+            connues par champ ; appelée au premier usage pour ne pas forcer le chargement
+            des modèles à l'import.
+        max_size (int): Nombre maximal d'entrées (0 désactive le cache).
+        ttl_seconds (float): Durée de vie d'une entrée.
+        km_bucket (float): Largeur des tranches de kilométrage (0 : pas de regroupement).
+        models_dir (str): Répertoire surveillé pour l'invalidation.
+        check_interval (float): Intervalle minimal entre deux vérifications du répertoire.
+    """
+
+    def __init__(
+        self,
+        vocabularies: Callable[[], dict[str, set[str]]],
+        max_size: int = 10000,
+        ttl_seconds: float = 3600,
+        km_bucket: float = 0,
+        models_dir: str = "./models/pkl",
+        check_interval: float = 1.0,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.km_bucket = km_bucket
+        self.models_dir = models_dir
+        self.check_interval = check_interval
+        self._load_vocabularies = vocabularies
+        # (catégories connues, forme repliée -> orthographe vue) publiés ensemble par une seule
+        # affectation : `clear` peut les oublier pendant qu'une requête les lit
+        self._vocabulary: tuple[dict[str, set[str]], dict[str, dict[str, str]]] | None = None
+        self._entries: OrderedDict[tuple, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = models_signature(models_dir)
+        self._next_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _vocabularies(self) -> tuple[dict[str, set[str]], dict[str, dict[str, str]]]:
+        vocabulary = self._vocabulary
+        if vocabulary is None:
+            vocabularies = self._load_vocabularies()
+            canonical = {
+                field: {value.casefold(): value for value in sorted(values)}
+                for field, values in vocabularies.items()
+            }
+            vocabulary = ({field: set(values) for field, values in vocabularies.items()}, canonical)
+            self._vocabulary = vocabulary
+        return vocabulary
+
+    @property
+    def vocabularies_loaded(self) -> bool:
+        return self._vocabulary is not None
+
+    def warm_up(self):
+        """Charge les vocabulaires (et donc les modèles servis) sans attendre la première requête."""
+        self._vocabularies()
+
+    def knows(self, field: str, value: str) -> bool:
+        """Indique si `value` (déjà canonique) a été vue à l'entraînement pour `field`."""
+        return value in self._vocabularies()[0].get(field, ())
+
+    def canonicalize(self, request: schemas.PredictRequest) -> schemas.PredictRequest:
+        """Renvoie la requête sous forme canonique (celle qui est réellement prédite)."""
+        known_by_field, canonical = self._vocabularies()
+        update = {}
+        for field, known in known_by_field.items():
+            value = getattr(request, field)
+            normalized = " ".join(value.split())
+            if normalized not in known:
+                folded = normalized.casefold()
+                normalized = canonical[field].get(folded, folded)
+            if normalized != value:
+                update[field] = normalized
+        if self.km_bucket > 0:
+            bucket = math.floor(request.kilometrage / self.km_bucket)
+            update["kilometrage"] = (bucket + 0.5) * self.km_bucket
+        return request.model_copy(update=update) if update else request
+
+    @staticmethod
+    def key(request: schemas.PredictRequest, version: str = "") -> tuple:
+        """Clé de cache d'une requête déjà canonique, pour une version de modèles donnée."""
+        return (version, *(getattr(request, field) for field in COLUMN_MAPPING))
+
+    def _check_models(self, now: float):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        signature = models_signature(self.models_dir)
+        if signature != self._signature:
+            self._signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, key: tuple) -> dict | None:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_models(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: tuple, value: dict):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache et oublie les vocabulaires (par exemple après un changement de modèles)."""
+        with self._lock:
+            self._entries.clear()
+            self._vocabulary = None
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "km_bucket": self.km_bucket,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import metrics
+import models
+from inference import COLUMN_MAPPING
+
+prediction_log_rows = metrics.registry.register(
+    metrics.Counter(
+        "prediction_log_rows_total",
+        "Lignes du journal des prédictions, par issue (written, dropped, failed).",
+        ("outcome",),
+    )
+)
+
+
+class PredictionLogWriter:
+    """
+    Journal des appels à /predict, écrit par lots en tâche de fond.
+
+    `record` ne fait que construire la ligne et la déposer dans une file bornée : la
+    requête ne paie jamais d'accès à la base. Une tâche de fond vide la file par
+    insertions groupées, dès que `flush_rows` lignes sont en attente et au plus tard
+    toutes les `flush_interval_ms` millisecondes. Lorsque la file est pleine (base lente
+    ou indisponible), les nouvelles lignes sont abandonnées et comptées plutôt que de
+    ralentir /predict. À l'arrêt, `stop` laisse la tâche terminer l'écriture en cours
+    et vider la file.
+
+    Args:
+        session_factory (Callable[[], AsyncSession]): Fabrique des sessions d'écriture.
+        max_queue (int): Nombre maximal de lignes en attente d'écriture.
+        flush_interval_ms (float): Attente maximale avant l'écriture d'un lot incomplet.
+        flush_rows (int): Nombre maximal de lignes par insertion.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_queue: int = 10000,
+        flush_interval_ms: float = 500,
+        flush_rows: int = 500,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max(1, max_queue)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.flush_rows = max(1, flush_rows)
+        self._pending: deque[dict] = deque()
+        self._wakeup: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+        self._closing = False
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        """Démarre la tâche d'écriture dans la boucle d'événements courante."""
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def record(self, request, result: dict, version: str, latency_ms: float, cached: bool) -> bool:
+        """
+        Dépose une ligne dans la file, sans attendre ; à appeler depuis la boucle d'événements.
+
+        Returns:
+            bool: False si la ligne a été abandonnée faute de place.
+        """
+        if len(self._pending) >= self.max_queue:
+            self.dropped += 1
+            prediction_log_rows.inc("dropped")
+            return False
+        if self._worker is None or self._worker.done():
+            self.start()
+        row = {field: getattr(request, field) for field in COLUMN_MAPPING}
+        row.update(
+            created_at=datetime.utcnow(),
+            catboost_prediction=result["catboost_prediction"],
+            lr_evaluation=result["Logistic_Regression_evaluation"],
+            model_version=version,
+            latency_ms=latency_ms,
+            cached=cached,
+        )
+        self._pending.append(row)
+        self.recorded += 1
+        if len(self._pending) >= self.flush_rows:
+            self._wakeup.set()
+        return True
+
+    async def _flush(self, rows: list[dict]):
+        try:
+            with metrics.timed("prediction_log_flush"):
+                async with self.session_factory() as db:
+                    await db.execute(insert(models.PredictionLog), rows)
+                    await db.commit()
+        except Exception as e:
+            self.failed += len(rows)
+            prediction_log_rows.inc("failed", amount=len(rows))
+            logging.error(f"Échec de l'écriture de {len(rows)} lignes du journal des prédictions : {e}")
+            return
+        self.flushes += 1
+        self.written += len(rows)
+        prediction_log_rows.inc("written", amount=len(rows))
+
+    async def _run(self):
+        # La tâche n'est jamais annulée : `stop` lève `_closing` et la réveille, elle
+        # termine alors l'écriture en cours, vide la file et s'arrête d'elle-même.
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                rows = [self._pending.popleft() for _ in range(min(self.flush_rows, len(self._pending)))]
+                await self._flush(rows)
+            if self._closing:
+                return
+
+    async def stop(self):
+        """Arrête la tâche de fond après avoir écrit toutes les lignes en attente."""
+        if self._worker is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._worker
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._pending),
+            "max_queue": self.max_queue,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "flush_rows": self.flush_rows,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
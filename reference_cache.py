@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models, schemas
+
+# Tables de référence : nom logique -> (modèle SQLAlchemy, attribut portant le nom, schéma imbriqué).
+# Le schéma est celui du champ de schemas.Vehicule (schemas.py redéfinit certaines classes *Base
+# après Vehicule : le nom de module ne désigne pas la classe utilisée par le champ).
+REFERENCE_TABLES = {
+    table: (model, name_attribute, schemas.Vehicule.model_fields[table].annotation)
+    for table, model, name_attribute in (
+        ("carburant", models.Carburant, "type"),
+        ("transmission", models.Transmission, "type"),
+        ("marque", models.Marque, "name"),
+        ("modele", models.Modele, "name"),
+        ("finition", models.Finition, "name"),
+    )
+}
+
+# Tables dont les noms peuvent être résolus au sein d'une marque (un même modèle existe chez plusieurs marques)
+MARQUE_SCOPED_TABLES = ("modele", "finition")
+
+# Colonnes de Vehicule copiées telles quelles dans schemas.Vehicule
+VEHICULE_COLUMNS = (
+    "id", "annee", "kilometrage", "prix", "etat",
+    "marque_id", "modele_id", "finition_id", "carburant_id", "transmission_id",
+)
+
+
+class ReferenceSnapshot:
+    """
+    Contenu figé des tables de référence à un instant donné.
+
+    Les lignes sont converties une seule fois en schémas Pydantic (et en dictionnaires
+    prêts à sérialiser), partagés par toutes les réponses. L'index nom -> identifiant
+    est insensible à la casse ; lorsqu'un nom apparaît plusieurs fois (un même modèle
+    chez deux marques), le plus petit identifiant est retenu, et les modèles et
+    finitions ont en plus un index (marque, nom) -> identifiant.
+
+    `dangling` retient les identifiants référencés par des véhicules mais toujours absents
+    après un rechargement : ils ne provoquent plus de rechargement pour cet instantané.
+    """
+
+    def __init__(self, version: int, rows: dict[str, list]):
+        self.version = version
+        self.loaded_at = time.time()
+        self.by_id: dict[str, dict[int, object]] = {}
+        self.by_name: dict[str, dict[str, int]] = {}
+        self.ids_by_name: dict[str, dict[str, list[int]]] = {}
+        self.names: dict[str, list[str]] = {}
+        self.by_marque_name: dict[str, dict[tuple[int, str], int]] = {}
+        self.dumped: dict[str, dict[int, dict]] = {}
+        self.dangling: set[tuple[str, int]] = set()
+        for table, (_, name_attribute, schema) in REFERENCE_TABLES.items():
+            self.by_id[table] = {row.id: schema.model_validate(row, from_attributes=True) for row in rows[table]}
+            self.dumped[table] = {id: item.model_dump() for id, item in self.by_id[table].items()}
+            names: dict[str, int] = {}
+            ids_by_name: dict[str, list[int]] = {}
+            scoped: dict[tuple[int, str], int] = {}
+            self.names[table] = []
+            for row in sorted(rows[table], key=lambda row: row.id):
+                name = getattr(row, name_attribute)
+                if name is not None:
+                    self.names[table].append(name)
+                    names.setdefault(name.casefold(), row.id)
+                    ids_by_name.setdefault(name.casefold(), []).append(row.id)
+                    if table in MARQUE_SCOPED_TABLES:
+                        scoped.setdefault((row.marque_id, name.casefold()), row.id)
+            self.by_name[table] = names
+            self.ids_by_name[table] = ids_by_name
+            if table in MARQUE_SCOPED_TABLES:
+                self.by_marque_name[table] = scoped
+
+
+class ReferenceCache:
+    """
+    Cache local au processus des tables Carburant, Transmission, Marque, Modele et Finition.
+
+    Ces tables sont petites et ne changent presque jamais : elles sont lues en entier au
+    démarrage puis rechargées périodiquement, ou à la demande lorsqu'un véhicule
+    référence un identifiant inconnu du cache. Chaque rechargement construit un nouvel
+    instantané versionné, remplacé par une simple affectation : les lectures ne prennent
+    aucun verrou.
+    """
+
+    def __init__(self):
+        self._snapshot: ReferenceSnapshot | None = None
+        self._refresh_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    async def refresh(self, db: AsyncSession) -> ReferenceSnapshot:
+        """Relit les tables de référence et publie un nouvel instantané."""
+        rows = {}
+        for table, (model, _, _) in REFERENCE_TABLES.items():
+            result = await db.execute(select(model))
+            rows[table] = result.scalars().all()
+        return self._publish(rows)
+
+    def load(self, db: Session) -> ReferenceSnapshot:
+        """Version synchrone de `refresh`, pour les scripts hors de l'application."""
+        rows = {table: db.execute(select(model)).scalars().all() for table, (model, _, _) in REFERENCE_TABLES.items()}
+        return self._publish(rows)
+
+    def _publish(self, rows: dict[str, list]) -> ReferenceSnapshot:
+        snapshot = ReferenceSnapshot(self.version + 1, rows)
+        self._snapshot = snapshot
+        self.refreshes += 1
+        logging.info(
+            f"Cache de référence v{snapshot.version} chargé : "
+            + ", ".join(f"{len(snapshot.by_id[table])} {table}" for table in REFERENCE_TABLES)
+        )
+        return snapshot
+
+    async def refresh_from(self, session_factory: Callable[[], AsyncSession]) -> bool:
+        """Recharge le cache dans une session dédiée ; un échec laisse l'instantané courant en place."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        version = self.version
+        async with self._refresh_lock:
+            if self.version != version:
+                # Un autre appelant vient de recharger le cache
+                return True
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+                return True
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"Échec du chargement du cache de référence : {e}")
+                return False
+
+    def start(self, session_factory: Callable[[], AsyncSession], interval_seconds: float):
+        """Démarre le rechargement périodique dans la boucle d'événements courante."""
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await self.refresh_from(session_factory)
+
+        if interval_seconds > 0:
+            self._task = asyncio.get_running_loop().create_task(run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get(self, table: str, id: int | None):
+        """Renvoie la ligne `id` de `table` sous forme de schéma, ou None."""
+        return self._snapshot.by_id[table].get(id) if self._snapshot else None
+
+    def id_for(self, table: str, name: str, marque_id: int | None = None) -> int | None:
+        """
+        Renvoie l'identifiant correspondant à `name` (insensible à la casse), ou None.
+        Pour un modèle ou une finition, le nom est d'abord cherché dans la marque `marque_id`.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        folded = name.casefold()
+        if marque_id is not None and table in snapshot.by_marque_name:
+            scoped = snapshot.by_marque_name[table].get((marque_id, folded))
+            if scoped is not None:
+                return scoped
+        return snapshot.by_name[table].get(folded)
+
+    def ids_for(self, table: str, name: str) -> list[int]:
+        """Renvoie tous les identifiants portant `name` (insensible à la casse), par ordre croissant."""
+        snapshot = self._snapshot
+        return snapshot.ids_by_name[table].get(name.casefold(), []) if snapshot else []
+
+    def names(self, table: str) -> list[str]:
+        """Noms de `table` dans l'ordre des identifiants (liste vide tant que le cache n'est pas chargé)."""
+        return self._snapshot.names[table] if self._snapshot else []
+
+    def has_name(self, table: str, name: str) -> bool:
+        return self._snapshot is not None and name.casefold() in self._snapshot.by_name[table]
+
+    def covers(self, vehicules: list) -> bool:
+        """
+        Indique si toutes les relations des véhicules (objets ou lignes SQL) sont présentes
+        dans le cache. Une relation NULL, ou déjà connue comme absente de la base, ne compte pas.
+        """
+        snapshot = self._snapshot
+        return snapshot is not None and not self._missing(snapshot, vehicules)
+
+    async def ensure_covered(self, vehicules: list, session_factory: Callable[[], AsyncSession]):
+        """
+        Recharge le cache si des véhicules référencent des identifiants inconnus (une ligne
+        de référence ajoutée depuis le dernier chargement). Les identifiants encore absents
+        après le rechargement sont retenus : ils ne provoquent qu'un rechargement par instantané.
+        """
+        if self.covers(vehicules):
+            return
+        await self.refresh_from(session_factory)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            snapshot.dangling.update(self._missing(snapshot, vehicules))
+
+    @staticmethod
+    def _missing(snapshot: ReferenceSnapshot, vehicules: list) -> set[tuple[str, int]]:
+        by_id, dangling = snapshot.by_id, snapshot.dangling
+        return {
+            (table, id)
+            for vehicule in vehicules
+            for table in REFERENCE_TABLES
+            if (id := getattr(vehicule, f"{table}_id")) is not None
+            and id not in by_id[table]
+            and (table, id) not in dangling
+        }
+
+    def vehicule(self, vehicule: models.Vehicule) -> schemas.Vehicule:
+        """Sérialise un véhicule chargé sans ses relations, en les complétant depuis le cache."""
+        data = {column: getattr(vehicule, column) for column in VEHICULE_COLUMNS}
+        for table in REFERENCE_TABLES:
+            data[table] = self.get(table, data[f"{table}_id"])
+        return schemas.Vehicule(**data)
+
+    def vehicule_dicts(self, rows: list) -> list[dict]:
+        """
+        Convertit des lignes de Vehicule (tuples dans l'ordre de VEHICULE_COLUMNS) en
+        dictionnaires de même forme que schemas.Vehicule, sans objet ORM ni validation
+        Pydantic. Une relation absente du cache vaut None : appeler `ensure_covered` avant.
+        """
+        dumped = self._snapshot.dumped
+        relations = [(table, f"{table}_id", dumped[table]) for table in REFERENCE_TABLES]
+        items = []
+        for row in rows:
+            data = dict(zip(VEHICULE_COLUMNS, row))
+            for table, key, by_id in relations:
+                data[table] = by_id.get(data[key])
+            items.append(data)
+        return items
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "version": self.version,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "dangling": len(snapshot.dangling) if snapshot else 0,
+            "sizes": {table: len(snapshot.by_id[table]) for table in REFERENCE_TABLES} if snapshot else {},
+        }
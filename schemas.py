@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Dict, Optional, List, Literal, Union
 from datetime import datetime
 
 class Carburant(BaseModel):
@@ -76,6 +76,42 @@ class PredictRequest(BaseModel):
             }
         }
 
+class PredictResult(BaseModel):
+    catboost_prediction: float
+    Logistic_Regression_evaluation: str
+
+class FeatureContributions(BaseModel):
+    # Valeur de base + somme des contributions = sortie brute du modèle
+    # (prix pour CatBoost, logit de la classe "Abordable" pour la régression logistique)
+    base_value: float
+    contributions: Dict[str, float]
+
+class PredictExplanation(BaseModel):
+    catboost: FeatureContributions
+    Logistic_Regression: FeatureContributions
+
+class ExplainedPredictResult(PredictResult):
+    # Sans valeur par défaut : un résultat sans explication est sérialisé comme PredictResult
+    explanation: PredictExplanation
+
+class CategoryNormalization(BaseModel):
+    # Valeur reçue, valeur prédite à sa place (None si inconnue) et type de résolution
+    # ("folded" : casse/accents/espaces, "fuzzy" : correction approximative, "unknown")
+    input: str
+    value: Optional[str] = None
+    match: str
+    score: float
+
+class PredictBatchItem(BaseModel):
+    index: int
+    prediction: Optional[Union[ExplainedPredictResult, PredictResult]] = None
+    normalized: Optional[Dict[str, CategoryNormalization]] = None
+    error: Optional[str] = None
+
+class PredictBatchResponse(BaseModel):
+    results: List[PredictBatchItem]
+    errors: int = 0
+
 class VehiculeUpdate(VehiculeBase):
     pass
 
@@ -166,6 +202,60 @@ class FinitionBase(BaseModel):
     class Config:
         from_attribute = True
 
+class VehiculeSearch(BaseModel):
+    marque_id: Optional[int] = None
+    modele_id: Optional[int] = None
+    finition_id: Optional[int] = None
+    carburant_id: Optional[int] = None
+    transmission_id: Optional[int] = None
+    marque: Optional[str] = None
+    modele: Optional[str] = None
+    finition: Optional[str] = None
+    carburant: Optional[str] = None
+    transmission: Optional[str] = None
+    etat: Optional[str] = None
+    annee_min: Optional[int] = None
+    annee_max: Optional[int] = None
+    kilometrage_min: Optional[float] = Field(None, ge=0)
+    kilometrage_max: Optional[float] = Field(None, ge=0)
+    prix_min: Optional[float] = Field(None, ge=0)
+    prix_max: Optional[float] = Field(None, ge=0)
+    sort: Literal["id", "annee", "kilometrage", "prix"] = "id"
+    order: Literal["asc", "desc"] = "asc"
+    skip: int = Field(0, ge=0)
+    limit: int = Field(20, ge=1, le=200)
+
+class VehiculeSearchResponse(BaseModel):
+    total: int
+    total_cached: bool
+    items: List[Vehicule]
+
+class VehiculeIngest(VehiculeBase):
+    # Ligne d'un chargement en masse : les relations sont données par identifiant ou par nom
+    annee: int
+    kilometrage: float
+    prix: float
+    etat: str
+    marque: Optional[str] = None
+    modele: Optional[str] = None
+    finition: Optional[str] = None
+    carburant: Optional[str] = None
+    transmission: Optional[str] = None
+
+class VehiculeBulkError(BaseModel):
+    line: int
+    error: str
+
+class VehiculeBulkReport(BaseModel):
+    rows: int = 0
+    inserted: int = 0
+    failed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: List[VehiculeBulkError] = []
+    errors_truncated: bool = False
+
 class UserBase(BaseModel):
     email: EmailStr
     nom: str
@@ -0,0 +1,228 @@
+"""
+Score hors ligne d'un catalogue de véhicules (CSV ou Parquet) avec les modèles de models/pkl.
+
+Le fichier est lu par blocs de `--chunk-size` lignes ; chaque bloc est prédit par
+CatBoost et la régression logistique dans un pool de processus dont chaque worker
+charge les modèles une seule fois. Les résultats sont écrits au fil de l'eau, dans
+l'ordre du fichier d'entrée : la mémoire dépend de la taille des blocs et du nombre de
+workers, pas de celle du catalogue.
+
+Les colonnes d'entrée portent les noms des champs de /predict (kilometrage, annee,
+marque...) ou ceux de l'entraînement (Kilometrage, Annee, Marque...). La sortie
+reprend les colonnes d'entrée et ajoute catboost_prediction,
+Logistic_Regression_evaluation et error.
+
+Usage :
+    python score.py catalogue.csv predictions.csv --workers 4 --chunk-size 20000
+    python score.py catalogue.parquet predictions.parquet
+    python score.py catalogue.csv - > predictions.csv
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterator
+
+import numpy as np
+import pandas as pd
+
+from inference import COLUMN_MAPPING, category_vocabularies, evaluate_price
+from model_registry import ModelRegistry
+
+NUMERIC_COLUMNS = ("Kilometrage", "Annee")
+CATEGORICAL_COLUMNS = tuple(column for column in COLUMN_MAPPING.values() if column not in NUMERIC_COLUMNS)
+
+# Modèles du worker courant, chargés par `init_worker`
+_models: tuple | None = None
+
+
+def init_worker(models_dir: str):
+    """Initialiseur du pool : charge les modèles une fois par processus."""
+    global _models
+    registry = ModelRegistry(models_dir)
+    catboost_model = registry.get("catboost")
+    lr_model = registry.get("logistic_regression")
+    vocabularies = category_vocabularies(catboost_model, lr_model)
+    canonical = {
+        COLUMN_MAPPING[field]: {value.casefold(): value for value in sorted(values)}
+        for field, values in vocabularies.items()
+    }
+    _models = (catboost_model, lr_model, canonical)
+
+
+def canonicalize_frame(features: pd.DataFrame, canonical: dict[str, dict[str, str]]) -> pd.DataFrame:
+    """Mêmes règles que PredictionCache.canonicalize, appliquées colonne par colonne."""
+    for column, mapping in canonical.items():
+        values = features[column].astype(str).str.split().str.join(" ")
+        known = values.isin(set(mapping.values()))
+        folded = values[~known].str.casefold()
+        values[~known] = folded.map(mapping).fillna(folded)
+        features[column] = values
+    return features
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prédit un bloc dans le worker courant.
+
+    Returns:
+        pd.DataFrame: Colonnes catboost_prediction, Logistic_Regression_evaluation et error,
+        alignées sur le bloc ; les lignes incomplètes reçoivent une erreur au lieu d'une prédiction.
+    """
+    catboost_model, lr_model, canonical = _models
+    features = chunk.rename(columns=COLUMN_MAPPING)[list(COLUMN_MAPPING.values())].copy()
+    for column in NUMERIC_COLUMNS:
+        features[column] = pd.to_numeric(features[column], errors="coerce")
+    missing = features.isna().any(axis=1).to_numpy()
+
+    result = pd.DataFrame(
+        {
+            "catboost_prediction": np.full(len(chunk), np.nan),
+            "Logistic_Regression_evaluation": pd.Series([None] * len(chunk), dtype=object),
+            "error": pd.Series([None] * len(chunk), dtype=object),
+        }
+    )
+    result.loc[missing, "error"] = "Valeur manquante ou invalide"
+    valid = ~missing
+    if valid.any():
+        features = canonicalize_frame(features[valid].reset_index(drop=True), canonical)
+        try:
+            result.loc[valid, "catboost_prediction"] = catboost_model.predict(features)
+            result.loc[valid, "Logistic_Regression_evaluation"] = [
+                evaluate_price(prediction) for prediction in lr_model.predict(features)
+            ]
+        except Exception as e:
+            result.loc[valid, "error"] = f"Erreur lors de la prédiction: {e}"
+    return result
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Lit le fichier d'entrée par blocs de `chunk_size` lignes."""
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+    categorical = {column: str for column in CATEGORICAL_COLUMNS}
+    categorical.update({field: str for field, column in COLUMN_MAPPING.items() if column in CATEGORICAL_COLUMNS})
+    yield from pd.read_csv(path, chunksize=chunk_size, dtype=categorical, keep_default_na=False)
+
+
+class ChunkWriter:
+    """Écrit les blocs de résultats dans un fichier CSV, NDJSON ou Parquet (selon l'extension)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = "csv"
+        lowered = path.lower()
+        if lowered.endswith(".parquet"):
+            self.format = "parquet"
+        elif lowered.endswith((".ndjson", ".jsonl")):
+            self.format = "ndjson"
+        self._handle: IO | None = None
+        self._parquet = None
+        self._first = True
+
+    def write(self, frame: pd.DataFrame):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+            return
+        if self._handle is None:
+            self._handle = sys.stdout if self.path == "-" else open(self.path, "w", encoding="utf-8", newline="")
+        if self.format == "ndjson":
+            frame.to_json(self._handle, orient="records", lines=True, force_ascii=False)
+        else:
+            frame.to_csv(self._handle, header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._handle is not None and self._handle is not sys.stdout:
+            self._handle.close()
+
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    models_dir: str = "./models/pkl",
+    workers: int | None = None,
+    chunk_size: int = 20000,
+) -> dict:
+    """
+    Score `input_path` et écrit les prédictions dans `output_path`.
+
+    Au plus deux blocs par worker sont en cours à un instant donné, ce qui borne la
+    mémoire ; avec `workers=0`, les blocs sont prédits dans le processus courant.
+
+    Returns:
+        dict: Lignes lues, lignes en erreur, durée et débit.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    writer = ChunkWriter(output_path)
+    rows = errors = 0
+    started = time.perf_counter()
+
+    def write(chunk: pd.DataFrame, result: pd.DataFrame):
+        nonlocal rows, errors
+        writer.write(pd.concat([chunk.reset_index(drop=True), result], axis=1))
+        rows += len(chunk)
+        errors += int(result["error"].notna().sum())
+        logging.info(f"{rows} lignes scorées ({rows / (time.perf_counter() - started):.0f} lignes/s)")
+
+    try:
+        if workers == 0:
+            init_worker(models_dir)
+            for chunk in read_chunks(input_path, chunk_size):
+                write(chunk, score_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(models_dir,)) as pool:
+                pending: deque = deque()
+                for chunk in read_chunks(input_path, chunk_size):
+                    pending.append((chunk, pool.submit(score_chunk, chunk)))
+                    if len(pending) >= 2 * workers:
+                        chunk, future = pending.popleft()
+                        write(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    write(chunk, future.result())
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "workers": workers,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Fichier CSV ou Parquet à scorer")
+    parser.add_argument("output", help="Fichier de sortie (.csv, .ndjson ou .parquet), ou - pour la sortie standard")
+    parser.add_argument("--models-dir", default="./models/pkl", help="Répertoire des modèles")
+    parser.add_argument("--workers", type=int, help="Nombre de processus (nombre de cœurs par défaut, 0 : sans pool)")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Lignes par bloc")
+    args = parser.parse_args()
+
+    # Les journaux vont sur la sortie d'erreur : la sortie standard peut recevoir les prédictions
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    report = score_file(args.input, args.output, args.models_dir, args.workers, args.chunk_size)
+    logging.info(
+        f"{report['rows']} lignes scorées en {report['seconds']:.1f} s avec {report['workers']} worker(s) : "
+        f"{report['rows_per_second']:.0f} lignes/s, {report['errors']} en erreur"
+    )
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+
+import metrics
+
+token_cache_lookups = metrics.registry.register(
+    metrics.Counter(
+        "auth_token_cache_lookups_total", "Consultations du cache des jetons vérifiés, par résultat.", ("result",)
+    )
+)
+token_revocations = metrics.registry.register(
+    metrics.Counter("auth_token_revocations_total", "Utilisateurs dont les jetons en cours ont été révoqués.")
+)
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """
+    Utilisateur authentifié, tel que décrit par son jeton : suffisant pour autoriser une
+    requête sans relire la table Users.
+    """
+
+    id: int
+    nom: str
+    is_active: bool
+    is_superuser: bool
+    issued_at: float | None
+    expires_at: float
+
+    def to_payload(self) -> dict:
+        """Claims à signer dans le jeton (`sub` garde le nom, comme les jetons existants)."""
+        return {
+            "sub": self.nom,
+            "uid": self.id,
+            "active": self.is_active,
+            "su": self.is_superuser,
+            "iat": self.issued_at,
+            "exp": self.expires_at,
+        }
+
+    @classmethod
+    def from_user(cls, user, issued_at: float | None, expires_at: float) -> "TokenClaims":
+        return cls(
+            id=user.id,
+            nom=user.nom,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            issued_at=issued_at,
+            expires_at=expires_at,
+        )
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "TokenClaims | None":
+        """Claims d'un jeton décodé, ou None pour un jeton émis sans l'identifiant de l'utilisateur."""
+        if payload.get("sub") is None or payload.get("uid") is None or payload.get("exp") is None:
+            return None
+        return cls(
+            id=int(payload["uid"]),
+            nom=payload["sub"],
+            is_active=bool(payload.get("active", True)),
+            is_superuser=bool(payload.get("su", False)),
+            issued_at=payload.get("iat"),
+            expires_at=float(payload["exp"]),
+        )
+
+
+def token_key(token: str) -> bytes:
+    """Clé du cache : empreinte du jeton, pour ne pas garder les jetons eux-mêmes en mémoire."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Cache des jetons JWT déjà vérifiés et liste de révocation en mémoire.
+
+    Un jeton dont la signature a été vérifiée une fois est gardé, sous l'empreinte
+    SHA-256 de sa chaîne, avec ses claims : les requêtes suivantes évitent le décodage
+    et la vérification HMAC. Une entrée n'est jamais servie après l'expiration (`exp`)
+    du jeton, et au plus `max_ttl_seconds` après sa mise en cache.
+
+    Les jetons portent l'identité et les droits de l'utilisateur : après un changement
+    (update_user, delete_user, update-password), `revoke_user` refuse tous ses jetons
+    émis avant cet instant, qu'ils soient en cache ou non. Une révocation est gardée
+    `max_token_lifetime_seconds`, la durée de vie maximale d'un jeton : au-delà, les
+    jetons concernés ont tous expiré. La liste est propre à chaque processus ; avec
+    plusieurs workers, un jeton révoqué reste accepté par les autres jusqu'à son
+    expiration.
+
+    Args:
+        max_size (int): Nombre maximal de jetons gardés (0 désactive le cache).
+        max_ttl_seconds (float): Durée de vie maximale d'une entrée.
+        max_token_lifetime_seconds (float): Durée de vie maximale des jetons émis.
+        max_revocations (int): Nombre maximal de révocations gardées simultanément.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        max_ttl_seconds: float = 300,
+        max_token_lifetime_seconds: float = 1800,
+        max_revocations: int = 100000,
+    ):
+        self.max_size = max_size
+        self._tokens = TTLCache(maxsize=max(max_size, 1), ttl=max_ttl_seconds)
+        self._revoked_before = TTLCache(maxsize=max_revocations, ttl=max_token_lifetime_seconds)
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> TokenClaims | None:
+        if self.max_size <= 0:
+            return None
+        key = token_key(token)
+        with self._lock:
+            claims = self._tokens.get(key)
+            if claims is not None and claims.expires_at <= time.time():
+                del self._tokens[key]
+                claims = None
+        token_cache_lookups.inc("hit" if claims is not None else "miss")
+        return claims
+
+    def set(self, token: str, claims: TokenClaims):
+        if self.max_size <= 0 or claims.expires_at <= time.time():
+            return
+        with self._lock:
+            self._tokens[token_key(token)] = claims
+
+    def revoke_user(self, user_id: int):
+        """Refuse désormais tous les jetons de l'utilisateur émis jusqu'à maintenant."""
+        with self._lock:
+            self._revoked_before[user_id] = time.time()
+        token_revocations.inc()
+
+    def is_revoked(self, claims: TokenClaims) -> bool:
+        with self._lock:
+            revoked_at = self._revoked_before.get(claims.id)
+        if revoked_at is None:
+            return False
+        # Sans date d'émission, on ne peut pas savoir si le jeton précède la révocation
+        return claims.issued_at is None or claims.issued_at <= revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._revoked_before.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._tokens), "max_size": self.max_size, "revocations": len(self._revoked_before)}
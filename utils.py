@@ -1,11 +1,38 @@
 # API/utils.py
 
-from passlib.context import CryptContext
+import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from dotenv import load_dotenv
+
+from passwords import PasswordHasher
+from tokens import VerifiedTokenCache
+
+load_dotenv()
+
+# Coût bcrypt des nouveaux hachages ; les hachages d'un autre coût sont refaits à la connexion
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+# bcrypt est calculé dans un pool de processus dédié, hors du pool de threads de l'API
+password_hasher = PasswordHasher(
+    rounds=BCRYPT_ROUNDS, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING
+)
+
+# Durée de vie des jetons d'accès, qui borne aussi celle des révocations
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+
+# Jetons déjà vérifiés et révocations (update_user, delete_user, update-password)
+token_cache = VerifiedTokenCache(
+    max_size=TOKEN_CACHE_SIZE,
+    max_ttl_seconds=TOKEN_CACHE_TTL_SECONDS,
+    max_token_lifetime_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, password: str) -> bool:
-    return pwd_context.verify(plain_password, password)
\ No newline at end of file
+    return password_hasher.verify(plain_password, password)